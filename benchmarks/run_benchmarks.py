@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de bout en bout avec comparaison à une référence.
+
+Mesure, sur des jeux de données synthétiques de 100 à 100 000 lignes:
+- le chargement des données (DataLoader.load, CSV et Excel)
+- la conversion en territoires (get_all_territories) et la planification
+- le suivi de progression (ProgressTracker, SQLiteProgressTracker)
+- la vérification des PDFs (verify_data)
+- l'automatisation complète (run_automation) contre le simulateur NWS,
+  avec et sans clics perdus (coût des attentes expirées et des tentatives)
+
+Les résultats sont écrits en JSON, puis chaque mesure est comparée à la
+référence (benchmarks/baseline.json): le script se termine en erreur
+(code 1) si une mesure est plus lente que la référence au-delà du seuil, et
+(code 2) si la référence ou la mesure de référence d'un cas manque.
+
+Usage:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 100,1000 --only load
+    python benchmarks/run_benchmarks.py --save-baseline
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# Ajouter le dossier racine au path
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+try:
+    import pandas as pd
+except ImportError:
+    print("ERREUR: pandas n'est pas installé.")
+    print("Installez-le avec: pip install pandas openpyxl")
+    sys.exit(1)
+
+from config import EXCEL_COLUMNS, CATEGORIES, VILLES, OPTION_LABELS, STREAM_CHUNK_SIZE
+from territory_automation.automation import NWSAutomator
+from territory_automation.data_loader import DataLoader, ProgressTracker
+from territory_automation.dataset_cache import DatasetCache
+from territory_automation.progress_db import SQLiteProgressTracker
+from territory_automation.simulator import NWSSimulator
+from main import run_automation, verify_data
+
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_OUTPUT = BENCH_DIR / "results" / "latest.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+
+# Écart absolu minimal (secondes) pour signaler une régression: en dessous,
+# la différence relève du bruit de mesure
+MIN_REGRESSION_DELTA = 0.005
+
+# Délais de l'automatiseur pendant les benchmarks (plafonds des attentes)
+BENCH_DELAYS = {
+    "after_click": 0.3,
+    "after_type": 0.1,
+    "after_paste": 0.3,
+    "dropdown_open": 0.3,
+    "confirm_modal": 0.3,
+    "dialog_open": 1.5,
+    "navigation": 0.5,
+    "app_launch": 1.0,
+    "after_save": 1.0,
+    "between_territories": 0.0,
+    "input_pause": 0.0,
+    "focus_cache_ttl": 1.0,
+}
+
+TYPES = ["En présentiel", "Courrier", "Téléphone", "Entreprise"]
+
+
+# =============================================================================
+# Jeux de données synthétiques
+# =============================================================================
+
+def make_dataset(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Génère un jeu de territoires reproductible.
+
+    Args:
+        rows: Nombre de lignes
+        seed: Graine du générateur
+
+    Returns:
+        DataFrame avec les colonnes de EXCEL_COLUMNS
+    """
+    rng = random.Random(seed)
+    villes = [v for v in VILLES if v]
+    data = {key: [] for key in EXCEL_COLUMNS}
+    for i in range(rows):
+        data["numero"].append(f"BEN-{i // 100}-{i % 100:02d}")
+        data["suffixe"].append(rng.choice(["", "", "A", "B"]))
+        data["categorie"].append(rng.choice(list(CATEGORIES)))
+        data["type"].append(rng.choice(TYPES))
+        data["ville"].append(rng.choice(villes))
+        data["lien_gps"].append(
+            f"https://maps.google.com/?q=48.{rng.randrange(10**4):04d},2.{rng.randrange(10**4):04d}"
+        )
+        data["notes"].append(rng.choice(["", "Résidence", "Immeuble avec digicode"]))
+        data["ne_pas_visiter"].append(rng.choice(["", "", "12 rue des Lilas"]))
+        data["notes_proclamateur"].append(rng.choice(["", "Sonner deux fois"]))
+        data["pdf_filename"].append("")
+    return pd.DataFrame({EXCEL_COLUMNS[key]: values for key, values in data.items()})
+
+
+class Workspace:
+    """Fichiers de données et PDFs générés une fois par taille."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._frames: dict[int, pd.DataFrame] = {}
+        self._files: dict[tuple, Path] = {}
+
+    def frame(self, rows: int) -> pd.DataFrame:
+        if rows not in self._frames:
+            self._frames[rows] = make_dataset(rows)
+        return self._frames[rows]
+
+    def data_file(self, rows: int, suffix: str = ".csv") -> Path:
+        key = (rows, suffix)
+        if key not in self._files:
+            path = self.root / f"territoires_{rows}{suffix}"
+            if suffix == ".csv":
+                self.frame(rows).to_csv(path, index=False, encoding="utf-8-sig")
+            else:
+                self.frame(rows).to_excel(path, index=False)
+            self._files[key] = path
+        return self._files[key]
+
+    def pdf_folder(self, rows: int) -> Path:
+        """Dossier contenant un PDF (vide) pour un territoire sur deux."""
+        key = (rows, "pdf")
+        if key not in self._files:
+            folder = self.root / f"pdfs_{rows}"
+            folder.mkdir()
+            for numero in self.frame(rows)[EXCEL_COLUMNS["numero"]].iloc[::2]:
+                (folder / f"{numero}.pdf").touch()
+            self._files[key] = folder
+        return self._files[key]
+
+    def loader(self, rows: int) -> DataLoader:
+        loader = DataLoader(self.data_file(rows), EXCEL_COLUMNS)
+        loader.load()
+        return loader
+
+
+# =============================================================================
+# Cas mesurés
+# =============================================================================
+
+def make_automator(simulator: NWSSimulator, pdf_folder: Path) -> NWSAutomator:
+    """Crée un automatiseur piloté par le simulateur."""
+    return NWSAutomator(
+        exe_path="NW Scheduler.exe",
+        window_title="NW Scheduler",
+        delays=BENCH_DELAYS,
+        pdf_folder=pdf_folder,
+        categories=CATEGORIES,
+        villes=VILLES,
+        labels=OPTION_LABELS,
+        **simulator.automator_kwargs()
+    )
+
+
+def bench_load_csv(ws: Workspace, rows: int) -> dict:
+    path = ws.data_file(rows, ".csv")
+    start = time.perf_counter()
+    DataLoader(path, EXCEL_COLUMNS).load()
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_load_excel(ws: Workspace, rows: int) -> dict:
+    path = ws.data_file(rows, ".xlsx")
+    start = time.perf_counter()
+    DataLoader(path, EXCEL_COLUMNS).load()
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_load_excel_cached(ws: Workspace, rows: int) -> dict:
+    """Chargement d'un classeur inchangé depuis le cache des données."""
+    path = ws.data_file(rows, ".xlsx")
+    cache = DatasetCache(ws.root / "cache")
+    DataLoader(path, EXCEL_COLUMNS, cache=cache).load()
+    start = time.perf_counter()
+    DataLoader(path, EXCEL_COLUMNS, cache=cache).load()
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_stream_excel(ws: Workspace, rows: int) -> dict:
+    """Lecture par blocs (--stream): délai avant le premier territoire."""
+    path = ws.data_file(rows, ".xlsx")
+    start = time.perf_counter()
+    first = None
+    for chunk in DataLoader(path, EXCEL_COLUMNS).stream(STREAM_CHUNK_SIZE):
+        chunk.get_all_territories()
+        if first is None:
+            first = time.perf_counter() - start
+    return {"seconds": time.perf_counter() - start, "first_territory_seconds": first or 0.0}
+
+
+def bench_territories(ws: Workspace, rows: int) -> dict:
+    loader = ws.loader(rows)
+    start = time.perf_counter()
+    loader.get_all_territories()
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_plan(ws: Workspace, rows: int) -> dict:
+    territories = ws.loader(rows).get_all_territories()
+    automator = make_automator(NWSSimulator(), ws.pdf_folder(rows))
+    start = time.perf_counter()
+    for territory in territories:
+        automator.planner.plan(territory)
+    return {"seconds": time.perf_counter() - start}
+
+
+def bench_progress(ws: Workspace, rows: int) -> dict:
+    ids = ws.frame(rows)[EXCEL_COLUMNS["numero"]].tolist()
+    path = ws.root / f"progress_{rows}_{time.monotonic_ns()}.json"
+    tracker = ProgressTracker(path)
+    start = time.perf_counter()
+    for territory_id in ids:
+        if not tracker.is_processed(territory_id):
+            tracker.mark_processed(territory_id)
+    marked = time.perf_counter() - start
+    ProgressTracker(path)
+    return {"seconds": time.perf_counter() - start, "mark_seconds": marked}
+
+
+def bench_progress_db(ws: Workspace, rows: int) -> dict:
+    ids = ws.frame(rows)[EXCEL_COLUMNS["numero"]].tolist()
+    path = ws.root / f"progress_{rows}_{time.monotonic_ns()}.db"
+    tracker = SQLiteProgressTracker(path)
+    start = time.perf_counter()
+    for territory_id in ids:
+        if tracker.claim(territory_id):
+            tracker.mark_processed(territory_id)
+    marked = time.perf_counter() - start
+    tracker.close()
+    SQLiteProgressTracker(path).close()
+    return {"seconds": time.perf_counter() - start, "mark_seconds": marked}
+
+
+def bench_pdf_check(ws: Workspace, rows: int) -> dict:
+    loader = ws.loader(rows)
+    pdf_folder = ws.pdf_folder(rows)
+    start = time.perf_counter()
+    stats = verify_data(logging.getLogger("territory_automation"), loader, pdf_folder)
+    return {"seconds": time.perf_counter() - start, "with_pdf": stats["with_pdf"]}
+
+
+def _run_simulated(ws: Workspace, rows: int, **simulator_options) -> dict:
+    """Exécute run_automation contre le simulateur et compte les tentatives."""
+    loader = ws.loader(rows)
+    simulator = NWSSimulator(**simulator_options)
+    automator = make_automator(simulator, ws.pdf_folder(rows))
+    tracker = ProgressTracker(ws.root / f"progress_e2e_{rows}_{time.monotonic_ns()}.json")
+
+    attempts = {"count": 0}
+    execute_plan = automator.execute_plan
+
+    def counted(plan, no_save=False, journal=None):
+        attempts["count"] += 1
+        return execute_plan(plan, no_save=no_save, journal=journal)
+
+    automator.execute_plan = counted
+
+    logger = logging.getLogger("territory_automation")
+    start = time.perf_counter()
+    run_automation(logger, loader, tracker, automator)
+    seconds = time.perf_counter() - start
+
+    return {
+        "seconds": seconds,
+        "territories_per_minute": rows / seconds * 60 if seconds else 0.0,
+        "seconds_per_territory": seconds / rows,
+        "attempts": attempts["count"],
+        "retries": attempts["count"] - rows,
+        "processed": len(tracker.processed),
+        "actions": simulator.stats["actions"],
+        "missed_clicks": simulator.stats["missed_clicks"],
+        # Territoires créés en trop par les nouvelles tentatives
+        "duplicates": len(simulator.records) - len(tracker.processed),
+    }
+
+
+def bench_e2e(ws: Workspace, rows: int) -> dict:
+    return _run_simulated(ws, rows)
+
+
+def bench_e2e_flaky(ws: Workspace, rows: int) -> dict:
+    """Coût des clics perdus: attentes expirées et nouvelles tentatives."""
+    clean = _run_simulated(ws, rows)
+    flaky = _run_simulated(ws, rows, miss_rate=0.005, seed=1)
+    overhead = flaky["seconds"] - clean["seconds"]
+    flaky["overhead_seconds"] = overhead
+    flaky["overhead_per_missed_click"] = (
+        overhead / flaky["missed_clicks"] if flaky["missed_clicks"] else 0.0
+    )
+    flaky["overhead_per_retry"] = overhead / flaky["retries"] if flaky["retries"] else 0.0
+    return flaky
+
+
+# Nom -> (fonction, nombre maximal de lignes)
+BENCHMARKS: dict[str, tuple[Callable[[Workspace, int], dict], int]] = {
+    "load_csv": (bench_load_csv, 100_000),
+    "load_excel": (bench_load_excel, 10_000),
+    "load_excel_cached": (bench_load_excel_cached, 10_000),
+    "stream_excel": (bench_stream_excel, 10_000),
+    "territories": (bench_territories, 100_000),
+    "plan": (bench_plan, 100_000),
+    "progress": (bench_progress, 10_000),
+    "progress_db": (bench_progress_db, 10_000),
+    "pdf_check": (bench_pdf_check, 100_000),
+    "e2e": (bench_e2e, 1_000),
+    "e2e_flaky": (bench_e2e_flaky, 100),
+}
+
+
+# =============================================================================
+# Exécution et comparaison
+# =============================================================================
+
+def run_benchmarks(sizes: list[int], only: list[str], repeat: int) -> dict:
+    """
+    Exécute les benchmarks sélectionnés.
+
+    Args:
+        sizes: Tailles des jeux de données
+        only: Préfixes des benchmarks à exécuter (vide = tous)
+        repeat: Nombre de mesures par cas (la plus rapide est retenue)
+
+    Returns:
+        Mapping "nom[lignes]" -> mesures
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="nws_bench_") as tmp:
+        ws = Workspace(Path(tmp))
+        for name, (func, max_rows) in BENCHMARKS.items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            for rows in sizes:
+                if rows > max_rows:
+                    continue
+                runs = [func(ws, rows) for _ in range(repeat)]
+                best = min(runs, key=lambda r: r["seconds"])
+                best["rows"] = rows
+                best["per_row_us"] = best["seconds"] / rows * 1e6
+                key = f"{name}[{rows}]"
+                results[key] = best
+                print(f"  {key:<24} {best['seconds']:>10.4f}s  {best['per_row_us']:>10.1f} µs/ligne")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare les résultats à la référence.
+
+    Returns:
+        Liste des régressions (vide si aucune)
+    """
+    regressions = []
+    for key, current in results.items():
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        before, after = reference["seconds"], current["seconds"]
+        if after > before * (1 + threshold) and after - before > MIN_REGRESSION_DELTA:
+            regressions.append(
+                f"{key}: {before:.4f}s -> {after:.4f}s (+{(after / before - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks de Territory Automation")
+    parser.add_argument(
+        "--sizes",
+        default="100,1000,10000,100000",
+        help="Tailles des jeux de données, séparées par des virgules"
+    )
+    parser.add_argument(
+        "--only",
+        default="",
+        help="Benchmarks à exécuter (préfixes séparés par des virgules, ex: load,e2e)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Mesures par cas (défaut: 3)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="Fichier de résultats JSON")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Fichier de référence JSON")
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Enregistre les résultats comme nouvelle référence"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Ralentissement toléré par rapport à la référence (défaut: 0.25 = 25%%)"
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",") if s.strip()]
+
+    # Les logs de l'automatisation ne doivent pas fausser les mesures
+    logger = logging.getLogger("territory_automation")
+    logger.handlers.clear()
+    logger.addHandler(logging.NullHandler())
+    logger.setLevel(logging.CRITICAL)
+    logger.propagate = False
+
+    print(f"Benchmarks (tailles: {sizes}, {args.repeat} mesures par cas)")
+    results = run_benchmarks(sizes, only, max(1, args.repeat))
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"Résultats: {args.output}")
+
+    if args.save_baseline:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+        baseline.update(results)
+        report["results"] = baseline
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"Référence enregistrée: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ERREUR: Référence introuvable: {args.baseline}")
+        print("Enregistrez-la avec --save-baseline")
+        return 2
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+    missing = [key for key in results if key not in baseline]
+    if missing:
+        print(f"ERREUR: Cas absents de la référence: {', '.join(missing)}")
+        print("Complétez-la avec --save-baseline (mêmes --sizes et --only)")
+        return 2
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"RÉGRESSIONS (seuil {args.threshold:.0%}):")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+
+    print(f"Aucune régression (seuil {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,19 +6,21 @@ Modifiez ces valeurs selon votre environnement.
 import json
 from pathlib import Path
 
+from territory_automation.profiles import CalibrationProfiles, detect_layout
 
-def _load_calibration() -> dict:
+
+def _load_locators() -> dict:
     """
-    Charge les coordonnées calibrées depuis le fichier JSON.
+    Charge les localisateurs UI Automation des éléments depuis le fichier JSON.
+    Format: {"field_numero": {"auto_id": "...", "control_type": "Edit"}, ...}
     Retourne un dict vide si le fichier n'existe pas.
     """
-    calibration_file = Path(__file__).parent / "data" / "calibration.json"
-    if calibration_file.exists():
+    locators_file = Path(__file__).parent / "data" / "elements.json"
+    if locators_file.exists():
         try:
-            with open(calibration_file, "r", encoding="utf-8") as f:
+            with open(locators_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                # Convertir les listes en tuples
-                return {k: tuple(v) if isinstance(v, list) else v for k, v in data.items()}
+                return {k: v for k, v in data.items() if isinstance(v, dict)}
         except (json.JSONDecodeError, IOError):
             pass
     return {}
@@ -42,7 +44,9 @@ def _load_options() -> dict:
             "MESNIL LE ROI": "dropdown_ville_mesnil",
             "MONTESSON": "dropdown_ville_montesson",
             "SARTROUVILLE": "dropdown_ville_sartrouville",
-        }
+        },
+        # Libellés NWS des options (optionnel, complète les libellés par défaut)
+        "labels": {},
     }
     if options_file.exists():
         try:
@@ -52,6 +56,7 @@ def _load_options() -> dict:
                 return {
                     "categories": data.get("categories", default_options["categories"]),
                     "villes": data.get("villes", default_options["villes"]),
+                    "labels": data.get("labels", default_options["labels"]),
                 }
         except (json.JSONDecodeError, IOError):
             pass
@@ -67,6 +72,16 @@ NWS_EXE_PATH = r"C:\Program Files\New World Scheduler\NW Scheduler.exe"
 # Chemin vers le fichier Excel/CSV contenant les données des territoires
 DATA_FILE_PATH = Path(__file__).parent / "data" / "territories.xlsx"
 
+# Cache des données chargées: un fichier inchangé (même contenu, même date et
+# même EXCEL_COLUMNS) est relu depuis data/cache sans repasser par Excel.
+# Format Parquet si pyarrow est installé, pickle sinon. --refresh-cache force la relecture.
+DATASET_CACHE_ENABLED = True
+DATASET_CACHE_FOLDER = Path(__file__).parent / "data" / "cache"
+DATASET_CACHE_MAX_ENTRIES = 5
+
+# Nombre de lignes lues à la fois avec --stream (lecture par blocs du fichier de données)
+STREAM_CHUNK_SIZE = 500
+
 # Dossier contenant les fichiers PDF des territoires
 PDF_FOLDER_PATH = Path(__file__).parent / "data" / "pdfs"
 
@@ -74,18 +89,56 @@ PDF_FOLDER_PATH = Path(__file__).parent / "data" / "pdfs"
 LOG_FOLDER_PATH = Path(__file__).parent / "logs"
 
 # Fichier de progression (pour reprendre après interruption)
-PROGRESS_FILE_PATH = Path(__file__).parent / "data" / "progress.json"
+# Journal JSONL en ajout seul; un ancien progress.json est migré automatiquement
+PROGRESS_FILE_PATH = Path(__file__).parent / "data" / "progress.jsonl"
+
+# Fichier de progression du mode mise à jour (--update)
+UPDATE_PROGRESS_FILE_PATH = Path(__file__).parent / "data" / "progress_update.jsonl"
+
+# Nombre de territoires enregistrés entre deux écritures forcées sur disque (fsync)
+# 1 = après chaque territoire; plus grand = moins d'accès disque, mais une coupure
+# de courant peut faire oublier les derniers territoires (ressaisis en doublon)
+PROGRESS_SYNC_EVERY = 1
+
+# Base SQLite de progression (--progress-db), partageable par plusieurs imports
+# lancés en même temps sur le même poste (un territoire n'est saisi qu'une fois).
+# Doit être sur un disque local: pas de partage réseau.
+PROGRESS_DB_PATH = Path(__file__).parent / "data" / "progress.db"
+UPDATE_PROGRESS_DB_PATH = Path(__file__).parent / "data" / "progress_update.db"
+
+# Délai (secondes) après lequel un territoire réservé par un import arrêté
+# brutalement peut être repris par un autre import
+PROGRESS_CLAIM_TIMEOUT = 600
+
+# Fichier d'import en masse NWS généré par --export-nws
+NWS_IMPORT_FILE_PATH = Path(__file__).parent / "data" / "nws_import.csv"
+
+# Fichier des plans d'actions générés en mode --dry-run (.json ou .jsonl)
+PLAN_FILE_PATH = Path(__file__).parent / "data" / "plan.jsonl"
 
 # =============================================================================
 # PARAMÈTRES D'AUTOMATISATION
 # =============================================================================
 
 # Délais en secondes
-DELAY_AFTER_CLICK = 0.3          # Délai après chaque clic
-DELAY_AFTER_TYPE = 0.1           # Délai après chaque saisie
-DELAY_APP_LAUNCH = 10.0          # Délai pour le lancement de l'application
-DELAY_AFTER_SAVE = 1.0           # Délai après sauvegarde
+# Chaque action attend une condition concrète (focus, fenêtre, élément visible...).
+# Les délais ci-dessous sont des plafonds: ils ne sont atteints en entier que si
+# l'interface ne répond pas, ou si pywinauto n'est pas disponible pour l'observer.
+DELAY_AFTER_CLICK = 0.3          # Délai max après chaque clic
+DELAY_AFTER_TYPE = 0.1           # Délai max après chaque saisie
+DELAY_AFTER_PASTE = 0.3          # Délai max après collage d'un chemin/valeur
+DELAY_DROPDOWN_OPEN = 0.3        # Délai max d'ouverture d'un menu déroulant
+DELAY_CONFIRM_MODAL = 0.3        # Délai max d'apparition du modal "Êtes-vous sûr"
+DELAY_DIALOG_OPEN = 1.5          # Délai max d'ouverture de la boîte "Ouvrir"
+DELAY_NAVIGATION = 0.5           # Délai max après navigation (menus, onglets)
+DELAY_APP_LAUNCH = 10.0          # Délai max de lancement (fenêtre surveillée)
+DELAY_AFTER_SAVE = 1.0           # Délai max après sauvegarde
 DELAY_BETWEEN_TERRITORIES = 0.5  # Délai entre chaque territoire
+DELAY_INPUT_PAUSE = 0.02         # Pause pyautogui entre deux actions clavier/souris
+
+# Durée pendant laquelle NWS est supposé garder le focus après une activation,
+# utilisée seulement si la fenêtre au premier plan n'est pas observable (sans pywinauto)
+FOCUS_CACHE_TTL = 1.0
 
 # Timeout maximum pour attendre un élément (en secondes)
 ELEMENT_TIMEOUT = 10
@@ -93,6 +146,50 @@ ELEMENT_TIMEOUT = 10
 # Nombre de tentatives en cas d'échec
 MAX_RETRIES = 3
 
+# =============================================================================
+# EXÉCUTION RÉPARTIE (--workers)
+# =============================================================================
+
+# Les workers sont des processus locaux, qui partagent la session de bureau du
+# coordinateur: --workers n'est accepté qu'avec --backend simulator (chaque
+# worker pilote son propre simulateur NWS).
+
+# Nombre de territoires par lot distribué à un worker
+SHARD_SIZE = 5
+
+# Délai (secondes) sans nouvelle d'un worker avant de redistribuer son lot.
+# Le territoire en cours lui reste réservé pendant un second délai identique
+# (son résultat est encore accepté), puis le worker est arrêté.
+WORKER_STALL_TIMEOUT = 300.0
+
+# =============================================================================
+# SIMULATEUR (--backend simulator)
+# =============================================================================
+
+# Paramètres de NWSSimulator (territory_automation/simulator.py): interface NWS
+# simulée en pur Python, pour tester ou mesurer sans Windows.
+#   latency: latences par événement (launch, navigation, input, dropdown,
+#            modal, dialog), en secondes
+#   miss_rate: probabilité qu'un clic soit perdu
+#   crash_after: nombre d'actions avant un plantage simulé (None = jamais)
+SIMULATOR_OPTIONS = {
+    "latency": {"navigation": 0.05, "dropdown": 0.02, "modal": 0.05, "dialog": 0.1},
+    "latency_scale": 1.0,
+    "miss_rate": 0.0,
+    "crash_after": None,
+    "seed": 0,
+}
+
+# Saisie du texte dans les champs:
+#   "auto"  = écriture directe via UI Automation (ValuePattern) si le champ le
+#             permet, sinon clic + collage depuis le presse-papiers
+#   "value" = écriture directe (avertissement puis collage si impossible)
+#   "paste" = toujours clic + Ctrl+A + Ctrl+V (comportement historique)
+# La clé "default" s'applique à tous les champs non listés.
+TEXT_ENTRY_MODES = {
+    "default": "auto",
+}
+
 # =============================================================================
 # COORDONNÉES DE L'INTERFACE
 # =============================================================================
@@ -100,7 +197,16 @@ MAX_RETRIES = 3
 # Utilisez l'outil de calibration pour les définir:
 #     uv run python tools/calibration.py
 #
+# Le fichier contient un profil par disposition d'écran (taille, échelle
+# d'affichage, fenêtre NWS). Le profil de l'écran détecté est choisi au
+# démarrage; une disposition proportionnelle à un profil existant en est
+# dérivée automatiquement (voir territory_automation/profiles.py).
+#
 # Les valeurs ci-dessous sont des valeurs par défaut (à remplacer).
+#
+# Si data/elements.json définit un localisateur UI Automation pour un élément
+# (auto_id, control_type, title...), le contrôle est retrouvé par ce moyen et
+# la coordonnée ne sert plus que de secours.
 
 # Valeurs par défaut (seront écrasées par la calibration si elle existe)
 _DEFAULT_COORDINATES = {
@@ -111,6 +217,10 @@ _DEFAULT_COORDINATES = {
     # Création
     "btn_new_territory": (50, 150),
 
+    # Mise à jour (--update): recherche d'un territoire existant
+    "field_search_territory": (150, 150),  # Champ de recherche de la liste
+    "list_first_territory": (150, 190),    # Premier résultat de la liste
+
     # Formulaire (ordre de saisie)
     "dropdown_categorie": (800, 175),      # 1. Catégorie
     "dropdown_option_sar": (800, 195),     # Option SAR dans Catégorie
@@ -139,14 +249,32 @@ _DEFAULT_COORDINATES = {
     "btn_import_pdf": (800, 550),
 }
 
-# Charger la calibration et fusionner avec les valeurs par défaut
-_calibrated = _load_calibration()
+# Profils de calibration (data/calibration.json)
+CALIBRATION_FILE_PATH = Path(__file__).parent / "data" / "calibration.json"
+CALIBRATION_PROFILES = CalibrationProfiles(CALIBRATION_FILE_PATH)
+
+# Profil imposé (None = choisi selon l'écran détecté; voir aussi --profile)
+CALIBRATION_PROFILE = None
+
+# Écart relatif toléré pour dériver un profil d'une disposition proportionnelle
+CALIBRATION_PROFILE_TOLERANCE = 0.02
+
+# Charger le profil de l'écran actuel et fusionner avec les valeurs par défaut
+# (affiné avec la position de la fenêtre NWS une fois connectée)
+CALIBRATION_CHOICE = CALIBRATION_PROFILES.select(
+    detect_layout(), CALIBRATION_PROFILE, CALIBRATION_PROFILE_TOLERANCE
+)
+_calibrated = CALIBRATION_CHOICE.coordinates
 COORDINATES = {**_DEFAULT_COORDINATES, **_calibrated}
 
+# Localisateurs UI Automation (prioritaires sur les coordonnées si définis)
+ELEMENT_LOCATORS = _load_locators()
+
 # Charger les options de catégories et villes
 _options = _load_options()
 CATEGORIES = _options["categories"]
 VILLES = _options["villes"]
+OPTION_LABELS = _options["labels"]
 
 # Afficher un avertissement si pas de calibration
 if not _calibrated:
@@ -186,6 +314,71 @@ STARTUP_DIALOG_CLOSE_BUTTON = (960, 600)  # Centre de l'écran approximatif
 # Délai d'attente pour les dialogues de démarrage (secondes)
 STARTUP_DIALOG_WAIT = 2.0
 
+# =============================================================================
+# SURVEILLANCE DES DIALOGUES (pendant l'automatisation)
+# =============================================================================
+
+# Un thread examine les nouvelles fenêtres de NWS et applique la première
+# règle dont le motif (expression régulière, sans casse) correspond au titre.
+# Actions: "expect" (traité par l'automatisation), "confirm" (dialogue attendu
+# validé par Entrée: le plan attend la validation au lieu de cliquer sur le
+# bouton; la règle porte le nom attendu par le plan), "enter", "escape", "none".
+# "abort": True interrompt aussitôt le territoire en cours (nouvelle tentative).
+# "any_process": True examine aussi les fenêtres des autres processus.
+MODAL_WATCHER_ENABLED = True
+MODAL_WATCHER_INTERVAL = 0.05  # Secondes entre deux examens
+
+MODAL_RULES = [
+    # Confirmation du type: validée par la surveillance ("Oui" par défaut)
+    {"title": r"Êtes-vous sûr|Are you sure", "action": "confirm", "name": "confirm_type"},
+    # Boîte d'ouverture de fichier: l'import du PDF la traite lui-même
+    {"title": r"^(Ouvrir|Open|Sélectionner|Select)", "action": "expect"},
+    # Dialogues informatifs: fermés sans interrompre le territoire
+    {"title": r"Astuce|Tip|Conseil|Le saviez-vous|Did you know", "action": "escape"},
+    # Plantage ou blocage de NWS (fenêtres créées par Windows)
+    {
+        "title": r"ne répond pas|Not Responding|a cessé de fonctionner|has stopped working",
+        "action": "none",
+        "abort": True,
+        "any_process": True,
+    },
+    # Messages d'erreur de NWS: validés, puis nouvelle tentative
+    {"title": r"Erreur|Error|Avertissement|Warning", "action": "enter", "abort": True},
+]
+
+# Règle des fenêtres inconnues: fermées, et le territoire est interrompu
+MODAL_DEFAULT_RULE = {"action": "escape", "abort": True}
+
+# =============================================================================
+# VÉRIFICATION DES ACTIONS PAR EMPREINTE D'ÉCRAN (--pixel-check)
+# =============================================================================
+
+# Après chaque clic et chaque saisie, la région autour de l'élément est
+# comparée à sa capture d'avant l'action: l'attente se termine dès que la
+# région a changé, et un clic sans effet visible est signalé (et répété).
+PIXEL_VERIFY_ENABLED = False
+PIXEL_VERIFY_RADIUS = 24         # Demi-côté de la région capturée (pixels)
+PIXEL_VERIFY_TOLERANCE = 8       # Écart de luminance ignoré par bloc (0-255)
+PIXEL_VERIFY_MIN_CHANGE = 0.02   # Proportion minimale de blocs modifiés
+PIXEL_VERIFY_RETRY = True        # Répéter une fois un clic sans effet visible
+
+# Régions particulières (dx, dy, largeur, hauteur) relatives au point calibré,
+# pour les éléments dont l'effet apparaît à côté (liste d'un menu déroulant)
+PIXEL_VERIFY_REGIONS = {
+    "dropdown_categorie": (-24, -12, 220, 160),
+    "dropdown_type": (-24, -12, 220, 160),
+    "dropdown_ville": (-24, -12, 220, 220),
+}
+
+# Effet attendu d'un clic, par élément (défaut: "changed", la région change):
+# - "unchanged": la région doit rester identique
+# - "match": la région doit correspondre à l'empreinte enregistrée dans
+#   PIXEL_VERIFY_FINGERPRINTS/<élément>.npy (voir tools/check_fingerprint.py
+#   --save-expected), par exemple le menu déroulant ouvert
+# Exemple: {"dropdown_type": "match", "btn_carte": "unchanged"}
+PIXEL_VERIFY_EXPECT = {}
+PIXEL_VERIFY_FINGERPRINTS = Path(__file__).parent / "data" / "fingerprints"
+
 # =============================================================================
 # OPTIONS DE MAPPING DES COLONNES EXCEL
 # =============================================================================
@@ -213,3 +406,24 @@ TYPE_VALUES = {
     "téléphone": "Téléphone",
     "entreprise": "Entreprise",
 }
+
+# =============================================================================
+# IMPORT EN MASSE NWS (--export-nws)
+# =============================================================================
+
+# Colonnes du fichier d'import NWS: clé du territoire -> en-tête attendu par
+# l'assistant d'import de NWS. Ces en-têtes sont des valeurs par défaut, non
+# vérifiées sur chaque version: comparez-les à l'en-tête d'un fichier exporté
+# par votre NWS et adaptez-les;
+# ajoutez "lien_gps", "ne_pas_visiter" ou "notes_proclamateur" si l'import les accepte.
+NWS_IMPORT_COLUMNS = {
+    "categorie": "Category",
+    "numero": "Number",
+    "suffixe": "Suffix",
+    "type": "Type",
+    "ville": "Locality",
+    "notes": "Notes",
+}
+
+# Séparateur de colonnes du fichier d'import
+NWS_IMPORT_DELIMITER = ","
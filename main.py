@@ -4,7 +4,14 @@ Script principal pour l'automatisation de New World Scheduler 7.9.
 
 Usage:
     python main.py                  # Lancer l'automatisation
-    python main.py --dry-run        # Mode simulation (sans exécuter)
+    python main.py --dry-run        # Mode simulation: génère le plan d'actions
+    python main.py --from-plan F    # Exécuter un plan généré par --dry-run
+    python main.py --backend simulator --workers 3  # Répartir sur plusieurs simulateurs
+    python main.py --backend simulator  # Exécuter contre le simulateur NWS (sans Windows)
+    python main.py --trace          # Mesurer la durée de chaque étape (trace Chrome + CSV)
+    python main.py --update         # Mettre à jour les territoires existants (champs modifiés)
+    python main.py --export-nws     # Écrire le fichier d'import en masse NWS (sans interface)
+    python main.py --attachments-only  # Joindre les PDFs aux territoires importés
     python main.py --no-save        # Remplir les champs sans sauvegarder (validation)
     python main.py --reset          # Réinitialiser la progression
     python main.py --verify         # Vérifier les fichiers sans exécuter
@@ -12,7 +19,10 @@ Usage:
 
 import argparse
 import sys
+from datetime import datetime
+from itertools import chain
 from pathlib import Path
+from typing import Optional
 
 # Ajouter le dossier racine au path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -20,29 +30,78 @@ sys.path.insert(0, str(Path(__file__).parent))
 from config import (
     NWS_EXE_PATH,
     DATA_FILE_PATH,
+    DATASET_CACHE_ENABLED,
+    DATASET_CACHE_FOLDER,
+    DATASET_CACHE_MAX_ENTRIES,
+    STREAM_CHUNK_SIZE,
     PDF_FOLDER_PATH,
     LOG_FOLDER_PATH,
+    PROGRESS_CLAIM_TIMEOUT,
+    PROGRESS_DB_PATH,
     PROGRESS_FILE_PATH,
+    PROGRESS_SYNC_EVERY,
+    UPDATE_PROGRESS_DB_PATH,
+    UPDATE_PROGRESS_FILE_PATH,
+    PLAN_FILE_PATH,
+    NWS_IMPORT_FILE_PATH,
+    NWS_IMPORT_COLUMNS,
+    NWS_IMPORT_DELIMITER,
     NWS_WINDOW_TITLE,
     COORDINATES,
+    CALIBRATION_PROFILES,
+    CALIBRATION_CHOICE,
+    ELEMENT_LOCATORS,
     EXCEL_COLUMNS,
     CATEGORIES,
     VILLES,
+    OPTION_LABELS,
     DELAY_AFTER_CLICK,
     DELAY_AFTER_TYPE,
+    DELAY_AFTER_PASTE,
+    DELAY_DROPDOWN_OPEN,
+    DELAY_CONFIRM_MODAL,
+    DELAY_DIALOG_OPEN,
+    DELAY_NAVIGATION,
     DELAY_APP_LAUNCH,
     DELAY_AFTER_SAVE,
     DELAY_BETWEEN_TERRITORIES,
+    DELAY_INPUT_PAUSE,
+    FOCUS_CACHE_TTL,
     MAX_RETRIES,
+    SHARD_SIZE,
+    WORKER_STALL_TIMEOUT,
+    SIMULATOR_OPTIONS,
+    TEXT_ENTRY_MODES,
     STARTUP_DIALOG_TITLES,
     STARTUP_DIALOG_CLOSE_METHOD,
     STARTUP_DIALOG_CLOSE_BUTTON,
     STARTUP_DIALOG_WAIT,
+    MODAL_WATCHER_ENABLED,
+    MODAL_WATCHER_INTERVAL,
+    MODAL_RULES,
+    MODAL_DEFAULT_RULE,
+    PIXEL_VERIFY_ENABLED,
+    PIXEL_VERIFY_RADIUS,
+    PIXEL_VERIFY_TOLERANCE,
+    PIXEL_VERIFY_MIN_CHANGE,
+    PIXEL_VERIFY_RETRY,
+    PIXEL_VERIFY_REGIONS,
+    PIXEL_VERIFY_EXPECT,
+    PIXEL_VERIFY_FINGERPRINTS,
 )
 
 from territory_automation.logger_setup import setup_logger
 from territory_automation.data_loader import DataLoader, ProgressTracker
+from territory_automation.dataset_cache import DatasetCache
+from territory_automation.progress_db import SQLiteProgressTracker
 from territory_automation.automation import NWSAutomator, AutomationError
+from territory_automation.planner import TerritoryPlan, STEP_LABELS, save_plans, load_plans
+from territory_automation.checkpoints import StepJournal
+from territory_automation.changes import CHANGED, RerunTotals, plan_rerun
+from territory_automation.coordinator import AutomatorFactory, ShardCoordinator
+from territory_automation.simulator import NWSSimulator
+from territory_automation.tracing import Tracer
+from territory_automation.exporter import NWSImportExporter
 
 
 def parse_args():
@@ -53,7 +112,37 @@ def parse_args():
     parser.add_argument(
         "--dry-run",
         action="store_true",
-        help="Mode simulation - affiche les actions sans les exécuter"
+        help="Mode simulation - génère le plan d'actions sans l'exécuter"
+    )
+    parser.add_argument(
+        "--plan-file",
+        type=Path,
+        default=PLAN_FILE_PATH,
+        help=f"Fichier de plan écrit par --dry-run, .json ou .jsonl (défaut: {PLAN_FILE_PATH})"
+    )
+    parser.add_argument(
+        "--from-plan",
+        type=Path,
+        default=None,
+        help="Exécute un fichier de plan (généré par --dry-run) au lieu du fichier de données"
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Mode mise à jour - ouvre chaque territoire existant et ne modifie que les champs différents"
+    )
+    parser.add_argument(
+        "--export-nws",
+        type=Path,
+        nargs="?",
+        const=NWS_IMPORT_FILE_PATH,
+        default=None,
+        help=f"Écrit le fichier d'import en masse NWS puis s'arrête (défaut: {NWS_IMPORT_FILE_PATH})"
+    )
+    parser.add_argument(
+        "--attachments-only",
+        action="store_true",
+        help="Joint seulement les PDFs aux territoires déjà présents dans NWS (après import en masse)"
     )
     parser.add_argument(
         "--no-save",
@@ -82,6 +171,54 @@ def parse_args():
         default=PDF_FOLDER_PATH,
         help=f"Dossier contenant les PDFs (défaut: {PDF_FOLDER_PATH})"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Nombre de simulateurs NWS pilotés en parallèle (avec --backend simulator)"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["desktop", "simulator"],
+        default="desktop",
+        help="Interface pilotée: bureau Windows réel, ou simulateur NWS headless (défaut: desktop)"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Mesure la durée de chaque étape et action (trace Chrome/Perfetto et résumé CSV dans logs/)"
+    )
+    parser.add_argument(
+        "--no-modal-watcher",
+        action="store_true",
+        help="Désactive la surveillance des dialogues inattendus (voir MODAL_RULES dans config.py)"
+    )
+    parser.add_argument(
+        "--pixel-check",
+        action="store_true",
+        help="Vérifie chaque clic et saisie par empreinte de la région visée (voir PIXEL_VERIFY_* dans config.py)"
+    )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        help="Profil de calibration à utiliser (défaut: choisi selon l'écran et la fenêtre NWS)"
+    )
+    parser.add_argument(
+        "--progress-db",
+        action="store_true",
+        help="Suit la progression dans une base SQLite partageable par plusieurs imports simultanés (voir PROGRESS_DB_PATH dans config.py)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=f"Lit le fichier de données par blocs de {STREAM_CHUNK_SIZE} lignes et commence la saisie dès le premier bloc (gros fichiers)"
+    )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Relit le fichier de données même s'il est dans le cache (voir DATASET_CACHE_* dans config.py)"
+    )
     parser.add_argument(
         "--start-from",
         type=int,
@@ -128,15 +265,14 @@ def verify_data(logger, loader: DataLoader, pdf_folder: Path) -> dict:
     Returns:
         Dictionnaire avec les statistiques de vérification
     """
-    territories = loader.get_all_territories()
     stats = {
-        "total": len(territories),
+        "total": len(loader),
         "with_pdf": 0,
         "without_pdf": 0,
         "missing_pdfs": []
     }
 
-    for territory in territories:
+    for territory in loader.iter_territories():
         territory_id = territory.get("numero", "INCONNU")
         pdf_filename = territory.get("pdf_filename", "") or f"{territory_id}.pdf"
         pdf_path = pdf_folder / pdf_filename
@@ -162,33 +298,107 @@ def verify_data(logger, loader: DataLoader, pdf_folder: Path) -> dict:
     return stats
 
 
+def compile_plans(
+    automator: NWSAutomator,
+    loader: DataLoader,
+    no_save: bool = False
+) -> tuple[list[TerritoryPlan], list[dict]]:
+    """
+    Compile le plan de chaque territoire, avec l'empreinte de sa ligne.
+
+    Returns:
+        (plans, territoires), dans l'ordre du fichier
+    """
+    territories = loader.get_all_territories()
+    hashes = loader.fingerprints()["hash"].tolist()
+    plans = []
+    for territory, content_hash in zip(territories, hashes):
+        plan = automator.planner.plan(territory, no_save=no_save)
+        plan.content_hash = content_hash
+        plans.append(plan)
+    return plans, territories
+
+
 def run_automation(
     logger,
-    loader: DataLoader,
+    loader: Optional[DataLoader],
     tracker: ProgressTracker,
     automator: NWSAutomator,
     dry_run: bool = False,
     no_save: bool = False,
-    start_from: int = 0
+    start_from: int = 0,
+    plans: Optional[list[TerritoryPlan]] = None,
+    plan_file: Optional[Path] = None,
+    stream_chunk_size: int = 0
 ):
     """
     Exécute l'automatisation pour tous les territoires.
 
+    Chaque territoire est d'abord compilé en plan d'actions, puis exécuté.
+    En mode simulation, les plans sont seulement écrits dans `plan_file`.
+
+    À la relance, seuls les territoires nouveaux, en échec ou modifiés depuis
+    leur traitement (empreinte de la ligne) sont repris; un territoire modifié
+    est mis à jour dans NWS (champs différents seulement), pas recréé.
+
     Args:
         logger: Logger
-        loader: Chargeur de données
+        loader: Chargeur de données (ignoré si `plans` est fourni)
         tracker: Tracker de progression
         automator: Automatiseur NWS
         dry_run: Mode simulation
         no_save: Mode validation (remplit sans sauvegarder)
         start_from: Index de départ
+        plans: Plans déjà compilés (ex: chargés avec --from-plan)
+        plan_file: Fichier où écrire les plans en mode simulation
+        stream_chunk_size: Si > 0, le fichier est lu par blocs de ce nombre de
+            lignes (loader.stream) et chaque bloc est traité dès sa lecture;
+            le résumé de la relance est alors écrit à la fin
     """
-    territories = loader.get_all_territories()
-    total = len(territories)
+    streaming = plans is None and stream_chunk_size > 0
+    if plans is not None:
+        batches = [(plans, None)]
+    elif streaming:
+        batches = (
+            compile_plans(automator, chunk, no_save)
+            for chunk in loader.stream(stream_chunk_size)
+        )
+    else:
+        batches = [compile_plans(automator, loader, no_save)]
+
+    totals = RerunTotals()
+
+    def decide(batches):
+        offset = 0
+        for batch_plans, batch_territories in batches:
+            rerun = plan_rerun(
+                [plan.progress_id or f"INDEX_{offset + i}" for i, plan in enumerate(batch_plans)],
+                [plan.content_hash for plan in batch_plans],
+                tracker,
+                seen=totals.seen
+            )
+            totals.add(rerun)
+            offset += len(batch_plans)
+            yield batch_plans, batch_territories, rerun
+
+    batches = decide(batches)
+    total = None
+    if streaming:
+        # Le premier bloc est lu (et l'en-tête validé) avant de lancer NWS
+        first = next(batches, None)
+        batches = chain([first] if first else [], batches)
+    else:
+        batches = list(batches)
+        total = sum(len(rerun) for _, _, rerun in batches)
 
     logger.info(f"=== Démarrage de l'automatisation ===")
-    logger.info(f"Territoires à traiter: {total}")
+    if streaming:
+        logger.info(f"Territoires à traiter: lecture par blocs de {stream_chunk_size} lignes")
+    else:
+        logger.info(f"Territoires à traiter: {total}")
     logger.info(f"Mode dry-run: {dry_run}")
+    if not streaming:
+        totals.log_summary(logger)
     if no_save:
         logger.info("MODE VALIDATION: Les champs seront remplis mais NON sauvegardés")
         logger.info("Appuyez sur Entrée après chaque territoire pour continuer, ou Ctrl+C pour arrêter")
@@ -201,35 +411,76 @@ def run_automation(
 
     processed = 0
     failed = 0
+    emitted = []
 
-    for i, territory in enumerate(territories):
+    rows = (
+        (plan, batch_territories[j] if batch_territories else None, rerun, j)
+        for batch_plans, batch_territories, rerun in batches
+        for j, plan in enumerate(batch_plans)
+    )
+    for i, (plan, territory, rerun, j) in enumerate(rows):
         if i < start_from:
             continue
 
-        territory_id = territory.get("numero", f"INDEX_{i}")
+        territory_id = rerun.keys[j]
+        position = f"{i+1}/{total}" if total is not None else f"{i+1}"
 
-        # Vérifier si déjà traité
-        if tracker.is_processed(territory_id):
-            logger.info(f"[{i+1}/{total}] {territory_id} - Déjà traité, ignoré")
+        # Nouveau, en échec ou modifié: sinon déjà traité
+        if not rerun.is_scheduled(j):
+            logger.info(f"[{position}] {territory_id} - {rerun.reason(j).capitalize()}")
+            continue
+
+        changed = rerun.decisions[j] == CHANGED
+        if changed and (territory is None or no_save):
+            logger.warning(
+                f"[{position}] {territory_id} - Modifié depuis son traitement: "
+                f"non mis à jour (utilisez --update)"
+            )
+            continue
+
+        if not dry_run and not tracker.claim(territory_id, plan.content_hash):
+            logger.info(f"[{position}] {territory_id} - En cours dans un autre import, ignoré")
             continue
 
-        logger.info(f"[{i+1}/{total}] Traitement de: {territory_id}")
+        logger.info(f"[{position}] Traitement de: {territory_id} ({rerun.reason(j)})")
+
+        if changed:
+            if dry_run:
+                logger.info("  -> Mise à jour des champs modifiés (plan établi sur le formulaire NWS)")
+                processed += 1
+                continue
+            # Le territoire existe dans NWS: seuls les champs modifiés sont saisis
+            fields = None
+            for attempt in range(MAX_RETRIES):
+                try:
+                    fields = automator.update_territory(territory)
+                    if fields is not None:
+                        break
+                except AutomationError as e:
+                    logger.warning(f"Tentative {attempt+1}/{MAX_RETRIES} échouée: {e}")
+            if fields is None:
+                tracker.mark_failed(territory_id, "Territoire modifié: mise à jour en échec")
+                failed += 1
+            else:
+                tracker.mark_processed(territory_id, plan.content_hash)
+                processed += 1
+            continue
 
         if dry_run:
-            # Mode simulation
-            pdf_exists, pdf_path = automator.verify_pdf_exists(territory)
-            logger.info(f"  -> Numéro: {territory.get('numero', '')}")
-            logger.info(f"  -> Suffixe: {territory.get('suffixe', '')}")
-            logger.info(f"  -> Type: {territory.get('type', '')}")
-            logger.info(f"  -> PDF: {pdf_path.name} ({'OK' if pdf_exists else 'MANQUANT'})")
+            # Mode simulation: émettre le plan sans l'exécuter
+            logger.info(f"  -> {len(plan.actions)} actions")
+            for warning in plan.warnings:
+                logger.warning(f"  -> [ÉTAPE {warning['step']}] {warning['message']}")
+            emitted.append(plan)
             processed += 1
             continue
 
-        # Exécution réelle
+        # Exécution réelle (les tentatives suivantes reprennent à l'étape en échec)
         success = False
+        journal = StepJournal(territory_id)
         for attempt in range(MAX_RETRIES):
             try:
-                if automator.process_territory(territory, no_save=no_save):
+                if automator.execute_plan(plan, no_save=no_save, journal=journal):
                     if no_save:
                         # Mode validation: attendre confirmation utilisateur
                         logger.info(f"  -> Territoire {territory_id} rempli (NON sauvegardé)")
@@ -239,7 +490,7 @@ def run_automation(
                         except EOFError:
                             pass
                     else:
-                        tracker.mark_processed(territory_id)
+                        tracker.mark_processed(territory_id, plan.content_hash)
                     processed += 1
                     success = True
                     break
@@ -250,14 +501,64 @@ def run_automation(
                     continue
 
         if not success:
-            tracker.mark_failed(territory_id, "Échec après plusieurs tentatives")
+            reason = "Échec après plusieurs tentatives"
+            if journal.failed_step:
+                label = STEP_LABELS.get(journal.failed_step, "")
+                reason += f" (étape {journal.failed_step} {label}: {journal.error})"
+            tracker.mark_failed(territory_id, reason)
             failed += 1
 
+    if dry_run and plan_file:
+        count = save_plans(emitted, plan_file)
+        logger.info(f"Plan écrit: {plan_file} ({count} territoires)")
+
     # Résumé final
     logger.info(f"=== Automatisation terminée ===")
+    if streaming:
+        totals.log_summary(logger)
     logger.info(f"Traités avec succès: {processed}")
     logger.info(f"Échecs: {failed}")
 
+    if not dry_run:
+        metrics = automator.get_metrics()
+        logger.info(
+            f"Activations de fenêtre: {metrics['activate_performed']} effectuées, "
+            f"{metrics['activate_skipped']} évitées "
+            f"(sur {metrics['activate_requests']} demandes)"
+        )
+        logger.info(
+            f"Champs texte: {metrics['text_direct']} saisis directement, "
+            f"{metrics['text_paste']} par presse-papiers"
+        )
+        logger.info(
+            f"Menus déroulants: {metrics['dropdown_direct']} sélections directes, "
+            f"{metrics['dropdown_typeahead']} par saisie, {metrics['dropdown_click']} par clic"
+        )
+        logger.info(
+            f"Éléments UI: {metrics['elements_hits']} trouvés en cache, "
+            f"{metrics['elements_misses']} résolutions"
+        )
+        if "modals_aborted" in metrics:
+            logger.info(
+                f"Dialogues: {metrics['modals_expected']} attendus, "
+                f"{metrics['modals_resolved']} fermés, "
+                f"{metrics['modals_aborted']} territoires interrompus"
+            )
+        if "pixels_landed" in metrics:
+            logger.info(
+                f"Vérification visuelle: {metrics['pixels_landed']} actions confirmées, "
+                f"{metrics['pixels_missed']} sans effet visible, "
+                f"{metrics['clicks_retried']} clics répétés"
+            )
+        retries = metrics["retries_resumed"] + metrics["retries_reopened"] + metrics["retries_restarted"]
+        if retries:
+            logger.info(
+                f"Nouvelles tentatives: {metrics['retries_resumed']} reprises sur le formulaire ouvert, "
+                f"{metrics['retries_reopened']} après réouverture, "
+                f"{metrics['retries_restarted']} depuis l'étape 1 "
+                f"({metrics['steps_skipped']} étapes non refaites)"
+            )
+
     summary = tracker.get_summary()
     if summary["failed_territories"]:
         logger.warning("Territoires en échec:")
@@ -265,6 +566,235 @@ def run_automation(
             logger.warning(f"  - {fail['id']}: {fail['error']}")
 
 
+def run_update(
+    logger,
+    loader: DataLoader,
+    tracker: ProgressTracker,
+    automator: NWSAutomator,
+    start_from: int = 0
+):
+    """
+    Met à jour les territoires existants dans NWS.
+
+    Chaque territoire est ouvert par son numéro et son suffixe; seuls les
+    champs dont la valeur diffère de celle affichée par NWS sont saisis.
+    À la relance, les territoires déjà vérifiés ne le sont à nouveau que si
+    leur ligne a été modifiée depuis.
+
+    Args:
+        logger: Logger
+        loader: Chargeur de données
+        tracker: Tracker de progression du mode mise à jour
+        automator: Automatiseur NWS
+        start_from: Index de départ
+    """
+    territories = loader.get_all_territories()
+    fingerprints = loader.fingerprints()
+    rerun = plan_rerun(fingerprints["key"].tolist(), fingerprints["hash"].tolist(), tracker)
+    total = len(territories)
+
+    logger.info(f"=== Démarrage de la mise à jour ===")
+    logger.info(f"Territoires à vérifier: {total}")
+    rerun.log_summary(logger)
+
+    if not automator.launch_application():
+        logger.error("Impossible de lancer New World Scheduler")
+        return
+
+    updated = 0
+    unchanged = 0
+    failed = 0
+    fields_changed = 0
+
+    for i, territory in enumerate(territories):
+        if i < start_from:
+            continue
+
+        territory_id = rerun.keys[i] or f"INDEX_{i}"
+        content_hash = rerun.hashes[i]
+        if not rerun.is_scheduled(i):
+            logger.info(f"[{i+1}/{total}] {territory_id} - {rerun.reason(i).capitalize()}")
+            continue
+        if not tracker.claim(territory_id, content_hash):
+            logger.info(f"[{i+1}/{total}] {territory_id} - En cours dans un autre import, ignoré")
+            continue
+
+        logger.info(f"[{i+1}/{total}] Vérification de: {territory_id} ({rerun.reason(i)})")
+
+        changed = None
+        for attempt in range(MAX_RETRIES):
+            try:
+                changed = automator.update_territory(territory)
+                if changed is not None:
+                    break
+            except AutomationError as e:
+                logger.warning(f"Tentative {attempt+1}/{MAX_RETRIES} échouée: {e}")
+
+        if changed is None:
+            tracker.mark_failed(territory_id, "Territoire introuvable ou mise à jour en échec")
+            failed += 1
+            continue
+
+        tracker.mark_processed(territory_id, content_hash)
+        if changed:
+            updated += 1
+            fields_changed += changed
+        else:
+            unchanged += 1
+
+    logger.info(f"=== Mise à jour terminée ===")
+    logger.info(f"Territoires modifiés: {updated} ({fields_changed} champs)")
+    logger.info(f"Territoires inchangés: {unchanged}")
+    logger.info(f"Échecs: {failed}")
+
+
+def run_attachments(
+    logger,
+    loader: DataLoader,
+    tracker: ProgressTracker,
+    automator: NWSAutomator,
+    start_from: int = 0
+):
+    """
+    Joint les PDFs aux territoires déjà présents dans NWS.
+
+    Complète l'import en masse (--export-nws): les territoires existent déjà,
+    seule l'interface permet d'ajouter les fichiers.
+
+    Args:
+        logger: Logger
+        loader: Chargeur de données
+        tracker: Tracker de progression
+        automator: Automatiseur NWS
+        start_from: Index de départ
+    """
+    territories = loader.get_all_territories()
+    keys = loader.fingerprints()["key"].tolist()
+    total = len(territories)
+
+    logger.info(f"=== Ajout des fichiers PDF ===")
+    logger.info(f"Territoires: {total}")
+
+    if not automator.launch_application():
+        logger.error("Impossible de lancer New World Scheduler")
+        return
+
+    attached = 0
+    failed = 0
+
+    for i, territory in enumerate(territories):
+        if i < start_from:
+            continue
+
+        territory_id = keys[i] or f"INDEX_{i}"
+        if tracker.is_processed(territory_id):
+            logger.info(f"[{i+1}/{total}] {territory_id} - Déjà traité, ignoré")
+            continue
+        if not tracker.claim(territory_id):
+            logger.info(f"[{i+1}/{total}] {territory_id} - En cours dans un autre import, ignoré")
+            continue
+
+        logger.info(f"[{i+1}/{total}] Fichier de: {territory_id}")
+
+        success = False
+        for attempt in range(MAX_RETRIES):
+            try:
+                if automator.attach_file(territory):
+                    success = True
+                    break
+            except AutomationError as e:
+                logger.warning(f"Tentative {attempt+1}/{MAX_RETRIES} échouée: {e}")
+
+        if success:
+            tracker.mark_processed(territory_id)
+            attached += 1
+        else:
+            tracker.mark_failed(territory_id, "Fichier non joint")
+            failed += 1
+
+    logger.info(f"=== Ajout des fichiers terminé ===")
+    logger.info(f"Fichiers joints: {attached}")
+    logger.info(f"Échecs: {failed}")
+
+
+def run_sharded(
+    logger,
+    loader: Optional[DataLoader],
+    tracker: ProgressTracker,
+    automator: NWSAutomator,
+    factory: AutomatorFactory,
+    sessions: list[dict],
+    no_save: bool = False,
+    start_from: int = 0,
+    plans: Optional[list[TerritoryPlan]] = None
+):
+    """
+    Exécute l'automatisation en répartissant les territoires sur plusieurs workers.
+
+    Args:
+        logger: Logger
+        loader: Chargeur de données (ignoré si `plans` est fourni)
+        tracker: Tracker de progression (fusionne les résultats des workers)
+        automator: Automatiseur local, utilisé seulement pour la planification
+        factory: Fabrique d'automatiseurs pour les workers
+        sessions: Configuration de chaque worker
+        no_save: Mode validation (remplit sans sauvegarder)
+        start_from: Index de départ
+        plans: Plans déjà compilés (ex: chargés avec --from-plan)
+    """
+    if plans is None:
+        plans, _ = compile_plans(automator, loader, no_save)
+    rerun = plan_rerun(
+        [plan.progress_id or f"INDEX_{i}" for i, plan in enumerate(plans)],
+        [plan.content_hash for plan in plans],
+        tracker
+    )
+
+    logger.info(f"=== Démarrage de l'automatisation répartie ({len(sessions)} workers) ===")
+    rerun.log_summary(logger)
+    if rerun.counts[CHANGED]:
+        logger.warning(
+            f"{rerun.counts[CHANGED]} territoires modifiés ne sont pas mis à jour par les workers: "
+            f"relancez sans --workers pour les mettre à jour"
+        )
+    plans = [
+        plan for i, plan in enumerate(plans)
+        if i >= start_from and rerun.is_scheduled(i) and rerun.decisions[i] != CHANGED
+    ]
+    coordinator = ShardCoordinator(
+        sessions=sessions,
+        factory=factory,
+        tracker=tracker,
+        shard_size=SHARD_SIZE,
+        stall_timeout=WORKER_STALL_TIMEOUT,
+        no_save=no_save,
+        max_retries=MAX_RETRIES,
+    )
+    stats = coordinator.run(plans)
+
+    logger.info(f"=== Automatisation terminée ===")
+    logger.info(f"Traités avec succès: {stats['processed']}")
+    logger.info(f"Échecs: {stats['failed']}")
+    for name, count in stats["per_worker"].items():
+        logger.info(f"  {name}: {count} territoires")
+
+
+def export_trace(logger, tracer: Tracer):
+    """Écrit la trace Chrome et le résumé CSV des durées dans le dossier des logs."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    trace_file = tracer.export_chrome_trace(LOG_FOLDER_PATH / f"trace_{timestamp}.json")
+    summary_file = tracer.export_csv(LOG_FOLDER_PATH / f"trace_{timestamp}.csv")
+    logger.info(f"Trace écrite: {trace_file} (chrome://tracing ou ui.perfetto.dev)")
+    logger.info(f"Durées par étape: {summary_file}")
+
+    for row in tracer.summary():
+        if row["cat"] == "step":
+            logger.info(
+                f"  {row['name']:<24} p50 {row['p50'] * 1000:7.1f} ms  "
+                f"p95 {row['p95'] * 1000:7.1f} ms  max {row['max'] * 1000:7.1f} ms"
+            )
+
+
 def main():
     """Point d'entrée principal."""
     args = parse_args()
@@ -273,21 +803,86 @@ def main():
     logger = setup_logger(LOG_FOLDER_PATH)
     logger.info("=== Territory Automation pour New World Scheduler ===")
 
-    # Vérifier les prérequis
-    if not verify_prerequisites(logger, args.data_file, args.pdf_folder):
-        logger.error("Prérequis non satisfaits. Arrêt.")
+    plans = None
+    loader = None
+
+    if args.stream and (
+        args.from_plan or args.update or args.attachments_only or args.export_nws
+        or args.verify or args.workers > 1
+    ):
+        logger.error(
+            "--stream ne peut pas être combiné avec --from-plan, --update, "
+            "--attachments-only, --export-nws, --verify ou --workers"
+        )
         sys.exit(1)
 
-    # Charger les données
-    try:
-        loader = DataLoader(args.data_file, EXCEL_COLUMNS)
-        loader.load()
-    except Exception as e:
-        logger.error(f"Erreur lors du chargement des données: {e}")
+    # Les workers sont des processus locaux: sur le bureau réel, ils se
+    # disputeraient la souris et le clavier de cette session
+    if args.workers > 1 and not args.dry_run and args.backend != "simulator":
+        logger.error(
+            "--workers exige --backend simulator: les workers s'exécutent tous dans "
+            "cette session de bureau et ne peuvent pas piloter chacun leur propre NWS"
+        )
+        sys.exit(1)
+
+    if args.from_plan:
+        # Exécution d'un plan précalculé: le fichier de données n'est pas relu
+        try:
+            plans = load_plans(args.from_plan)
+            logger.info(f"Plan chargé: {args.from_plan} ({len(plans)} territoires)")
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement du plan: {e}")
+            sys.exit(1)
+    else:
+        # Vérifier les prérequis
+        if not verify_prerequisites(logger, args.data_file, args.pdf_folder):
+            logger.error("Prérequis non satisfaits. Arrêt.")
+            sys.exit(1)
+
+        # Charger les données (avec --stream, elles sont lues pendant l'automatisation)
+        try:
+            cache = None
+            if DATASET_CACHE_ENABLED:
+                cache = DatasetCache(
+                    DATASET_CACHE_FOLDER,
+                    max_entries=DATASET_CACHE_MAX_ENTRIES,
+                    refresh=args.refresh_cache
+                )
+            loader = DataLoader(args.data_file, EXCEL_COLUMNS, cache=cache)
+            if not args.stream:
+                loader.load()
+        except Exception as e:
+            logger.error(f"Erreur lors du chargement des données: {e}")
+            sys.exit(1)
+
+    if (args.update or args.attachments_only or args.export_nws) and args.from_plan:
+        logger.error("--update, --attachments-only et --export-nws lisent le fichier de données (pas --from-plan)")
+        sys.exit(1)
+    if (args.update or args.attachments_only) and (args.dry_run or args.workers > 1):
+        logger.error("--update et --attachments-only ne peuvent pas être combinés avec --dry-run ou --workers")
         sys.exit(1)
 
-    # Initialiser le tracker de progression
-    tracker = ProgressTracker(PROGRESS_FILE_PATH)
+    # Import en masse: aucun pilotage de l'interface
+    if args.export_nws:
+        exporter = NWSImportExporter(
+            NWS_IMPORT_COLUMNS, CATEGORIES, VILLES, OPTION_LABELS, NWS_IMPORT_DELIMITER
+        )
+        exporter.export(loader.iter_territories(), args.export_nws)
+        logger.info("Importez ce fichier dans NWS, puis joignez les PDFs avec --attachments-only")
+        sys.exit(0)
+
+    # Initialiser le tracker de progression (distinct en mode mise à jour)
+    progress_file = UPDATE_PROGRESS_FILE_PATH if args.update else PROGRESS_FILE_PATH
+    if args.progress_db:
+        # La progression déjà enregistrée dans le journal est reprise si la base est neuve
+        tracker = SQLiteProgressTracker(
+            UPDATE_PROGRESS_DB_PATH if args.update else PROGRESS_DB_PATH,
+            sync_every=PROGRESS_SYNC_EVERY,
+            claim_timeout=PROGRESS_CLAIM_TIMEOUT,
+            seed_from=progress_file
+        )
+    else:
+        tracker = ProgressTracker(progress_file, sync_every=PROGRESS_SYNC_EVERY)
 
     if args.reset:
         logger.info("Réinitialisation de la progression...")
@@ -295,16 +890,24 @@ def main():
 
     # Mode vérification uniquement
     if args.verify:
-        verify_data(logger, loader, args.pdf_folder)
+        if loader is not None:
+            verify_data(logger, loader, args.pdf_folder)
         sys.exit(0)
 
     # Préparer les délais
     delays = {
         "after_click": DELAY_AFTER_CLICK,
         "after_type": DELAY_AFTER_TYPE,
+        "after_paste": DELAY_AFTER_PASTE,
+        "dropdown_open": DELAY_DROPDOWN_OPEN,
+        "confirm_modal": DELAY_CONFIRM_MODAL,
+        "dialog_open": DELAY_DIALOG_OPEN,
+        "navigation": DELAY_NAVIGATION,
         "app_launch": DELAY_APP_LAUNCH,
         "after_save": DELAY_AFTER_SAVE,
         "between_territories": DELAY_BETWEEN_TERRITORIES,
+        "input_pause": DELAY_INPUT_PAUSE,
+        "focus_cache_ttl": FOCUS_CACHE_TTL,
     }
 
     # Configuration des dialogues de démarrage
@@ -315,20 +918,110 @@ def main():
         "wait_time": STARTUP_DIALOG_WAIT,
     }
 
+    # Surveillance des dialogues pendant l'automatisation
+    modal_watcher_config = {
+        "enabled": MODAL_WATCHER_ENABLED and not args.no_modal_watcher,
+        "interval": MODAL_WATCHER_INTERVAL,
+        "rules": MODAL_RULES,
+        "default_rule": MODAL_DEFAULT_RULE,
+    }
+
+    # Vérification des actions par empreinte d'écran
+    pixel_verify_config = {
+        "enabled": PIXEL_VERIFY_ENABLED or args.pixel_check,
+        "radius": PIXEL_VERIFY_RADIUS,
+        "tolerance": PIXEL_VERIFY_TOLERANCE,
+        "min_change": PIXEL_VERIFY_MIN_CHANGE,
+        "regions": PIXEL_VERIFY_REGIONS,
+        "retry": PIXEL_VERIFY_RETRY,
+        "expectations": PIXEL_VERIFY_EXPECT,
+        "fingerprint_folder": PIXEL_VERIFY_FINGERPRINTS,
+    }
+
+    # Profil de calibration: imposé, ou choisi à nouveau une fois NWS connecté
+    coordinates = COORDINATES
+    calibration = CALIBRATION_PROFILES
+    if args.profile:
+        if args.profile not in CALIBRATION_PROFILES:
+            logger.error(
+                f"Profil de calibration inconnu: {args.profile} "
+                f"(disponibles: {', '.join(CALIBRATION_PROFILES.profiles) or 'aucun'})"
+            )
+            sys.exit(1)
+        coordinates = {**COORDINATES, **CALIBRATION_PROFILES.select(None, args.profile).coordinates}
+        calibration = None
+        logger.info(f"Calibration: profil imposé {args.profile}")
+    else:
+        logger.info(f"Calibration: {CALIBRATION_CHOICE.detail}")
+
     # Créer l'automatiseur
-    automator = NWSAutomator(
-        exe_path=NWS_EXE_PATH,
-        window_title=NWS_WINDOW_TITLE,
-        coordinates=COORDINATES,
-        delays=delays,
-        pdf_folder=args.pdf_folder,
-        startup_dialog_config=startup_dialog_config,
-        categories=CATEGORIES,
-        villes=VILLES
-    )
+    automator_kwargs = {
+        "exe_path": NWS_EXE_PATH,
+        "window_title": NWS_WINDOW_TITLE,
+        "coordinates": coordinates,
+        "calibration": calibration,
+        "delays": delays,
+        "pdf_folder": args.pdf_folder,
+        "startup_dialog_config": startup_dialog_config,
+        "modal_watcher_config": modal_watcher_config,
+        "pixel_verify_config": pixel_verify_config,
+        "categories": CATEGORIES,
+        "villes": VILLES,
+        "text_entry": TEXT_ENTRY_MODES,
+        "locators": ELEMENT_LOCATORS,
+        "labels": OPTION_LABELS,
+    }
+    # Le traceur reste local: les workers (--workers) ne sont pas tracés
+    tracer = Tracer(enabled=args.trace)
+    simulator_options = None
+    if args.backend == "simulator":
+        simulator_options = SIMULATOR_OPTIONS
+        logger.info("Backend: simulateur NWS (aucune action sur le bureau)")
+        automator = NWSAutomator(
+            **{**automator_kwargs, **NWSSimulator(**simulator_options).automator_kwargs()},
+            tracer=tracer
+        )
+    else:
+        automator = NWSAutomator(**automator_kwargs, tracer=tracer)
 
     # Lancer l'automatisation
     try:
+        if args.attachments_only:
+            run_attachments(
+                logger=logger,
+                loader=loader,
+                tracker=tracker,
+                automator=automator,
+                start_from=args.start_from
+            )
+            return
+
+        if args.update:
+            run_update(
+                logger=logger,
+                loader=loader,
+                tracker=tracker,
+                automator=automator,
+                start_from=args.start_from
+            )
+            return
+
+        if args.workers > 1 and not args.dry_run:
+            # Chaque worker pilote son propre simulateur
+            sessions = [{"name": f"simulateur{i + 1}"} for i in range(args.workers)]
+            run_sharded(
+                logger=logger,
+                loader=loader,
+                tracker=tracker,
+                automator=automator,
+                factory=AutomatorFactory(automator_kwargs, simulator_options),
+                sessions=sessions,
+                no_save=args.no_save,
+                start_from=args.start_from,
+                plans=plans
+            )
+            return
+
         run_automation(
             logger=logger,
             loader=loader,
@@ -336,7 +1029,10 @@ def main():
             automator=automator,
             dry_run=args.dry_run,
             no_save=args.no_save,
-            start_from=args.start_from
+            start_from=args.start_from,
+            plans=plans,
+            plan_file=args.plan_file,
+            stream_chunk_size=STREAM_CHUNK_SIZE if args.stream else 0
         )
     except KeyboardInterrupt:
         logger.warning("Interruption par l'utilisateur (Ctrl+C)")
@@ -344,6 +1040,11 @@ def main():
     except Exception as e:
         logger.exception(f"Erreur inattendue: {e}")
         sys.exit(1)
+    finally:
+        automator.stop_watcher()
+        tracker.close()
+        if tracer.enabled:
+            export_trace(logger, tracer)
 
 
 if __name__ == "__main__":
@@ -1,35 +1,34 @@
 """
 Module principal d'automatisation de New World Scheduler.
 Utilise pywinauto pour le contrôle de l'application Windows.
+
+Les actions bas niveau passent par un backend (backends.py): le bureau
+Windows réel, ou le simulateur headless (simulator.py).
 """
 
+import threading
 import time
-import subprocess
 from pathlib import Path
 from typing import Optional
 
-import pyautogui
-import pyperclip
-
-try:
-    from pywinauto import Application, Desktop
-    from pywinauto.findwindows import ElementNotFoundError
-    from pywinauto.timings import TimeoutError as PywinautoTimeout
-    PYWINAUTO_AVAILABLE = True
-except ImportError:
-    PYWINAUTO_AVAILABLE = False
-
+from .errors import AutomationError
 from .logger_setup import get_logger
+from .waits import UIProbe, PywinautoProbe, Waiter, title_pattern, PYWINAUTO_AVAILABLE
+from .planner import TerritoryPlanner, TerritoryPlan, PlanExecutor, UPDATE_FIELDS, CONFIRM_TYPE_MODAL
+from .elements import ElementRegistry, FORM_OPENERS, FORM_MARKERS
+from .checkpoints import StepJournal, CREATE_STEP, NUMERO_STEP, SUFFIXE_STEP
+from .backends import GUIBackend, DesktopBackend
+from .tracing import Tracer, traced
+from .watcher import ModalWatcher, ModalInterrupt
+from .fingerprint import ActionVerifier
+from .profiles import CalibrationProfiles
 
+# Titres possibles de la boîte de dialogue Windows d'ouverture de fichier
+FILE_DIALOG_TITLES = ("Ouvrir", "Open", "Sélectionner", "Select")
 
-# Configuration de pyautogui
-pyautogui.FAILSAFE = True  # Coin supérieur gauche = arrêt d'urgence
-pyautogui.PAUSE = 0.1  # Pause entre chaque action
-
-
-class AutomationError(Exception):
-    """Exception pour les erreurs d'automatisation."""
-    pass
+# Intervalle de recherche de la fenêtre NWS au lancement (doublé à chaque essai)
+LAUNCH_POLL_INITIAL = 0.05
+LAUNCH_POLL_MAX = 0.5
 
 
 class NWSAutomator:
@@ -37,7 +36,7 @@ class NWSAutomator:
     Automatise les interactions avec New World Scheduler 7.9.
 
     Utilise une combinaison de pywinauto (pour la gestion des fenêtres)
-    et pyautogui (pour les clics et la saisie).
+    et pyautogui (pour les clics et la saisie), via un backend interchangeable.
     """
 
     def __init__(
@@ -49,7 +48,16 @@ class NWSAutomator:
         pdf_folder: Path,
         startup_dialog_config: Optional[dict] = None,
         categories: Optional[dict] = None,
-        villes: Optional[dict] = None
+        villes: Optional[dict] = None,
+        probe: Optional[UIProbe] = None,
+        text_entry: Optional[dict] = None,
+        locators: Optional[dict] = None,
+        labels: Optional[dict] = None,
+        backend: Optional[GUIBackend] = None,
+        tracer: Optional[Tracer] = None,
+        modal_watcher_config: Optional[dict] = None,
+        pixel_verify_config: Optional[dict] = None,
+        calibration: Optional[CalibrationProfiles] = None
     ):
         """
         Initialise l'automatiseur.
@@ -63,20 +71,105 @@ class NWSAutomator:
             startup_dialog_config: Configuration pour gérer les dialogues de démarrage
             categories: Mapping nom catégorie -> clé de coordonnée (depuis options.json)
             villes: Mapping nom ville -> clé de coordonnée (depuis options.json)
+            probe: Sonde d'observation de l'interface (défaut: pywinauto si disponible)
+            text_entry: Mode de saisie par champ ("auto", "value" ou "paste"),
+                la clé "default" s'applique aux champs non listés
+            locators: Mapping élément -> critères UIA (auto_id, control_type...),
+                les coordonnées ne servant alors que de secours
+            labels: Mapping clé d'option -> libellé affiché dans NWS (depuis options.json)
+            backend: Backend GUI (défaut: bureau Windows via pyautogui/pywinauto)
+            tracer: Traceur des durées par étape et par action (défaut: désactivé)
+            modal_watcher_config: Surveillance des dialogues ("enabled", "rules",
+                "default_rule", "interval"); None = pas de surveillance
+            pixel_verify_config: Vérification des actions par empreinte d'écran
+                ("enabled", "radius", "tolerance", "min_change", "regions", "retry",
+                "expectations", "fingerprint_folder")
+            calibration: Profils de calibration; si fourni, le profil est choisi à
+                nouveau selon la fenêtre NWS une fois connectée (None = coordonnées fixes)
         """
         self.exe_path = exe_path
         self.window_title = window_title
         self.coords = coordinates
+        self.calibration = calibration
         self.delays = delays
         self.pdf_folder = Path(pdf_folder)
         self.logger = get_logger()
-        self.app: Optional[Application] = None
+        self.app = None
         self.main_window = None
+        self.backend = backend or DesktopBackend()
+        self.tracer = tracer or Tracer()
+
+        # Registre des éléments: contrôles UIA résolus une fois par formulaire
+        self.registry = ElementRegistry(coordinates, locators)
+
+        # Attentes conditionnelles: les délais ne sont plus que des plafonds
+        if probe is None:
+            probe = PywinautoProbe(self.registry) if PYWINAUTO_AVAILABLE else UIProbe()
+        self.waiter = Waiter(probe)
+        if "input_pause" in self.delays:
+            self.backend.set_pause(self.delays["input_pause"])
+
+        # État du focus: évite de réactiver NWS s'il est déjà au premier plan
+        self._main_handle: Optional[int] = None
+        self._main_pid: Optional[int] = None
+        self._last_activation = 0.0
+        self.metrics = {
+            "activate_requests": 0,   # Appels à activate_window()
+            "activate_performed": 0,  # Activations réellement effectuées
+            "activate_skipped": 0,    # Activations évitées (NWS déjà au premier plan)
+            "text_direct": 0,         # Champs écrits via ValuePattern
+            "text_paste": 0,          # Champs saisis par clic + presse-papiers
+            "dropdown_direct": 0,     # Options sélectionnées via UIA
+            "dropdown_typeahead": 0,  # Options sélectionnées par saisie du libellé
+            "dropdown_click": 0,      # Options cliquées aux coordonnées calibrées
+            "clicks_retried": 0,      # Clics répétés faute d'effet visible
+            "retries_resumed": 0,     # Reprises sur le formulaire encore ouvert
+            "retries_reopened": 0,    # Reprises après réouverture du territoire
+            "retries_restarted": 0,   # Nouvelles tentatives depuis l'étape 1
+            "steps_skipped": 0,       # Étapes terminées non refaites lors des reprises
+        }
+
+        # Vérification des actions par empreinte de la région visée (optionnelle)
+        self.verifier: Optional[ActionVerifier] = None
+        pixel_config = dict(pixel_verify_config or {})
+        if pixel_config.pop("enabled", False):
+            self.verifier = ActionVerifier(self.backend, **pixel_config)
+        self._last_target: Optional[tuple[str, int, int]] = None
+
+        # Mode de saisie du texte par champ
+        self.text_entry = text_entry or {"default": "auto"}
+
+        # Menus déroulants: méthode de sélection qui a fonctionné et options lues
+        self._dropdown_methods: dict[str, str] = {}
+        self._dropdown_items: dict[str, dict[str, str]] = {}
 
         # Options configurables (catégories et villes)
         self.categories = categories or {"SAR": "dropdown_option_sar"}
         self.villes = villes or {}
 
+        # Surveillance des dialogues inattendus (démarrée après le lancement).
+        # Le verrou de saisie est partagé avec l'exécution du plan
+        self.input_lock = threading.RLock()
+        self.watcher: Optional[ModalWatcher] = None
+        config = modal_watcher_config or {}
+        if config.get("enabled"):
+            self.watcher = ModalWatcher(
+                probe,
+                self.backend,
+                config.get("rules", []),
+                config.get("default_rule"),
+                config.get("interval", 0.05),
+                self.input_lock
+            )
+            self.waiter.interrupt = self.watcher.check
+
+        # Planification (décisions) et exécution (actions GUI)
+        self.planner = TerritoryPlanner(
+            self.registry.known_elements(), self.pdf_folder, self.categories, self.villes, labels,
+            self.watcher.confirmed_modals() if self.watcher is not None else ()
+        )
+        self.executor = PlanExecutor(self, self.tracer)
+
         # Configuration des dialogues de démarrage
         self.startup_config = startup_dialog_config or {
             "titles": [],
@@ -85,52 +178,136 @@ class NWSAutomator:
             "wait_time": 2.0
         }
 
+    @traced()
     def launch_application(self) -> bool:
         """
         Lance New World Scheduler s'il n'est pas déjà ouvert.
 
+        Le processus lancé est suivi: la fenêtre principale est recherchée avec
+        un intervalle croissant (LAUNCH_POLL_INITIAL à LAUNCH_POLL_MAX) et le
+        lancement se termine dès qu'elle répond. DELAY_APP_LAUNCH n'est plus
+        qu'un plafond.
+
         Returns:
             True si l'application est prête, False sinon
         """
+        start = time.monotonic()
         try:
-            # Essayer de se connecter à une instance existante (plusieurs tentatives)
-            for attempt in range(3):
-                if self._connect_to_existing():
-                    self.logger.info("Connecté à une instance existante de NWS")
-                    self._dismiss_startup_dialogs()
-                    self._navigate_to_territory_screen()
-                    return True
-                if attempt < 2:
-                    time.sleep(1)
+            # Se connecter à une instance existante
+            if self._connect_to_existing(timeout=0):
+                self.logger.info(
+                    f"Connecté à une instance existante de NWS ({time.monotonic() - start:.2f}s)"
+                )
+                self._apply_calibration_profile()
+                self._dismiss_startup_dialogs()
+                self._navigate_to_territory_screen()
+                self._start_watcher()
+                return True
 
             # Lancer une nouvelle instance
             self.logger.info(f"Lancement de NWS: {self.exe_path}")
+            process = self.backend.start_process(self.exe_path)
+            launched = time.monotonic()
+
+            if not self._wait_for_main_window(process, self.delays.get("app_launch", 10.0)):
+                raise AutomationError("Impossible de se connecter à NWS après lancement")
+
+            self.logger.info(f"NWS lancé avec succès en {time.monotonic() - launched:.2f}s")
+            self._apply_calibration_profile()
+            self._dismiss_startup_dialogs()
+            self._navigate_to_territory_screen()
+            self._start_watcher()
+            self.logger.info(f"NWS prêt en {time.monotonic() - start:.2f}s (lancement et navigation)")
+            return True
 
-            if not Path(self.exe_path).exists():
-                raise AutomationError(f"Exécutable non trouvé: {self.exe_path}")
+        except Exception as e:
+            self.logger.error(f"Erreur lors du lancement: {e}")
+            return False
 
-            subprocess.Popen(self.exe_path)
+    def _wait_for_main_window(self, process, timeout: float) -> bool:
+        """
+        Attend que la fenêtre principale du processus lancé réponde.
 
-            # Attendre que l'application démarre (avec plusieurs tentatives)
-            launch_delay = self.delays.get("app_launch", 10.0)
-            max_attempts = 5
-            delay_per_attempt = launch_delay / max_attempts
+        Args:
+            process: Processus lancé (objet avec poll(), ou None)
+            timeout: Délai maximal (secondes)
 
-            for attempt in range(max_attempts):
-                self.logger.debug(f"Tentative de connexion {attempt + 1}/{max_attempts}...")
-                time.sleep(delay_per_attempt)
+        Returns:
+            True si la fenêtre est connectée et répond, False si timeout
 
-                if self._connect_to_existing():
-                    self.logger.info("NWS lancé avec succès")
-                    self._dismiss_startup_dialogs()
-                    self._navigate_to_territory_screen()
+        Raises:
+            AutomationError: Si le processus se termine avant d'afficher sa fenêtre
+        """
+        clock = self.waiter.clock
+        deadline = clock() + timeout
+        interval = LAUNCH_POLL_INITIAL
+        attempts = 0
+
+        while True:
+            attempts += 1
+            if self._connect_to_existing(timeout=0):
+                if self.backend.is_responsive(self._main_handle):
+                    self.logger.debug(f"Fenêtre NWS prête après {attempts} vérifications")
                     return True
 
-            raise AutomationError("Impossible de se connecter à NWS après lancement")
+            exit_code = process.poll() if process is not None else None
+            if exit_code is not None:
+                raise AutomationError(f"NWS s'est arrêté pendant le lancement (code {exit_code})")
 
-        except Exception as e:
-            self.logger.error(f"Erreur lors du lancement: {e}")
-            return False
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return False
+            self.waiter.sleep(min(interval, remaining))
+            interval = min(interval * 2, LAUNCH_POLL_MAX)
+
+    def _apply_calibration_profile(self):
+        """
+        Choisit le profil de calibration selon la fenêtre NWS connectée.
+
+        Au démarrage, seul l'écran est connu: si la fenêtre a été déplacée ou
+        agrandie proportionnellement depuis la calibration, les coordonnées
+        sont dérivées du profil le plus proche.
+        """
+        if self.calibration is None:
+            return
+        layout = self.backend.window_layout(self._main_handle)
+        if layout is None:
+            return
+
+        choice = self.calibration.select(layout)
+        if not choice.coordinates:
+            return
+        coordinates = {**self.coords, **choice.coordinates}
+        if coordinates != self.coords:
+            self.logger.info(f"Calibration: {choice.detail}")
+            self.coords = coordinates
+            self.registry.coords = coordinates
+            self.registry.invalidate()
+
+    def _start_watcher(self):
+        """Démarre la surveillance des dialogues (fenêtres déjà ouvertes ignorées)."""
+        if self.watcher is not None:
+            self.watcher.start(self._main_pid)
+
+    def stop_watcher(self):
+        """Arrête la surveillance des dialogues."""
+        if self.watcher is not None:
+            self.watcher.stop()
+
+    def check_modals(self):
+        """
+        Interrompt le territoire en cours si un dialogue inattendu est apparu.
+
+        Raises:
+            ModalInterrupt: Si la surveillance a signalé un dialogue
+        """
+        if self.watcher is not None:
+            self.watcher.check()
+
+    def _begin_territory(self):
+        """Oublie les dialogues signalés pendant le territoire précédent."""
+        if self.watcher is not None:
+            self.watcher.reset()
 
     def _dismiss_startup_dialogs(self):
         """
@@ -142,12 +319,12 @@ class NWSAutomator:
             self.logger.debug("Aucun titre de dialogue configuré, tentative Escape simple")
             # Essayer quand même quelques Escape au cas où
             for _ in range(2):
-                pyautogui.press("escape")
-                time.sleep(0.2)
+                self.backend.press("escape")
+                self.backend.sleep(0.2)
             return
 
         self.logger.debug("Recherche de dialogues de démarrage...")
-        time.sleep(self.startup_config.get("wait_time", 2.0))
+        self.backend.sleep(self.startup_config.get("wait_time", 2.0))
 
         # Méthode 1: Recherche par titre avec pywinauto
         if PYWINAUTO_AVAILABLE and self.app:
@@ -157,28 +334,28 @@ class NWSAutomator:
                     if dialog.exists():
                         self.logger.info(f"Dialogue détecté: {title}")
                         self._close_dialog(dialog)
-                        time.sleep(0.5)
+                        self.backend.sleep(0.5)
                 except Exception:
                     pass
 
         # Méthode 2: Recherche avec pyautogui
         for title in dialog_titles:
-            windows = pyautogui.getWindowsWithTitle(title)
+            windows = self.backend.find_windows(title)
             if windows:
                 self.logger.info(f"Dialogue détecté (pyautogui): {title}")
                 windows[0].activate()
-                time.sleep(0.2)
+                self.backend.sleep(0.2)
                 self._close_dialog_fallback()
-                time.sleep(0.5)
+                self.backend.sleep(0.5)
 
         # Méthode 3: Essayer de fermer tout dialogue modal avec Escape
         self.logger.debug("Tentative de fermeture par Escape...")
         for _ in range(3):
-            pyautogui.press("escape")
-            time.sleep(0.3)
+            self.backend.press("escape")
+            self.backend.sleep(0.3)
 
         # Réactiver la fenêtre principale
-        self.activate_window()
+        self.activate_window(force=True)
 
     def _close_dialog(self, dialog):
         """Ferme un dialogue pywinauto."""
@@ -200,7 +377,7 @@ class NWSAutomator:
                     pass
                 # Fallback: cliquer aux coordonnées configurées
                 x, y = self.startup_config.get("close_button", (960, 600))
-                pyautogui.click(x, y)
+                self.backend.click(x, y)
             elif method == "click_ok":
                 try:
                     ok_btn = dialog.child_window(title_re=".*(OK|Fermer|Close).*", control_type="Button")
@@ -209,9 +386,9 @@ class NWSAutomator:
                         return
                 except Exception:
                     pass
-                pyautogui.press("enter")
+                self.backend.press("enter")
             else:
-                pyautogui.press("escape")
+                self.backend.press("escape")
 
             self.logger.debug(f"Dialogue fermé avec méthode: {method}")
 
@@ -224,11 +401,11 @@ class NWSAutomator:
         method = self.startup_config.get("close_method", "escape")
 
         if method in ["escape", "click_close"]:
-            pyautogui.press("escape")
+            self.backend.press("escape")
         elif method in ["enter", "click_ok"]:
-            pyautogui.press("enter")
+            self.backend.press("enter")
         else:
-            pyautogui.press("escape")
+            self.backend.press("escape")
 
     def _navigate_to_territory_screen(self):
         """
@@ -241,84 +418,183 @@ class NWSAutomator:
         self.logger.info("Navigation vers l'écran des territoires...")
 
         # Étape 1: Cliquer sur "Territoires"
-        if "btn_menu_territoires" in self.coords:
+        if "btn_menu_territoires" in self.registry:
             self.logger.debug("Clic sur menu Territoires")
             self.click("btn_menu_territoires")
-            time.sleep(0.5)
+            self.waiter.element_exists("btn_liste_territoires", self.delays.get("navigation", 0.5))
         else:
             self.logger.warning("Coordonnées 'btn_menu_territoires' non définies")
 
         # Étape 2: Cliquer sur "Liste des territoires"
-        if "btn_liste_territoires" in self.coords:
+        if "btn_liste_territoires" in self.registry:
             self.logger.debug("Clic sur Liste des territoires")
             self.click("btn_liste_territoires")
-            time.sleep(0.5)
+            self.waiter.element_enabled("btn_new_territory", self.delays.get("navigation", 0.5))
         else:
             self.logger.warning("Coordonnées 'btn_liste_territoires' non définies")
 
         self.logger.info("Navigation terminée - écran des territoires")
 
-    def _connect_to_existing(self) -> bool:
-        """Tente de se connecter à une instance existante."""
-        if not PYWINAUTO_AVAILABLE:
-            self.logger.warning("pywinauto non disponible, utilisation de pyautogui seul")
-            return self._activate_window_pyautogui()
+    def _connect_to_existing(self, timeout: float = 2.0) -> bool:
+        """
+        Tente de se connecter à une instance existante.
 
-        try:
-            self.app = Application(backend="uia").connect(
-                title_re=f".*{self.window_title}.*",
-                timeout=2
-            )
-            self.main_window = self.app.window(title_re=f".*{self.window_title}.*")
-            self.main_window.set_focus()
-            return True
-        except (ElementNotFoundError, PywinautoTimeout):
+        Args:
+            timeout: Délai de recherche de la fenêtre (0 = une seule tentative)
+        """
+        connection = self.backend.connect(self.window_title, timeout=timeout)
+        if connection is None:
             return False
 
+        self.app = connection.app
+        self.main_window = connection.window
+        self._main_handle = connection.handle
+        self._main_pid = connection.pid
+        if connection.root is not None:
+            self.registry.set_root(connection.root)
+        self._last_activation = time.monotonic()
+        return True
+
     def _activate_window_pyautogui(self) -> bool:
         """Active la fenêtre en utilisant pyautogui."""
-        windows = pyautogui.getWindowsWithTitle(self.window_title)
+        windows = self.backend.find_windows(self.window_title)
         if windows:
             windows[0].activate()
-            time.sleep(0.5)
+            self.backend.sleep(0.5)
+            self._main_handle = getattr(windows[0], "_hWnd", self._main_handle)
+            self._last_activation = time.monotonic()
             return True
         return False
 
-    def activate_window(self):
-        """Active et met au premier plan la fenêtre NWS."""
+    def _has_focus(self) -> bool:
+        """
+        Indique si NWS (fenêtre principale ou l'un de ses dialogues) est au premier plan.
+
+        Si la fenêtre au premier plan n'est pas observable, se fie à la date
+        de la dernière activation (valable `focus_cache_ttl` secondes).
+        """
+        foreground = self.waiter.probe.foreground_window()
+        if foreground is None:
+            ttl = self.delays.get("focus_cache_ttl", 0.0)
+            return time.monotonic() - self._last_activation < ttl
+
+        handle, pid = foreground
+        if self._main_handle is not None and handle == self._main_handle:
+            return True
+        return self._main_pid is not None and pid == self._main_pid
+
+    @traced(target=False)
+    def activate_window(self, force: bool = False):
+        """
+        Active et met au premier plan la fenêtre NWS.
+
+        Args:
+            force: Si True, réactive même si NWS semble déjà au premier plan
+        """
+        self.metrics["activate_requests"] += 1
+        if not force and self._has_focus():
+            self.metrics["activate_skipped"] += 1
+            return
+
+        self.metrics["activate_performed"] += 1
         if self.main_window:
             try:
                 self.main_window.set_focus()
-                time.sleep(0.2)
+                self.backend.sleep(0.2)
+                self._last_activation = time.monotonic()
             except Exception:
                 self._activate_window_pyautogui()
         else:
             self._activate_window_pyautogui()
 
+    def get_metrics(self) -> dict:
+        """Retourne les compteurs de l'automatiseur."""
+        metrics = dict(self.metrics)
+        metrics.update({f"elements_{k}": v for k, v in self.registry.stats.items()})
+        if self.watcher is not None:
+            metrics.update({f"modals_{k}": v for k, v in self.watcher.stats.items()})
+        if self.verifier is not None:
+            metrics.update({f"pixels_{k}": v for k, v in self.verifier.stats.items()})
+        return metrics
+
+    def _with_pixels(self, condition, snapshot):
+        """
+        Complète une condition par la comparaison d'empreintes: l'attente se
+        termine dès que la région visée montre l'effet attendu (changement,
+        absence de changement ou empreinte enregistrée), même si la sonde UI
+        ne sait pas observer l'effet.
+        """
+        if snapshot is None:
+            return condition
+
+        def combined():
+            if condition():
+                return True
+            return self.verifier.satisfied(snapshot)
+        return combined
+
+    @traced()
     def click(self, element_name: str, double: bool = False):
         """
         Clique sur un élément par son nom.
 
         Args:
-            element_name: Nom de l'élément dans le dictionnaire de coordonnées
+            element_name: Nom de l'élément (localisateur UIA ou coordonnées)
             double: Si True, effectue un double-clic
         """
-        if element_name not in self.coords:
+        if element_name not in self.registry:
             raise AutomationError(f"Élément inconnu: {element_name}")
 
-        x, y = self.coords[element_name]
+        position = self.registry.position(element_name)
+        if position is None:
+            raise AutomationError(f"Élément introuvable: {element_name}")
+        x, y = position
         action = "Double-clic" if double else "Clic"
         self.logger.info(f"  → {action} sur [{element_name}] à ({x}, {y})")
 
         self.activate_window()
+        self._last_target = (element_name, x, y)
+
+        probe = self.waiter.probe
+        focus_before = probe.focused_element()
+        snapshot = self.verifier.capture(element_name, x, y) if self.verifier else None
+
+        # Attendre que le clic soit pris en compte (focus sur l'élément ou déplacé)
+        def clicked():
+            has_focus = probe.element_has_focus(element_name)
+            if has_focus:
+                return True
+            focus_now = probe.focused_element()
+            if focus_now is None or focus_before is None:
+                return has_focus
+            return focus_now != focus_before
+
+        attempts = 2 if snapshot is not None and self.verifier.retry else 1
+        for attempt in range(attempts):
+            if double:
+                self.backend.double_click(x, y)
+            else:
+                self.backend.click(x, y)
 
-        if double:
-            pyautogui.doubleClick(x, y)
-        else:
-            pyautogui.click(x, y)
-
-        time.sleep(self.delays.get("after_click", 0.3))
+            # Nouveau formulaire: les contrôles résolus précédemment ne sont plus valides
+            if element_name in FORM_OPENERS:
+                self.registry.invalidate()
 
+            landed = self.waiter.wait_until(
+                self._with_pixels(clicked, snapshot),
+                self.delays.get("after_click", 0.3),
+                f"clic sur {element_name}"
+            )
+            if snapshot is None:
+                return
+            self.verifier.record(landed)
+            if landed:
+                return
+            self.logger.warning(f"  Clic sans effet visible sur [{element_name}]")
+            if attempt + 1 < attempts:
+                self.metrics["clicks_retried"] += 1
+
+    @traced(target=False)
     def type_text(self, text: str, clear_first: bool = True):
         """
         Saisit du texte dans le champ actif.
@@ -333,15 +609,31 @@ class NWSAutomator:
         preview = text[:30] + "..." if len(text) > 30 else text
         self.logger.info(f"    Saisie: \"{preview}\"")
 
+        # Région du dernier élément cliqué (le champ qui reçoit le texte)
+        snapshot = None
+        if self.verifier is not None and self._last_target is not None:
+            # L'effet attendu du clic ne vaut pas pour la saisie: le texte modifie la région
+            snapshot = self.verifier.capture(*self._last_target, expect="changed")
+
         if clear_first:
-            pyautogui.hotkey("ctrl", "a")
-            time.sleep(0.05)
+            self.backend.hotkey("ctrl", "a")
 
         # Utiliser le presse-papiers pour les caractères spéciaux
-        pyperclip.copy(text)
-        pyautogui.hotkey("ctrl", "v")
+        self.backend.copy(text)
+        self.backend.hotkey("ctrl", "v")
+
+        if snapshot is None:
+            self.waiter.value_equals(text, self.delays.get("after_type", 0.1))
+            return
 
-        time.sleep(self.delays.get("after_type", 0.1))
+        def typed():
+            value = self.waiter.probe.focused_value()
+            return None if value is None else value == text
+        self.waiter.wait_until(
+            self._with_pixels(typed, snapshot),
+            self.delays.get("after_type", 0.1),
+            "saisie prise en compte"
+        )
 
     def select_dropdown_option(self, dropdown_name: str, option_name: str):
         """
@@ -354,11 +646,91 @@ class NWSAutomator:
         self.logger.info(f"  Dropdown [{dropdown_name}] → [{option_name}]")
         # Cliquer sur le dropdown pour l'ouvrir
         self.click(dropdown_name)
-        time.sleep(0.3)
+        self.waiter.element_exists(option_name, self.delays.get("dropdown_open", 0.3))
 
         # Cliquer sur l'option
         self.click(option_name)
 
+    @traced()
+    def select_dropdown_value(self, dropdown_name: str, label: str, option_name: str = "") -> bool:
+        """
+        Sélectionne une option d'un menu déroulant par son libellé.
+
+        Méthodes essayées dans l'ordre (en commençant par celle qui a
+        fonctionné la dernière fois pour ce menu):
+        - "direct": sélection UIA, sans ouvrir le menu à la souris
+        - "typeahead": saisie du libellé + Entrée, validée par relecture
+        - "click": ouverture du menu et clic sur l'option calibrée
+
+        Args:
+            dropdown_name: Nom du dropdown
+            label: Libellé de l'option (tel qu'affiché dans NWS)
+            option_name: Élément calibré de l'option (secours), optionnel
+
+        Returns:
+            True si l'option est sélectionnée (ou cliquée), False sinon
+        """
+        self.logger.info(f"  Dropdown [{dropdown_name}] → \"{label}\"")
+        label = self._match_dropdown_item(dropdown_name, label)
+
+        methods = ["direct", "typeahead", "click"]
+        preferred = self._dropdown_methods.get(dropdown_name)
+        if preferred in methods:
+            methods.remove(preferred)
+            methods.insert(0, preferred)
+
+        for method in methods:
+            if method == "direct":
+                selected = self.waiter.probe.select_item(dropdown_name, label)
+            elif method == "typeahead":
+                selected = self._select_by_typeahead(dropdown_name, label)
+            else:
+                if not option_name or option_name not in self.registry:
+                    continue
+                self.select_dropdown_option(dropdown_name, option_name)
+                selected = True
+
+            if selected:
+                self._dropdown_methods[dropdown_name] = method
+                self.metrics[f"dropdown_{method}"] += 1
+                return True
+
+        self.logger.warning(f"  Option \"{label}\" introuvable dans [{dropdown_name}]")
+        return False
+
+    def _match_dropdown_item(self, dropdown_name: str, label: str) -> str:
+        """
+        Retrouve le libellé exact d'une option (casse, espaces) à partir de la
+        liste des options du menu, lue une seule fois puis mise en cache.
+        """
+        if dropdown_name not in self._dropdown_items:
+            items = self.waiter.probe.dropdown_items(dropdown_name)
+            if items is None:
+                return label
+            self._dropdown_items[dropdown_name] = {
+                item.strip().upper(): item for item in items
+            }
+        return self._dropdown_items[dropdown_name].get(label.strip().upper(), label)
+
+    def _select_by_typeahead(self, dropdown_name: str, label: str) -> Optional[bool]:
+        """
+        Sélectionne une option en tapant son libellé dans le menu.
+
+        Returns:
+            True si la sélection est vérifiée, None si elle n'est pas vérifiable
+        """
+        probe = self.waiter.probe
+        if probe.element_value(dropdown_name) is None:
+            # Impossible de vérifier le résultat: ne pas risquer une mauvaise option
+            return None
+
+        self.select_dropdown_by_typing(dropdown_name, label)
+        return self.waiter.wait_until(
+            lambda: (probe.element_value(dropdown_name) or "").strip().upper() == label.strip().upper(),
+            self.delays.get("after_click", 0.3),
+            f"option {label} sélectionnée"
+        )
+
     def select_dropdown_by_typing(self, dropdown_name: str, value: str):
         """
         Sélectionne une option dans un dropdown en tapant le texte.
@@ -372,23 +744,29 @@ class NWSAutomator:
 
         # Cliquer sur le dropdown pour l'ouvrir
         self.click(dropdown_name)
-        time.sleep(0.3)
 
         # Taper le texte pour filtrer/sélectionner
-        pyperclip.copy(value)
-        pyautogui.hotkey("ctrl", "v")
-        time.sleep(0.2)
+        self.backend.copy(value)
+        self.backend.hotkey("ctrl", "v")
+        self.waiter.value_equals(value, self.delays.get("after_paste", 0.2))
 
         # Appuyer sur Entrée pour valider la sélection
-        pyautogui.press("enter")
-        time.sleep(self.delays.get("after_click", 0.3))
+        focus_before = self.waiter.probe.focused_element()
+        self.backend.press("enter")
+        self.waiter.focus_changes(focus_before, self.delays.get("after_click", 0.3))
 
         self.logger.debug(f"Dropdown {dropdown_name} sélectionné: {value}")
 
+    @traced()
     def fill_field(self, field_name: str, value: str):
         """
         Remplit un champ de formulaire.
 
+        Selon le mode configuré pour le champ:
+        - "value": écriture directe via UIA ValuePattern (collage en secours)
+        - "paste": clic + Ctrl+A + collage depuis le presse-papiers
+        - "auto": écriture directe si le contrôle la permet, sinon collage
+
         Args:
             field_name: Nom du champ
             value: Valeur à saisir
@@ -397,9 +775,24 @@ class NWSAutomator:
             self.logger.info(f"  Champ [{field_name}] ignoré (vide)")
             return
 
+        mode = self.text_entry.get(field_name, self.text_entry.get("default", "auto"))
+        if mode in ("auto", "value"):
+            written = self.waiter.probe.set_element_value(field_name, value)
+            if written:
+                preview = value[:30] + "..." if len(value) > 30 else value
+                self.logger.info(f"  Saisie directe [{field_name}]: \"{preview}\"")
+                self.metrics["text_direct"] += 1
+                return
+            if mode == "value":
+                self.logger.warning(
+                    f"  Saisie directe impossible pour [{field_name}], utilisation du presse-papiers"
+                )
+
         self.click(field_name)
         self.type_text(value)
+        self.metrics["text_paste"] += 1
 
+    @traced()
     def import_pdf(self, pdf_path: Path) -> bool:
         """
         Importe un fichier PDF/image via la boîte de dialogue Windows.
@@ -419,32 +812,101 @@ class NWSAutomator:
             self.click("btn_import_pdf")
 
             # Attendre que la boîte de dialogue s'ouvre
-            time.sleep(1.5)
+            dialog_pattern = title_pattern(*FILE_DIALOG_TITLES)
+            if not self.waiter.window_appears(dialog_pattern, self.delays.get("dialog_open", 1.5)):
+                raise AutomationError("La boîte de dialogue d'ouverture ne s'est pas affichée")
 
             # Dans la boîte de dialogue Windows, le champ "Nom du fichier" a le focus
             # On utilise Ctrl+A pour tout sélectionner puis on colle le chemin
-            pyautogui.hotkey("ctrl", "a")
-            time.sleep(0.1)
+            self.backend.hotkey("ctrl", "a")
 
             # Copier le chemin absolu et coller
             absolute_path = str(pdf_path.resolve())
-            pyperclip.copy(absolute_path)
-            pyautogui.hotkey("ctrl", "v")
-            time.sleep(0.3)
+            self.backend.copy(absolute_path)
+            self.backend.hotkey("ctrl", "v")
+            self.waiter.value_equals(absolute_path, self.delays.get("after_paste", 0.3))
 
             self.logger.debug(f"Chemin collé: {absolute_path}")
 
             # Appuyer sur Entrée pour valider
-            pyautogui.press("enter")
-            time.sleep(self.delays.get("after_save", 1.0))
+            self.backend.press("enter")
+            self.waiter.window_closes(dialog_pattern, self.delays.get("after_save", 1.0))
 
             self.logger.info(f"Fichier importé: {pdf_path.name}")
             return True
 
+        except AutomationError:
+            raise
         except Exception as e:
             self.logger.error(f"Erreur lors de l'import: {e}")
             return False
 
+    def press(self, key: str):
+        """
+        Appuie sur une touche ou une combinaison ("enter", "ctrl+a"...).
+
+        Args:
+            key: Touche ou combinaison séparée par "+"
+        """
+        keys = key.split("+")
+        if len(keys) > 1:
+            self.backend.hotkey(*keys)
+        else:
+            self.backend.press(key)
+
+    @traced()
+    def wait_for(self, element_name: str, condition: str = "exists", delay: str = "after_click") -> bool:
+        """
+        Attend qu'un élément soit présent ou activé.
+
+        Args:
+            element_name: Nom de l'élément
+            condition: "exists" ou "enabled"
+            delay: Clé du délai maximal dans le dictionnaire des délais
+
+        Returns:
+            True si la condition est remplie, False si le délai est écoulé
+        """
+        timeout = self.delays.get(delay, self.delays.get("after_click", 0.3))
+        if condition == "enabled":
+            return self.waiter.element_enabled(element_name, timeout)
+        return self.waiter.element_exists(element_name, timeout)
+
+    def await_modal(self, name: str, delay: str = "confirm_modal") -> bool:
+        """
+        Attend que la surveillance ait validé un dialogue attendu.
+
+        Sans surveillance (plan rejoué avec --no-modal-watcher), le dialogue
+        de confirmation du type est validé par son bouton calibré.
+
+        Args:
+            name: Nom du dialogue (règle "confirm" de MODAL_RULES)
+            delay: Clé du délai maximal d'apparition du dialogue
+
+        Returns:
+            True si le dialogue a été validé, False si le délai est écoulé
+        """
+        timeout = self.delays.get(delay, self.delays.get("after_click", 0.3))
+        if self.watcher is None or name not in self.watcher.confirmed_modals():
+            if name != CONFIRM_TYPE_MODAL or "btn_confirm_type" not in self.registry.known_elements():
+                self.logger.warning(f"  Dialogue \"{name}\" non surveillé: validation ignorée")
+                return False
+            if not self.waiter.element_enabled("btn_confirm_type", timeout):
+                return False
+            with self.input_lock:
+                self.click("btn_confirm_type")
+            return True
+
+        # Délai d'apparition, plus un examen de la surveillance
+        confirmed = self.waiter.wait_until(
+            lambda: self.watcher.take_confirmed(name),
+            timeout + 2 * self.watcher.interval,
+            f"validation du dialogue {name}"
+        )
+        if not confirmed:
+            self.logger.debug(f"Dialogue \"{name}\" non apparu")
+        return confirmed
+
     def create_new_territory(self):
         """Clique sur le bouton Nouveau Territoire."""
         self.click("btn_new_territory")
@@ -460,118 +922,293 @@ class NWSAutomator:
 
         Returns:
             True si le traitement réussit, False sinon
+
+        Raises:
+            AutomationError: Voir execute_plan
         """
-        territory_id = territory.get("numero", "INCONNU")
+        return self.execute_plan(self.planner.plan(territory, no_save=no_save), no_save=no_save)
+
+    def execute_plan(
+        self,
+        plan: TerritoryPlan,
+        no_save: bool = False,
+        journal: Optional[StepJournal] = None
+    ) -> bool:
+        """
+        Exécute le plan d'actions d'un territoire.
+
+        Args:
+            plan: Plan produit par TerritoryPlanner
+            no_save: Si True, le plan ne contient pas l'import (mode validation)
+            journal: Journal des étapes, conservé entre les tentatives d'un même
+                territoire: une nouvelle tentative reprend à l'étape en échec
+
+        Returns:
+            True si le traitement réussit, False sinon (erreur inattendue)
+
+        Raises:
+            AutomationError: Erreur du territoire (élément introuvable, import
+                échoué, dialogue inattendu...), étape en échec notée dans le
+                journal: l'appelant décide d'une nouvelle tentative
+        """
+        territory_id = plan.territory_id
         self.logger.info(f"")
         self.logger.info(f"{'='*50}")
         self.logger.info(f"TERRITOIRE: {territory_id}")
         self.logger.info(f"{'='*50}")
 
+        self._begin_territory()
         try:
-            # Activer la fenêtre
-            self.activate_window()
-
-            # Créer un nouveau territoire
-            self.logger.info("[ÉTAPE 1] Nouveau territoire")
-            self.create_new_territory()
-
-            # Remplir les champs (ordre de saisie)
-            self.logger.info("[ÉTAPE 2] Catégorie")
-            categorie = territory.get("categorie", "").upper().strip()
-            if not categorie:
-                # Valeur par défaut: première catégorie disponible
-                categorie = list(self.categories.keys())[0] if self.categories else "SAR"
-            if categorie and "dropdown_categorie" in self.coords:
-                option_id = self.categories.get(categorie)
-                if option_id and option_id in self.coords:
-                    self.logger.info(f"  → {categorie}")
-                    self.select_dropdown_option("dropdown_categorie", option_id)
-                else:
-                    self.logger.warning(f"  Catégorie inconnue ou non calibrée: {categorie}")
-
-            self.logger.info("[ÉTAPE 3] Numéro")
-            self.fill_field("field_numero", territory.get("numero", ""))
-
-            self.logger.info("[ÉTAPE 4] Suffixe")
-            self.fill_field("field_suffixe", territory.get("suffixe", ""))
-
-            self.logger.info("[ÉTAPE 5] Type")
-            type_value = territory.get("type", "").lower().strip()
-            if type_value:
-                type_options = {
-                    "presentiel": "dropdown_option_presentiel",
-                    "en présentiel": "dropdown_option_presentiel",
-                    "courrier": "dropdown_option_courrier",
-                    "telephone": "dropdown_option_telephone",
-                    "téléphone": "dropdown_option_telephone",
-                    "entreprise": "dropdown_option_entreprise",
-                }
-                # Types qui nécessitent confirmation (modal "Êtes-vous sûr")
-                types_need_confirm = ["courrier", "telephone", "téléphone", "entreprise"]
-
-                option_id = type_options.get(type_value)
-                if option_id:
-                    self.select_dropdown_option("dropdown_type", option_id)
-
-                    # Si type autre que "En présentiel", confirmer le modal
-                    if type_value in types_need_confirm and "btn_confirm_type" in self.coords:
-                        self.logger.info("  → Confirmation modal 'Oui'")
-                        time.sleep(0.3)
-                        self.click("btn_confirm_type")
-                else:
-                    self.logger.warning(f"  Type inconnu: {type_value}")
-            else:
-                self.logger.info("  (pas de type)")
-
-            self.logger.info("[ÉTAPE 6] Ville")
-            ville = territory.get("ville", "").upper().strip()
-            if ville and "dropdown_ville" in self.coords:
-                option_id = self.villes.get(ville)
-                if option_id and option_id in self.coords:
-                    self.logger.info(f"  → {ville}")
-                    self.select_dropdown_option("dropdown_ville", option_id)
-                else:
-                    self.logger.warning(f"  Ville inconnue ou non calibrée: {ville}")
-            else:
-                self.logger.info("  (pas de ville)")
-
-            self.logger.info("[ÉTAPE 7] Champs texte")
-            self.fill_field("field_lien_gps", territory.get("lien_gps", ""))
-            self.fill_field("field_notes", territory.get("notes", ""))
-            self.fill_field("field_ne_pas_visiter", territory.get("ne_pas_visiter", ""))
-            self.fill_field("field_notes_proclamateur", territory.get("notes_proclamateur", ""))
+            with self.tracer.span("territoire", "territory", territory=territory_id):
+                # Activer la fenêtre
+                self.activate_window()
 
-            self.logger.info("[ÉTAPE 8] Onglet Carte")
-            if "btn_carte" in self.coords:
-                self.click("btn_carte")
-                time.sleep(0.5)
+                if journal is not None:
+                    if journal.attempts:
+                        self._prepare_retry(plan, journal)
+                    journal.begin()
+                self.executor.execute(plan, journal)
 
-            # Importer le fichier (PDF/image)
-            self.logger.info("[ÉTAPE 9] Import fichier")
             if not no_save:
-                pdf_filename = territory.get("pdf_filename", "")
-                if not pdf_filename:
-                    # Construire le nom du fichier à partir du numéro
-                    pdf_filename = f"{territory_id}.pdf"
-
-                pdf_path = self.pdf_folder / pdf_filename
-                self.logger.info(f"  Recherche: {pdf_path}")
-                if pdf_path.exists():
-                    self.import_pdf(pdf_path)
-                else:
-                    self.logger.warning(f"  FICHIER NON TROUVÉ: {pdf_path}")
-
                 self.logger.info(f"[OK] Territoire {territory_id} traité avec succès")
             else:
                 self.logger.info(f"  (mode --no-save, import ignoré)")
                 self.logger.info(f"[OK] Territoire {territory_id} rempli (validation)")
 
-            time.sleep(self.delays.get("between_territories", 0.5))
+            self.backend.sleep(self.delays.get("between_territories", 0.5))
 
             return True
 
         except Exception as e:
-            self.logger.error(f"Erreur lors du traitement de {territory_id}: {e}")
+            step = f" (étape {journal.failed_step})" if journal is not None and journal.failed_step else ""
+            self.logger.error(f"Erreur lors du traitement de {territory_id}{step}: {e}")
+            if isinstance(e, AutomationError):
+                raise
+            return False
+
+    def _form_is_open(self) -> Optional[bool]:
+        """
+        Indique si un formulaire de territoire est ouvert.
+
+        Returns:
+            True/False, ou None si l'interface n'est pas observable
+        """
+        seen = [
+            self.waiter.probe.element_exists(element)
+            for element in FORM_MARKERS if element in self.registry
+        ]
+        if any(seen):
+            return True
+        if seen and all(state is False for state in seen):
+            return False
+        return None
+
+    def _prepare_retry(self, plan: TerritoryPlan, journal: StepJournal):
+        """
+        Prépare une nouvelle tentative d'après le journal des étapes.
+
+        - Rien n'a été créé: le plan est simplement rejoué. Si l'étape 1 a
+          échoué après l'ouverture du nouveau formulaire (champ numéro vide
+          lisible), elle est considérée comme faite.
+        - Formulaire toujours ouvert: reprise à l'étape en échec. Si le
+          formulaire n'est pas observable, il est supposé ouvert, sauf si une
+          reprise à cette même étape a déjà échoué.
+        - Formulaire fermé, numéro déjà saisi: le territoire partiellement
+          saisi est rouvert par recherche, puis reprise à l'étape en échec.
+        - Sinon: reprise depuis l'étape 1 (un territoire incomplet peut rester
+          dans NWS).
+        """
+        failed = journal.failed_step
+        if failed is None:
+            return
+        if not journal.created:
+            # Le formulaire ouvert peut être celui du territoire précédent:
+            # seul un numéro vide prouve que le nouveau formulaire est affiché
+            if failed != CREATE_STEP or self.waiter.probe.element_value("field_numero") != "":
+                return
+            journal.done(CREATE_STEP)
+            self.logger.info("  Nouveau formulaire déjà ouvert lors de l'échec")
+
+        form_open = self._form_is_open()
+        if form_open is None:
+            form_open = failed not in journal.resumed
+
+        if form_open:
+            journal.resumed.append(failed)
+            self.metrics["retries_resumed"] += 1
+            self.metrics["steps_skipped"] += len(journal.completed)
+            self.logger.info(f"  Reprise à l'étape {failed} (formulaire toujours ouvert)")
+            return
+
+        if (
+            journal.is_done(NUMERO_STEP)
+            and "field_search_territory" in self.registry
+            and "list_first_territory" in self.registry
+        ):
+            suffixe = ""
+            if journal.is_done(SUFFIXE_STEP):
+                suffixe = next(
+                    (a.value for a in plan.actions if a.target == "field_suffixe"), ""
+                )
+            self.logger.info(f"  Formulaire fermé: réouverture du territoire {plan.territory_id}")
+            self._navigate_to_territory_screen()
+            if self.open_territory(plan.territory_id, suffixe):
+                journal.reopened()
+                self.metrics["retries_reopened"] += 1
+                self.metrics["steps_skipped"] += len(journal.completed)
+                self.logger.info(f"  Reprise à l'étape {failed} (territoire rouvert)")
+                return
+
+        journal.restart()
+        self.metrics["retries_restarted"] += 1
+        self.logger.warning(
+            f"  Reprise depuis l'étape 1: un territoire {plan.territory_id} incomplet peut rester dans NWS"
+        )
+
+    @traced()
+    def open_territory(self, numero: str, suffixe: str = "") -> bool:
+        """
+        Ouvre un territoire existant par recherche dans la liste des territoires.
+
+        Args:
+            numero: Numéro du territoire
+            suffixe: Suffixe du territoire (optionnel)
+
+        Returns:
+            True si le formulaire du territoire est ouvert, False s'il est introuvable
+        """
+        for element in ("field_search_territory", "list_first_territory"):
+            if element not in self.registry:
+                raise AutomationError(f"Élément non calibré pour la mise à jour: {element}")
+
+        query = f"{numero} {suffixe}".strip()
+        self.logger.info(f"  Recherche du territoire \"{query}\"")
+        self.click("field_search_territory")
+        self.type_text(query)
+
+        if not self.waiter.element_exists("list_first_territory", self.delays.get("navigation", 0.5)):
+            return False
+        self.click("list_first_territory", double=True)
+        self.waiter.element_enabled("field_numero", self.delays.get("navigation", 0.5))
+
+        # Vérifier que le bon territoire est ouvert (si les champs sont lisibles)
+        probe = self.waiter.probe
+        for element, expected in (("field_numero", numero), ("field_suffixe", suffixe)):
+            shown = probe.element_value(element)
+            if shown is not None and shown.strip() != expected.strip():
+                self.logger.warning(f"  Territoire ouvert inattendu: [{element}] = \"{shown}\"")
+                return False
+        return True
+
+    def read_form(self) -> dict:
+        """
+        Lit les valeurs affichées dans le formulaire ouvert.
+
+        Returns:
+            Mapping élément -> valeur (None si la valeur n'est pas lisible)
+        """
+        probe = self.waiter.probe
+        return {
+            element: probe.element_value(element)
+            for element in UPDATE_FIELDS
+            if element in self.registry
+        }
+
+    def update_territory(self, territory: dict) -> Optional[int]:
+        """
+        Met à jour un territoire existant: seuls les champs différents sont saisis.
+
+        Args:
+            territory: Dictionnaire avec les données du territoire
+
+        Returns:
+            Nombre de champs modifiés (0 si inchangé), None si introuvable ou en
+            erreur inattendue
+
+        Raises:
+            AutomationError: Erreur du territoire (voir execute_plan)
+        """
+        territory_id = territory.get("numero", "INCONNU")
+        self.logger.info(f"")
+        self.logger.info(f"{'='*50}")
+        self.logger.info(f"MISE À JOUR: {territory_id}")
+        self.logger.info(f"{'='*50}")
+
+        self._begin_territory()
+        try:
+            with self.tracer.span("territoire", "territory", territory=territory_id, mode="update"):
+                self.activate_window()
+
+                if not self.open_territory(territory_id, territory.get("suffixe", "")):
+                    self.logger.warning(f"Territoire introuvable dans NWS: {territory_id}")
+                    return None
+
+                current = self.read_form()
+                if all(value is None for value in current.values()):
+                    self.logger.warning("  Valeurs NWS illisibles: tous les champs sont ressaisis")
+
+                plan = self.planner.plan_update(territory, current)
+                changed = sum(1 for a in plan.actions if a.op in ("select", "paste"))
+                if not changed:
+                    self.logger.info(f"[OK] Territoire {territory_id} inchangé")
+                    return 0
+
+                self.executor.execute(plan)
+
+            self.logger.info(f"[OK] Territoire {territory_id} mis à jour ({changed} champs)")
+            self.backend.sleep(self.delays.get("between_territories", 0.5))
+            return changed
+
+        except Exception as e:
+            self.logger.error(f"Erreur lors de la mise à jour de {territory_id}: {e}")
+            if isinstance(e, AutomationError):
+                raise
+            return None
+
+    def attach_file(self, territory: dict) -> bool:
+        """
+        Ajoute le fichier PDF d'un territoire déjà présent dans NWS.
+
+        Args:
+            territory: Dictionnaire avec les données du territoire
+
+        Returns:
+            True si le fichier est importé, False si introuvable ou en erreur inattendue
+
+        Raises:
+            AutomationError: Erreur du territoire (voir execute_plan)
+        """
+        territory_id = territory.get("numero", "INCONNU")
+        self.logger.info(f"")
+        self.logger.info(f"{'='*50}")
+        self.logger.info(f"FICHIER JOINT: {territory_id}")
+        self.logger.info(f"{'='*50}")
+
+        plan = self.planner.plan_attachment(territory)
+        if not any(a.op == "import" for a in plan.actions):
+            for warning in plan.warnings:
+                self.logger.warning(f"  {warning['message']}")
+            return False
+
+        self._begin_territory()
+        try:
+            with self.tracer.span("territoire", "territory", territory=territory_id, mode="attach"):
+                self.activate_window()
+
+                if not self.open_territory(territory_id, territory.get("suffixe", "")):
+                    self.logger.warning(f"Territoire introuvable dans NWS: {territory_id}")
+                    return False
+
+                self.executor.execute(plan)
+
+            self.logger.info(f"[OK] Fichier joint à {territory_id}")
+            self.backend.sleep(self.delays.get("between_territories", 0.5))
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Erreur lors de l'ajout du fichier de {territory_id}: {e}")
+            if isinstance(e, AutomationError):
+                raise
             return False
 
     def get_pdf_path(self, territory: dict) -> Path:
@@ -584,12 +1221,7 @@ class NWSAutomator:
         Returns:
             Path vers le fichier PDF
         """
-        pdf_filename = territory.get("pdf_filename", "")
-        if not pdf_filename:
-            territory_id = territory.get("numero", "UNKNOWN")
-            pdf_filename = f"{territory_id}.pdf"
-
-        return self.pdf_folder / pdf_filename
+        return self.planner.get_pdf_path(territory)
 
     def verify_pdf_exists(self, territory: dict) -> tuple[bool, Path]:
         """
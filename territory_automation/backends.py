@@ -0,0 +1,219 @@
+"""
+Backends d'entrée/sortie GUI de NWSAutomator.
+
+Le backend regroupe les actions bas niveau (clics, touches, presse-papiers,
+fenêtres, lancement du processus). DesktopBackend pilote le vrai bureau
+Windows avec pyautogui et pywinauto; le simulateur (simulator.py) implémente
+la même interface en pur Python pour les tests et les benchmarks.
+"""
+
+import ctypes
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import pyautogui
+    import pyperclip
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    # pyautogui échoue aussi à l'import sans affichage (Linux sans DISPLAY)
+    PYAUTOGUI_AVAILABLE = False
+
+try:
+    from pywinauto import Application
+    from pywinauto.findwindows import ElementNotFoundError
+    from pywinauto.timings import TimeoutError as PywinautoTimeout
+    PYWINAUTO_AVAILABLE = True
+except ImportError:
+    PYWINAUTO_AVAILABLE = False
+
+from .logger_setup import get_logger
+from .profiles import Layout, detect_layout
+
+
+class WindowConnection:
+    """Connexion à la fenêtre principale de NWS."""
+
+    def __init__(self, window, handle: Optional[int] = None, pid: Optional[int] = None, app=None, root=None):
+        """
+        Args:
+            window: Fenêtre principale (doit offrir set_focus())
+            handle: Handle de la fenêtre
+            pid: Identifiant du processus NWS
+            app: Application pywinauto (None hors bureau Windows)
+            root: Contrôle racine pour la recherche des éléments UIA
+        """
+        self.window = window
+        self.handle = handle
+        self.pid = pid
+        self.app = app
+        self.root = root
+
+
+class GUIBackend(ABC):
+    """
+    Interface des actions GUI bas niveau.
+
+    Les actions d'entrée, le presse-papiers et l'accès aux fenêtres sont
+    abstraits; les capacités optionnelles (pause, capture d'écran,
+    disposition) ont un comportement par défaut neutre.
+    """
+
+    def set_pause(self, seconds: float):
+        """Définit la pause automatique entre deux actions."""
+
+    @abstractmethod
+    def click(self, x: int, y: int):
+        """Clic gauche aux coordonnées écran."""
+
+    @abstractmethod
+    def double_click(self, x: int, y: int):
+        """Double clic gauche aux coordonnées écran."""
+
+    @abstractmethod
+    def press(self, key: str):
+        """Presse une touche (nom pyautogui: "enter", "tab"...)."""
+
+    @abstractmethod
+    def hotkey(self, *keys: str):
+        """Presse une combinaison de touches (ex: "ctrl", "v")."""
+
+    @abstractmethod
+    def copy(self, text: str):
+        """Place le texte dans le presse-papiers."""
+
+    @abstractmethod
+    def find_windows(self, title: str) -> list:
+        """Retourne les fenêtres dont le titre contient `title` (objets avec activate())."""
+
+    @abstractmethod
+    def start_process(self, exe_path: str):
+        """Lance l'exécutable NWS et retourne le processus (objet avec poll())."""
+
+    @abstractmethod
+    def connect(self, window_title: str, timeout: float = 2.0) -> Optional[WindowConnection]:
+        """
+        Se connecte à la fenêtre principale de NWS si elle existe.
+
+        Args:
+            window_title: Titre (partiel) de la fenêtre
+            timeout: Délai de recherche (0 = une seule tentative)
+
+        Returns:
+            WindowConnection, ou None si la fenêtre est introuvable
+        """
+
+    def is_responsive(self, handle: Optional[int]) -> bool:
+        """Indique si la fenêtre traite ses messages (ne « gèle » pas)."""
+        return True
+
+    def grab_region(self, box: tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        """
+        Capture une région de l'écran.
+
+        Args:
+            box: (gauche, haut, largeur, hauteur) en pixels
+
+        Returns:
+            Pixels RGB (hauteur x largeur x 3), ou None si la capture n'est pas disponible
+        """
+        return None
+
+    def window_layout(self, handle: Optional[int]) -> Optional[Layout]:
+        """
+        Disposition de l'écran et de la fenêtre NWS (choix du profil de calibration).
+
+        Returns:
+            Layout, ou None si la disposition n'est pas observable
+        """
+        return None
+
+    def sleep(self, seconds: float):
+        """Pause fixe (les attentes conditionnelles passent par Waiter)."""
+        time.sleep(seconds)
+
+
+class DesktopBackend(GUIBackend):
+    """Bureau Windows réel: pyautogui pour la saisie, pywinauto pour les fenêtres."""
+
+    def __init__(self):
+        if not PYAUTOGUI_AVAILABLE:
+            raise RuntimeError("pyautogui/pyperclip non disponibles (affichage requis)")
+        self.logger = get_logger()
+        self._warned_pyautogui_only = False
+        pyautogui.FAILSAFE = True  # Coin supérieur gauche = arrêt d'urgence
+        pyautogui.PAUSE = 0.1  # Pause entre chaque action (ajustée par NWSAutomator)
+
+    def set_pause(self, seconds: float):
+        pyautogui.PAUSE = seconds
+
+    def click(self, x: int, y: int):
+        pyautogui.click(x, y)
+
+    def double_click(self, x: int, y: int):
+        pyautogui.doubleClick(x, y)
+
+    def press(self, key: str):
+        pyautogui.press(key)
+
+    def hotkey(self, *keys: str):
+        pyautogui.hotkey(*keys)
+
+    def copy(self, text: str):
+        pyperclip.copy(text)
+
+    def find_windows(self, title: str) -> list:
+        return pyautogui.getWindowsWithTitle(title)
+
+    def start_process(self, exe_path: str):
+        if not Path(exe_path).exists():
+            raise FileNotFoundError(f"Exécutable non trouvé: {exe_path}")
+        return subprocess.Popen(exe_path)
+
+    def connect(self, window_title: str, timeout: float = 2.0) -> Optional[WindowConnection]:
+        if not PYWINAUTO_AVAILABLE:
+            if not self._warned_pyautogui_only:
+                self.logger.warning("pywinauto non disponible, utilisation de pyautogui seul")
+                self._warned_pyautogui_only = True
+            windows = self.find_windows(window_title)
+            if not windows:
+                return None
+            windows[0].activate()
+            time.sleep(0.5)
+            return WindowConnection(None, handle=getattr(windows[0], "_hWnd", None))
+
+        try:
+            app = Application(backend="uia").connect(
+                title_re=f".*{window_title}.*",
+                timeout=timeout
+            )
+            window = app.window(title_re=f".*{window_title}.*")
+            window.set_focus()
+            wrapper = window.wrapper_object()
+            return WindowConnection(window, handle=wrapper.handle, pid=app.process, app=app, root=wrapper)
+        except (ElementNotFoundError, PywinautoTimeout):
+            return None
+
+    def is_responsive(self, handle: Optional[int]) -> bool:
+        if not handle or not hasattr(ctypes, "windll"):
+            return True
+        try:
+            return not ctypes.windll.user32.IsHungAppWindow(handle)
+        except Exception:
+            return True
+
+    def grab_region(self, box: tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        left, top, width, height = box
+        try:
+            image = pyautogui.screenshot(region=(max(0, left), max(0, top), width, height))
+            return np.asarray(image)
+        except Exception:
+            return None
+
+    def window_layout(self, handle: Optional[int]) -> Optional[Layout]:
+        return detect_layout(handle)
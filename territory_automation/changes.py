@@ -0,0 +1,226 @@
+"""
+Détection des territoires nouveaux ou modifiés entre deux passages.
+
+La progression est indexée par l'identité du territoire (numéro + suffixe)
+et conserve une empreinte du contenu de la ligne (colonnes de EXCEL_COLUMNS).
+À la relance, les empreintes de toute la feuille sont calculées en une
+passe vectorisée et comparées à la progression: seules les lignes nouvelles,
+modifiées ou en échec sont traitées, et chaque décision est expliquée.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+# Décisions pour une ligne
+NEW = "new"                # Jamais traitée
+RETRY = "retry"            # En échec au dernier passage
+CHANGED = "changed"        # Traitée, mais modifiée depuis
+UNCHANGED = "unchanged"    # Traitée, identique
+UNTRACKED = "untracked"    # Traitée avant le suivi par empreinte (changements non détectables)
+LEGACY = "legacy"          # Variante avec suffixe d'un numéro enregistré seul (ancienne progression)
+DUPLICATE = "duplicate"    # Même numéro et suffixe qu'une ligne précédente du fichier
+
+# Décisions qui donnent lieu à un traitement
+SCHEDULED = (NEW, RETRY, CHANGED)
+
+# Explication de chaque décision (journal et résumé)
+REASONS = {
+    NEW: "nouveau",
+    RETRY: "en échec au dernier passage, refait",
+    CHANGED: "modifié depuis le dernier passage, refait",
+    UNCHANGED: "déjà traité, inchangé, ignoré",
+    UNTRACKED: "déjà traité (suivi sans empreinte), ignoré",
+    LEGACY: "numéro déjà traité sans suffixe (ancienne progression), ignoré: à vérifier dans NWS",
+    DUPLICATE: "numéro et suffixe en double dans le fichier, ignoré",
+}
+
+# Séparateur entre numéro et suffixe dans l'identité d'un territoire
+KEY_SEPARATOR = "/"
+
+# Numéro lu comme nombre décimal par les anciennes versions ("12.0" pour "12")
+DECIMAL_NUMERO = re.compile(r"^(-?\d+)\.0+(?=/|$)")
+
+
+def territory_key(numero: str, suffixe: str = "") -> str:
+    """
+    Identité d'un territoire dans la progression.
+
+    Sans suffixe, l'identité est le numéro seul (compatible avec la
+    progression enregistrée avant le suivi par suffixe).
+    """
+    return f"{numero}{KEY_SEPARATOR}{suffixe}" if suffixe else numero
+
+
+def territory_keys(numeros: pd.Series, suffixes: pd.Series) -> pd.Series:
+    """Identités de toutes les lignes (version vectorisée de territory_key)."""
+    return numeros.where(suffixes == "", numeros + KEY_SEPARATOR + suffixes)
+
+
+def content_hashes(frame: pd.DataFrame) -> pd.Series:
+    """
+    Empreinte du contenu de chaque ligne (16 caractères hexadécimaux).
+
+    Calculée par pandas pour toutes les lignes à la fois. L'ordre des
+    colonnes compte: le même mapping doit être utilisé d'un passage à
+    l'autre (sinon toutes les lignes apparaissent modifiées).
+    """
+    values = pd.util.hash_pandas_object(frame, index=False, categorize=False)
+    return values.map("{:016x}".format)
+
+
+@dataclass
+class RerunPlan:
+    """
+    Décision pour chaque ligne (dans l'ordre du fichier).
+
+    Attributes:
+        keys: Identité de chaque ligne (numéro + suffixe)
+        hashes: Empreinte du contenu ("" si inconnue)
+        decisions: Décision de chaque ligne (NEW, RETRY, CHANGED, ...)
+    """
+    keys: list[str]
+    hashes: list[str]
+    decisions: list[str]
+    counts: dict[str, int] = field(init=False)
+
+    def __post_init__(self):
+        self.counts = {decision: 0 for decision in REASONS}
+        for decision in self.decisions:
+            self.counts[decision] += 1
+
+    def __len__(self) -> int:
+        return len(self.decisions)
+
+    def is_scheduled(self, index: int) -> bool:
+        return self.decisions[index] in SCHEDULED
+
+    def reason(self, index: int) -> str:
+        return REASONS[self.decisions[index]]
+
+    def with_decision(self, decision: str) -> list[str]:
+        """Identités des lignes ayant reçu une décision."""
+        return [k for k, d in zip(self.keys, self.decisions) if d == decision]
+
+    def log_summary(self, logger, limit: int = 10):
+        """Écrit le résumé des décisions (et les premières lignes de chaque cas)."""
+        examples = {decision: self.with_decision(decision) for decision in REASONS}
+        log_rerun_summary(logger, self.counts, examples, limit)
+
+
+class RerunTotals:
+    """
+    Décisions cumulées bloc après bloc (lecture par blocs, voir DataLoader.stream).
+
+    Conserve les identités déjà lues (doublons d'un bloc à l'autre), les
+    totaux et les premières lignes de chaque cas pour le résumé final.
+    """
+
+    def __init__(self, limit: int = 10):
+        self.limit = limit
+        self.seen: set[str] = set()
+        self.counts = {decision: 0 for decision in REASONS}
+        self.examples: dict[str, list[str]] = {decision: [] for decision in REASONS}
+
+    def add(self, rerun: RerunPlan):
+        """Ajoute les décisions d'un bloc."""
+        for decision, count in rerun.counts.items():
+            self.counts[decision] += count
+            missing = self.limit - len(self.examples[decision])
+            if count and missing > 0:
+                self.examples[decision] += rerun.with_decision(decision)[:missing]
+
+    def log_summary(self, logger):
+        log_rerun_summary(logger, self.counts, self.examples, self.limit)
+
+
+def log_rerun_summary(logger, counts: dict, examples: dict, limit: int = 10):
+    """
+    Écrit le résumé des décisions.
+
+    Args:
+        logger: Logger
+        counts: Nombre de lignes par décision
+        examples: Identités des lignes de chaque décision (les premières suffisent)
+        limit: Nombre d'identités affichées par cas
+    """
+    c = counts
+    logger.info(
+        f"Relance: {c[NEW]} nouveaux, {c[CHANGED]} modifiés, {c[RETRY]} en échec "
+        f"-> {c[NEW] + c[CHANGED] + c[RETRY]} à traiter"
+    )
+    skipped = c[UNCHANGED] + c[UNTRACKED] + c[LEGACY] + c[DUPLICATE]
+    if skipped:
+        logger.info(
+            f"Ignorés: {c[UNCHANGED]} inchangés, {c[UNTRACKED]} suivis sans empreinte, "
+            f"{c[LEGACY]} variantes d'un numéro suivi sans suffixe, {c[DUPLICATE]} en double"
+        )
+    for decision in (CHANGED, RETRY, LEGACY, DUPLICATE):
+        keys = examples.get(decision, [])[:limit]
+        if not keys:
+            continue
+        shown = ", ".join(keys)
+        more = f" ... et {c[decision] - len(keys)} autres" if c[decision] > len(keys) else ""
+        logger.info(f"  {REASONS[decision].capitalize()}: {shown}{more}")
+
+
+def plan_rerun(
+    keys: Sequence[str],
+    hashes: Sequence[str],
+    tracker,
+    seen: Optional[set] = None
+) -> RerunPlan:
+    """
+    Compare les lignes à la progression et décide lesquelles traiter.
+
+    Args:
+        keys: Identité de chaque ligne (territory_key)
+        hashes: Empreinte du contenu de chaque ligne ("" si inconnue)
+        tracker: Tracker de progression (processed, failed, hashes)
+        seen: Identités des lignes lues dans les blocs précédents (doublons);
+            complété avec celles de ces lignes
+
+    Returns:
+        Décision pour chaque ligne
+    """
+    keys = pd.Series(list(keys), dtype=object)
+    hashes = pd.Series(list(hashes), dtype=object)
+
+    done = tracker.processed
+    known = tracker.hashes
+    processed = keys.isin(done)
+    recorded = keys.map(known).fillna("")
+    failed = keys.isin(tracker.failed)
+
+    # Un numéro enregistré en décimal ("12.0") désigne le même numéro lu en texte
+    decimal = [DECIMAL_NUMERO.sub(r"\1", k) for k in done if DECIMAL_NUMERO.match(k)]
+    renamed = keys.isin(decimal)
+
+    # Progression antérieure au suivi par suffixe: le numéro seul (sans empreinte)
+    # désigne la ligne sans suffixe. Ses variantes avec suffixe ont pu être traitées
+    # sous ce même numéro: elles sont ignorées et signalées à part
+    numeros = keys.str.split(KEY_SEPARATOR, n=1).str[0]
+    legacy_numeros = [k for k in done if k not in known and KEY_SEPARATOR not in k]
+    legacy_numeros += [k for k in decimal if KEY_SEPARATOR not in k]
+    legacy = (keys != numeros) & numeros.isin(legacy_numeros)
+
+    decisions = np.select(
+        [
+            keys.duplicated() | (keys.isin(seen) if seen else False),
+            processed & ((recorded == "") | (hashes == "")),
+            processed & (recorded == hashes),
+            processed,
+            renamed,
+            failed,
+            legacy,
+        ],
+        [DUPLICATE, UNTRACKED, UNCHANGED, CHANGED, UNTRACKED, RETRY, LEGACY],
+        default=NEW,
+    )
+    if seen is not None:
+        seen.update(keys)
+    return RerunPlan(keys.tolist(), hashes.tolist(), decisions.tolist())
@@ -0,0 +1,72 @@
+"""
+Journal des étapes d'un territoire (reprise après échec).
+
+Chaque étape du plan terminée est notée dans le journal du territoire. Si
+une tentative échoue, la suivante ne recommence pas au « Nouveau
+territoire » (ce qui créerait un doublon et ressaisirait tous les champs):
+elle reprend à l'étape en échec sur le formulaire encore ouvert, ou rouvre
+d'abord le territoire partiellement saisi s'il a été fermé. Le coût d'une
+nouvelle tentative est ainsi proportionnel à ce qui a échoué.
+"""
+
+from typing import Optional
+
+
+# Étape qui crée le territoire dans NWS (voir STEP_LABELS)
+CREATE_STEP = 1
+
+# Étapes qui rendent le territoire retrouvable par recherche (numéro, suffixe)
+NUMERO_STEP = 3
+SUFFIXE_STEP = 4
+
+# Étapes qui ne modifient que l'affichage: rejouées après réouverture du territoire
+VIEW_STEPS = {8}
+
+
+class StepJournal:
+    """Étapes terminées d'un territoire, conservées d'une tentative à l'autre."""
+
+    def __init__(self, territory_id: str):
+        """
+        Args:
+            territory_id: Identifiant du territoire (numéro)
+        """
+        self.territory_id = territory_id
+        self.completed: set[int] = set()
+        self.failed_step: Optional[int] = None
+        self.error = ""
+        self.attempts = 0
+        # Étapes auxquelles une tentative a repris sans vérifier le formulaire
+        self.resumed: list[int] = []
+
+    @property
+    def created(self) -> bool:
+        """True si le territoire a été créé dans NWS lors d'une tentative précédente."""
+        return CREATE_STEP in self.completed
+
+    def begin(self):
+        """Commence une tentative."""
+        self.attempts += 1
+        self.failed_step = None
+        self.error = ""
+
+    def is_done(self, step: int) -> bool:
+        return step in self.completed
+
+    def done(self, step: int):
+        """Note une étape terminée."""
+        self.completed.add(step)
+
+    def fail(self, step: int, error: Exception):
+        """Note l'étape en échec."""
+        self.failed_step = step
+        self.error = str(error)
+
+    def reopened(self):
+        """Territoire rouvert: les étapes d'affichage sont à refaire."""
+        self.completed -= VIEW_STEPS
+
+    def restart(self):
+        """Oublie les étapes terminées (le territoire recommence à l'étape 1)."""
+        self.completed.clear()
+        self.resumed.clear()
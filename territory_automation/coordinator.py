@@ -0,0 +1,439 @@
+"""
+Exécution répartie sur plusieurs instances NWS.
+
+Le coordinateur découpe la liste des plans en petits lots (shards) et les
+distribue à des processus workers locaux, chacun pilotant sa propre instance
+de NWS. Les workers partagent la session de bureau du coordinateur (souris et
+clavier): en pratique, chacun pilote un simulateur. Les workers rapides
+reçoivent naturellement plus de lots; le travail d'un worker en échec ou
+bloqué est redistribué aux autres. La progression est fusionnée dans un seul
+tracker.
+
+Avant chaque territoire, le worker le réserve auprès du coordinateur: un
+territoire déjà traité (par exemple par un worker retiré dont le résultat
+est arrivé en retard) ou encore en cours dans un worker retiré n'est pas
+saisi une seconde fois.
+"""
+
+import multiprocessing
+import queue
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .logger_setup import get_logger
+from .checkpoints import StepJournal
+from .planner import TerritoryPlan
+
+
+class AutomatorFactory:
+    """
+    Fabrique d'automatiseurs, transmise aux processus workers.
+
+    Doit rester sérialisable (pickle): elle ne contient que des paramètres.
+    """
+
+    def __init__(self, automator_kwargs: dict, simulator_options: Optional[dict] = None):
+        """
+        Initialise la fabrique.
+
+        Args:
+            automator_kwargs: Paramètres communs de NWSAutomator
+            simulator_options: Si fourni, chaque worker pilote son propre
+                simulateur NWS (paramètres de NWSSimulator)
+        """
+        self.automator_kwargs = automator_kwargs
+        self.simulator_options = simulator_options
+
+    def __call__(self, session: dict):
+        """
+        Crée l'automatiseur d'une session.
+
+        Args:
+            session: Paramètres propres à la session (exe_path, window_title...)
+        """
+        from .automation import NWSAutomator
+
+        kwargs = dict(self.automator_kwargs)
+        if self.simulator_options is not None:
+            from .simulator import NWSSimulator
+            kwargs.update(NWSSimulator(**self.simulator_options).automator_kwargs())
+        kwargs.update({k: v for k, v in session.items() if k != "name"})
+        return NWSAutomator(**kwargs)
+
+
+def _worker_main(
+    session: dict,
+    factory: Callable[[dict], object],
+    inbox,
+    outbox,
+    no_save: bool,
+    max_retries: int
+):
+    """
+    Boucle d'un processus worker: lance sa session NWS puis traite les lots reçus.
+
+    Messages envoyés au coordinateur:
+        ("ready", name), ("claim", name, territory_id),
+        ("result", name, territory_id, ok, error), ("shard_done", name),
+        ("fatal", name, message)
+
+    `error` est le message de la dernière tentative en échec (None sinon).
+
+    Chaque territoire est réservé ("claim") avant d'être saisi: la réponse
+    (sur `inbox`) est True pour le saisir, False pour le passer, None pour
+    s'arrêter.
+    """
+    name = session.get("name", "worker")
+    logger = get_logger()
+    try:
+        automator = factory(session)
+        if not automator.launch_application():
+            outbox.put(("fatal", name, "Impossible de lancer New World Scheduler"))
+            return
+        outbox.put(("ready", name))
+
+        while True:
+            shard = inbox.get()
+            if shard is None:
+                return
+
+            for plan in shard:
+                outbox.put(("claim", name, plan.progress_id))
+                reply = inbox.get()
+                if reply is None:
+                    return
+                if not reply:
+                    continue
+
+                ok = False
+                error = None
+                journal = StepJournal(plan.territory_id)
+                for attempt in range(max_retries):
+                    try:
+                        if automator.execute_plan(plan, no_save=no_save, journal=journal):
+                            ok = True
+                            break
+                    except Exception as e:
+                        error = str(e) or type(e).__name__
+                        logger.warning(
+                            f"[{name}] {plan.progress_id} - Tentative {attempt+1}/{max_retries} échouée: {e}"
+                        )
+                outbox.put(("result", name, plan.progress_id, ok, None if ok else error))
+
+            outbox.put(("shard_done", name))
+
+    except Exception as e:
+        outbox.put(("fatal", name, str(e)))
+
+
+class ShardCoordinator:
+    """Répartit les plans entre plusieurs workers et fusionne la progression."""
+
+    def __init__(
+        self,
+        sessions: list[dict],
+        factory: Callable[[dict], object],
+        tracker,
+        shard_size: int = 5,
+        stall_timeout: float = 300.0,
+        no_save: bool = False,
+        max_retries: int = 3
+    ):
+        """
+        Initialise le coordinateur.
+
+        Args:
+            sessions: Une configuration par worker ({"name": ..., "window_title": ...})
+            factory: Fabrique d'automatiseurs (sérialisable)
+            tracker: Tracker de progression (alimenté par le coordinateur seul)
+            shard_size: Nombre de territoires par lot
+            stall_timeout: Délai sans nouvelle d'un worker avant de lui retirer son lot
+            no_save: Mode validation (remplit sans sauvegarder)
+            max_retries: Tentatives par territoire dans un worker
+        """
+        self.sessions = sessions
+        self.factory = factory
+        self.tracker = tracker
+        self.shard_size = max(1, shard_size)
+        self.stall_timeout = stall_timeout
+        self.no_save = no_save
+        self.max_retries = max_retries
+        self.logger = get_logger()
+        # Empreinte de chaque territoire en cours (enregistrée avec le résultat)
+        self._hashes: dict[str, str] = {}
+        # Plans à traiter, territoires traités et réservations (territoire -> worker)
+        self._plans: dict[str, TerritoryPlan] = {}
+        self._done: set[str] = set()
+        self._claims: dict[str, str] = {}
+        # Territoires refusés car encore en cours dans un worker retiré
+        self._deferred: set[str] = set()
+        # Workers retirés: leurs résultats sont encore acceptés
+        self._retired: dict[str, dict] = {}
+
+    def run(self, plans: list[TerritoryPlan]) -> dict:
+        """
+        Traite tous les plans sur les workers disponibles.
+
+        Args:
+            plans: Plans à exécuter (les territoires déjà traités sont ignorés)
+
+        Returns:
+            Statistiques: processed, failed, unassigned, per_worker
+        """
+        todo = [p for p in plans if not self.tracker.is_processed(p.progress_id)]
+        self._hashes = {p.progress_id: p.content_hash for p in todo}
+        self._plans = {p.progress_id: p for p in todo}
+        self._done = set()
+        self._claims = {}
+        self._deferred = set()
+        self._retired = {}
+        pending = deque(
+            todo[i:i + self.shard_size] for i in range(0, len(todo), self.shard_size)
+        )
+        stats = {
+            "processed": 0,
+            "failed": 0,
+            "unassigned": 0,
+            "per_worker": {s.get("name", f"worker{i}"): 0 for i, s in enumerate(self.sessions)},
+        }
+        if not pending:
+            return stats
+
+        ctx = multiprocessing.get_context("spawn")
+        outbox = ctx.Queue()
+        workers = {}
+        for i, session in enumerate(self.sessions):
+            session = {"name": f"worker{i}", **session}
+            name = session["name"]
+            inbox = ctx.Queue()
+            process = ctx.Process(
+                target=_worker_main,
+                args=(session, self.factory, inbox, outbox, self.no_save, self.max_retries),
+                daemon=True,
+            )
+            process.start()
+            workers[name] = {
+                "process": process,
+                "inbox": inbox,
+                "ready": False,
+                "shard": None,       # Plans restants du lot en cours
+                "last_seen": time.monotonic(),
+            }
+
+        self.logger.info(
+            f"Coordinateur: {len(todo)} territoires en {len(pending)} lots "
+            f"sur {len(workers)} workers"
+        )
+
+        try:
+            while pending or self._deferred or any(w["shard"] for w in workers.values()):
+                if not workers:
+                    break
+
+                # Distribuer un lot à chaque worker prêt et inactif
+                for worker in workers.values():
+                    if worker["ready"] and worker["shard"] is None and pending:
+                        shard = pending.popleft()
+                        worker["shard"] = list(shard)
+                        worker["last_seen"] = time.monotonic()
+                        worker["inbox"].put(shard)
+
+                try:
+                    message = outbox.get(timeout=0.2)
+                except queue.Empty:
+                    message = None
+
+                if message:
+                    self._handle_message(message, workers, pending, stats)
+
+                self._check_workers(workers, pending)
+                self._check_retired(pending)
+
+        finally:
+            everyone = list(workers.values()) + list(self._retired.values())
+            for worker in everyone:
+                try:
+                    worker["inbox"].put(None)
+                except Exception:
+                    pass
+            for worker in everyone:
+                worker["process"].join(timeout=5)
+                if worker["process"].is_alive():
+                    worker["process"].terminate()
+
+        stats["unassigned"] = sum(len(shard) for shard in pending) + len(self._deferred)
+        if stats["unassigned"]:
+            self.logger.error(
+                f"Plus aucun worker disponible: {stats['unassigned']} territoires non traités"
+            )
+        return stats
+
+    def _handle_message(self, message: tuple, workers: dict, pending: deque, stats: dict):
+        """Traite un message reçu d'un worker (actif ou retiré)."""
+        kind, name = message[0], message[1]
+        worker = workers.get(name)
+        if worker is None:
+            retired = self._retired.get(name)
+            if retired is None:
+                return
+            if kind == "claim":
+                # Un worker retiré ne commence plus de territoire
+                retired["inbox"].put(None)
+            elif kind == "result":
+                self._handle_retired_result(name, message[2], message[3], message[4], workers, pending, stats)
+            return
+        worker["last_seen"] = time.monotonic()
+
+        if kind == "ready":
+            worker["ready"] = True
+            self.logger.info(f"[{name}] Session NWS prête")
+
+        elif kind == "claim":
+            territory_id = message[2]
+            holder = self._claims.get(territory_id)
+            if territory_id in self._done:
+                self.logger.info(f"[{name}] {territory_id} déjà traité, ignoré")
+                granted = False
+            elif holder is not None and holder != name and holder in self._retired:
+                # Encore en cours dans un worker retiré: repris s'il s'arrête sans résultat
+                self.logger.info(f"[{name}] {territory_id} encore en cours dans {holder}, mis en attente")
+                self._deferred.add(territory_id)
+                granted = False
+            else:
+                self._claims[territory_id] = name
+                granted = True
+            if not granted and worker["shard"]:
+                worker["shard"] = [p for p in worker["shard"] if p.progress_id != territory_id]
+            worker["inbox"].put(granted)
+
+        elif kind == "result":
+            territory_id, ok, error = message[2], message[3], message[4]
+            self._claims.pop(territory_id, None)
+            if worker["shard"]:
+                worker["shard"] = [p for p in worker["shard"] if p.progress_id != territory_id]
+            if ok:
+                self._record_success(name, territory_id, stats)
+            else:
+                reason = error or "Échec après plusieurs tentatives"
+                self.tracker.mark_failed(territory_id, f"{reason} ({name})")
+                stats["failed"] += 1
+                self.logger.warning(f"[{name}] {territory_id} en échec: {reason}")
+
+        elif kind == "shard_done":
+            worker["shard"] = None
+
+        elif kind == "fatal":
+            self.logger.error(f"[{name}] Worker arrêté: {message[2]}")
+            self._retire(name, workers, pending)
+
+    def _record_success(self, name: str, territory_id: str, stats: dict):
+        """Enregistre un territoire traité (une seule fois)."""
+        if territory_id in self._done:
+            return
+        self._done.add(territory_id)
+        if not self.no_save:
+            self.tracker.mark_processed(territory_id, self._hashes.get(territory_id, ""))
+        stats["processed"] += 1
+        stats["per_worker"][name] = stats["per_worker"].get(name, 0) + 1
+        self.logger.info(f"[{name}] {territory_id} traité")
+
+    def _handle_retired_result(
+        self,
+        name: str,
+        territory_id: str,
+        ok: bool,
+        error: Optional[str],
+        workers: dict,
+        pending: deque,
+        stats: dict
+    ):
+        """
+        Résultat arrivé après le retrait du worker.
+
+        Un territoire traité est retiré des lots redistribués (il existe déjà
+        dans NWS); un échec laisse le territoire à un autre worker.
+        """
+        if self._claims.get(territory_id) == name:
+            del self._claims[territory_id]
+        if ok:
+            self._record_success(name, territory_id, stats)
+            self._deferred.discard(territory_id)
+            for shard in pending:
+                shard[:] = [p for p in shard if p.progress_id != territory_id]
+            while pending and not pending[0]:
+                pending.popleft()
+            for worker in workers.values():
+                if worker["shard"]:
+                    worker["shard"] = [p for p in worker["shard"] if p.progress_id != territory_id]
+        else:
+            self.logger.warning(
+                f"[{name}] {territory_id} en échec (worker retiré): {error or 'cause inconnue'}, "
+                f"repris par un autre worker"
+            )
+            self._requeue_deferred([territory_id], pending)
+
+    def _check_workers(self, workers: dict, pending: deque):
+        """Retire les workers morts ou bloqués et redistribue leur lot."""
+        now = time.monotonic()
+        for name in list(workers):
+            worker = workers[name]
+            busy = worker["shard"] is not None or not worker["ready"]
+            if not worker["process"].is_alive():
+                self.logger.error(f"[{name}] Processus terminé de façon inattendue")
+                self._retire(name, workers, pending)
+            elif busy and now - worker["last_seen"] > self.stall_timeout:
+                self.logger.warning(
+                    f"[{name}] Aucune nouvelle depuis {self.stall_timeout:.0f}s, lot redistribué"
+                )
+                self._retire(name, workers, pending)
+
+    def _check_retired(self, pending: deque):
+        """
+        Arrête les workers retirés toujours bloqués après un nouveau délai, et
+        libère les territoires qu'ils avaient réservés.
+        """
+        now = time.monotonic()
+        for name, worker in self._retired.items():
+            if worker.get("released"):
+                continue
+            alive = worker["process"].is_alive()
+            if alive and now - worker["retired_at"] <= self.stall_timeout:
+                continue
+            if alive:
+                worker["process"].terminate()
+            worker["released"] = True
+            held = [tid for tid, holder in self._claims.items() if holder == name]
+            for territory_id in held:
+                del self._claims[territory_id]
+            if held:
+                self.logger.warning(
+                    f"[{name}] Arrêté sans résultat pour {', '.join(held)} "
+                    f"(peut-être créé partiellement dans NWS)"
+                )
+            self._requeue_deferred(held, pending)
+
+    def _requeue_deferred(self, territory_ids: list[str], pending: deque):
+        """Remet en tête de file les territoires mis en attente (et non traités)."""
+        plans = [
+            self._plans[tid] for tid in territory_ids
+            if tid in self._deferred and tid not in self._done
+        ]
+        self._deferred.difference_update(territory_ids)
+        if plans:
+            pending.appendleft(plans)
+
+    def _retire(self, name: str, workers: dict, pending: deque):
+        """
+        Retire un worker et remet son lot inachevé en tête de file.
+
+        Le processus n'est pas arrêté tout de suite: le territoire en cours
+        reste réservé, et son résultat est accepté s'il arrive dans le délai
+        `stall_timeout` (voir _check_retired).
+        """
+        worker = workers.pop(name)
+        worker["retired_at"] = time.monotonic()
+        self._retired[name] = worker
+        if worker["shard"]:
+            self.logger.info(f"[{name}] {len(worker['shard'])} territoires redistribués")
+            pending.appendleft(worker["shard"])
@@ -2,34 +2,63 @@
 Module de chargement des données depuis Excel/CSV.
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 import json
+import os
 
+from .changes import content_hashes, territory_keys
+from .dataset_cache import DatasetCache
 from .logger_setup import get_logger
 
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
+
+# Textes lus comme cellules vides (valeurs manquantes par défaut de pandas)
+NA_STRINGS = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+
+
 
 class DataLoader:
     """Charge et valide les données des territoires depuis Excel ou CSV."""
 
-    def __init__(self, file_path: Path, column_mapping: dict):
+    def __init__(self, file_path: Path, column_mapping: dict, cache: Optional[DatasetCache] = None):
         """
         Initialise le loader.
 
         Args:
             file_path: Chemin vers le fichier Excel ou CSV
             column_mapping: Mapping des colonnes (clé interne -> nom colonne Excel)
+            cache: Cache des données chargées (None = le fichier est toujours relu)
         """
         self.file_path = Path(file_path)
         self.column_mapping = column_mapping
+        self.cache = cache
         self.logger = get_logger()
         self.data: Optional[pd.DataFrame] = None
+        # Toutes les colonnes de l'en-tête (seules celles du mapping sont lues)
+        self.header: list[str] = []
+        # Colonnes du mapping (clés internes, valeurs texte) et territoires, construits une fois
+        self._mapped: Optional[pd.DataFrame] = None
+        self._territories: Optional[list[dict]] = None
 
     def load(self) -> pd.DataFrame:
         """
         Charge les données depuis le fichier.
 
+        Seules les colonnes du mapping sont lues, en texte: un numéro de
+        territoire n'est jamais converti en nombre décimal. Avec un cache,
+        les données d'un fichier inchangé sont relues du cache.
+
         Returns:
             DataFrame avec les données des territoires
 
@@ -41,22 +70,150 @@ class DataLoader:
             raise FileNotFoundError(f"Fichier non trouvé: {self.file_path}")
 
         suffix = self.file_path.suffix.lower()
+        self._mapped = None
+        self._territories = None
+
+        if self.cache is not None:
+            cached = self.cache.get(self.file_path, self.column_mapping)
+            if cached is not None:
+                self.data, self.header = cached
+                self.logger.info(f"Données chargées depuis le cache: {len(self.data)} territoires")
+                return self.data
+
+        self.header = []
+        wanted = set(self.column_mapping.values())
+
+        def mapped_column(name) -> bool:
+            if name not in self.header:
+                self.header.append(name)
+            return name in wanted
 
         if suffix in [".xlsx", ".xls"]:
             self.logger.info(f"Chargement du fichier Excel: {self.file_path}")
-            self.data = pd.read_excel(self.file_path)
+            self.data = pd.read_excel(self.file_path, usecols=mapped_column, dtype=str)
         elif suffix == ".csv":
             self.logger.info(f"Chargement du fichier CSV: {self.file_path}")
-            self.data = pd.read_csv(self.file_path, encoding="utf-8-sig")
+            self.data = pd.read_csv(self.file_path, encoding="utf-8-sig", usecols=mapped_column, dtype=str)
         else:
             raise ValueError(f"Format non supporté: {suffix}. Utilisez .xlsx, .xls ou .csv")
 
         self._validate_columns()
         self._clean_data()
+        if self.cache is not None:
+            self.cache.put(self.file_path, self.column_mapping, self.data, self.header)
 
         self.logger.info(f"Données chargées: {len(self.data)} territoires")
         return self.data
 
+    def stream(self, chunk_size: int = 500) -> Iterator["DataLoader"]:
+        """
+        Lit le fichier par blocs de lignes, sans charger toute la feuille.
+
+        Les CSV sont lus par blocs (pandas), les .xlsx ligne à ligne en
+        lecture seule (openpyxl); les .xls sont chargés en entier puis
+        découpés. Chaque bloc est validé et nettoyé comme avec load().
+
+        La conversion des colonnes de nombres est décidée bloc par bloc: une
+        colonne reconnue comme texte dans un bloc le reste pour les suivants,
+        mais les blocs déjà lus ne sont pas relus.
+
+        Args:
+            chunk_size: Nombre de lignes par bloc
+
+        Yields:
+            DataLoader chargé avec les lignes du bloc (get_all_territories(),
+            fingerprints(), ...)
+
+        Raises:
+            FileNotFoundError: Si le fichier n'existe pas
+            ValueError: Si le format n'est pas supporté, ou si une colonne
+                requise manque (au premier bloc)
+        """
+        if not self.file_path.exists():
+            raise FileNotFoundError(f"Fichier non trouvé: {self.file_path}")
+
+        suffix = self.file_path.suffix.lower()
+        self.header = []
+        wanted = set(self.column_mapping.values())
+
+        def mapped_column(name) -> bool:
+            if name not in self.header:
+                self.header.append(name)
+            return name in wanted
+
+        if suffix == ".xlsx" and OPENPYXL_AVAILABLE:
+            self.logger.info(f"Lecture du fichier Excel par blocs de {chunk_size} lignes: {self.file_path}")
+            frames = self._read_xlsx_rows(wanted, chunk_size)
+        elif suffix in [".xlsx", ".xls"]:
+            self.logger.info(f"Chargement du fichier Excel (lecture complète, puis par blocs): {self.file_path}")
+            data = pd.read_excel(self.file_path, usecols=mapped_column, dtype=str)
+            frames = (data.iloc[start:start + chunk_size] for start in range(0, len(data), chunk_size))
+        elif suffix == ".csv":
+            self.logger.info(f"Lecture du fichier CSV par blocs de {chunk_size} lignes: {self.file_path}")
+            frames = pd.read_csv(
+                self.file_path, encoding="utf-8-sig", usecols=mapped_column, dtype=str,
+                chunksize=chunk_size
+            )
+        else:
+            raise ValueError(f"Format non supporté: {suffix}. Utilisez .xlsx, .xls ou .csv")
+
+        text_columns: set[str] = set()
+        rows = 0
+        for frame in frames:
+            chunk = DataLoader(self.file_path, self.column_mapping)
+            chunk.header = self.header
+            chunk.data = frame.reset_index(drop=True)
+            chunk._validate_columns()
+            chunk._clean_data(text_columns)
+            rows += len(chunk)
+            yield chunk
+
+        self.logger.info(f"Données lues: {rows} territoires")
+
+    def _read_xlsx_rows(self, wanted: set, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Lit la première feuille d'un .xlsx ligne à ligne (openpyxl, lecture seule).
+
+        Les cellules sont converties en texte comme par pd.read_excel(dtype=str):
+        nombres entiers sans décimales, textes de NA_STRINGS vides. Les lignes
+        vides en fin de feuille sont ignorées.
+        """
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            columns = []
+            for position, name in enumerate(next(rows, ())):
+                name = "" if name is None else str(name)
+                if name not in self.header:
+                    self.header.append(name)
+                    if name in wanted:
+                        columns.append((position, name))
+            names = [name for _, name in columns]
+
+            batch, blank = [], []
+            yielded = False
+            for row in rows:
+                values = [
+                    _cell_text(row[position]) if position < len(row) else None
+                    for position, _ in columns
+                ]
+                if not any(cell is not None for cell in row):
+                    # Ligne vide: conservée seulement si d'autres lignes suivent
+                    blank.append(values)
+                    continue
+                batch.extend(blank)
+                blank.clear()
+                batch.append(values)
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=names, dtype=object)
+                    batch = []
+                    yielded = True
+            # Feuille sans données: un bloc vide, pour valider l'en-tête
+            if batch or not yielded:
+                yield pd.DataFrame(batch, columns=names, dtype=object)
+        finally:
+            workbook.close()
+
     def _validate_columns(self):
         """Vérifie que les colonnes requises sont présentes."""
         required = ["numero"]  # Seul le numéro est obligatoire
@@ -66,20 +223,71 @@ class DataLoader:
             if col_name and col_name not in self.data.columns:
                 raise ValueError(
                     f"Colonne requise manquante: '{col_name}'. "
-                    f"Colonnes disponibles: {list(self.data.columns)}"
+                    f"Colonnes disponibles: {self.header}"
                 )
 
-    def _clean_data(self):
-        """Nettoie les données (remplace NaN par chaînes vides)."""
-        self.data = self.data.fillna("")
+    def _clean_data(self, text_columns: Optional[set] = None):
+        """
+        Nettoie les données (remplace les cellules vides par chaînes vides).
 
-        # Convertir les colonnes numériques en string si nécessaire
+        Les colonnes dont toutes les valeurs sont des nombres sont écrites
+        comme des nombres: entiers sans décimales ("007" -> "7", "12.0" -> "12"),
+        décimaux sous leur forme courte ("3.50" -> "3.5"). Les entiers hors de
+        la plage int64 gardent leur texte d'origine.
+
+        Args:
+            text_columns: Colonnes déjà reconnues comme texte (lecture par
+                blocs), laissées telles quelles; complété par ce bloc
+        """
+        if text_columns is None:
+            text_columns = set()
         for col in self.data.columns:
-            if self.data[col].dtype in ["int64", "float64"]:
-                # Garder les entiers sans décimales
-                self.data[col] = self.data[col].apply(
-                    lambda x: str(int(x)) if x != "" and pd.notna(x) and x == int(x) else str(x) if x != "" else ""
-                )
+            if col in text_columns:
+                continue
+            values = self.data[col]
+            first = values.first_valid_index()
+            if first is None:
+                continue
+            # Colonne de texte: écartée dès la première valeur
+            try:
+                float(values[first])
+            except ValueError:
+                text_columns.add(col)
+                continue
+            filled = values.notna()
+            numbers = pd.to_numeric(values[filled], errors="coerce")
+            if numbers.isna().any() or not np.isfinite(numbers).all():
+                text_columns.add(col)
+                continue
+            text = numbers.astype(str)
+            integral = (numbers % 1 == 0).to_numpy()
+            # Hors de la plage int64, la conversion déborderait: texte d'origine
+            small = (numbers.abs() < 2**63).to_numpy()
+            if (integral & small).any():
+                text[integral & small] = numbers[integral & small].astype("int64").astype(str)
+            if (integral & ~small).any():
+                text[integral & ~small] = values[filled][integral & ~small]
+            self.data.loc[filled, col] = text
+
+        self.data = self.data.fillna("")
+
+    def _mapped_columns(self) -> pd.DataFrame:
+        """
+        Colonnes du mapping, renommées en clés internes et converties en texte.
+
+        Calculé une fois par chargement, colonne par colonne (une colonne
+        absente du fichier est vide).
+        """
+        if self.data is None:
+            raise RuntimeError("Données non chargées. Appelez load() d'abord.")
+
+        if self._mapped is None:
+            empty = pd.Series("", index=self.data.index, dtype=object)
+            self._mapped = pd.DataFrame({
+                key: self.data[col_name].astype(str) if col_name in self.data.columns else empty
+                for key, col_name in self.column_mapping.items()
+            }).reset_index(drop=True)
+        return self._mapped
 
     def get_territory(self, index: int) -> dict:
         """
@@ -91,101 +299,272 @@ class DataLoader:
         Returns:
             Dictionnaire avec les données du territoire
         """
-        if self.data is None:
-            raise RuntimeError("Données non chargées. Appelez load() d'abord.")
-
-        row = self.data.iloc[index]
-
-        territory = {}
-        for key, col_name in self.column_mapping.items():
-            if col_name in self.data.columns:
-                value = row[col_name]
-                territory[key] = str(value) if value != "" else ""
-            else:
-                territory[key] = ""
-
-        return territory
+        return dict(self.get_all_territories()[index])
 
     def get_all_territories(self) -> list[dict]:
         """
         Récupère tous les territoires.
 
+        La liste est construite une fois par chargement, en une passe sur les
+        colonnes, puis partagée par tous les appelants (ne pas la modifier).
+
         Returns:
             Liste de dictionnaires avec les données
         """
-        if self.data is None:
-            raise RuntimeError("Données non chargées. Appelez load() d'abord.")
+        if self._territories is None:
+            self._territories = list(self.iter_territories())
+        return self._territories
 
-        return [self.get_territory(i) for i in range(len(self.data))]
+    def iter_territories(self) -> Iterator[dict]:
+        """
+        Parcourt les territoires sans construire la liste complète.
+
+        Yields:
+            Dictionnaire avec les données de chaque territoire
+        """
+        if self._territories is not None:
+            yield from self._territories
+            return
+
+        mapped = self._mapped_columns()
+        keys = list(mapped.columns)
+        for values in zip(*(mapped[key].tolist() for key in keys)):
+            yield dict(zip(keys, values))
+
+    def fingerprints(self) -> pd.DataFrame:
+        """
+        Identité et empreinte du contenu de chaque ligne (calculées en une passe).
+
+        Returns:
+            DataFrame avec les colonnes "key" (numéro + suffixe) et "hash"
+            (contenu des colonnes du mapping; une colonne absente compte comme vide)
+        """
+        mapped = self._mapped_columns()
+        empty = pd.Series("", index=mapped.index, dtype=object)
+        numeros = mapped["numero"] if "numero" in mapped else empty
+        suffixes = mapped["suffixe"] if "suffixe" in mapped else empty
+        return pd.DataFrame({
+            "key": territory_keys(numeros, suffixes),
+            "hash": content_hashes(mapped),
+        })
 
     def __len__(self) -> int:
         """Retourne le nombre de territoires."""
         return len(self.data) if self.data is not None else 0
 
 
-class ProgressTracker:
-    """Suit la progression et permet de reprendre après interruption."""
+def _cell_text(value) -> Optional[str]:
+    """Texte d'une cellule openpyxl (None pour une cellule vide)."""
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value)
+    return None if text in NA_STRINGS else text
+
 
-    def __init__(self, progress_file: Path):
+class ProgressTracker:
+    """
+    Suit la progression et permet de reprendre après interruption.
+
+    La progression est un journal JSONL en ajout seul: chaque territoire
+    traité ou en échec ajoute une ligne, au lieu de réécrire tout le fichier.
+    Les identifiants (numéro + suffixe, voir changes.territory_key) sont
+    indexés en mémoire (recherche en temps constant), avec l'empreinte du
+    contenu de chaque territoire traité pour détecter les lignes modifiées.
+    Au chargement, le journal est compacté (une ligne par territoire) et
+    l'ancien fichier JSON est migré.
+    """
+
+    def __init__(self, progress_file: Path, sync_every: int = 1):
         """
         Initialise le tracker.
 
         Args:
-            progress_file: Chemin vers le fichier JSON de progression
+            progress_file: Chemin du journal de progression (.jsonl); un ancien
+                fichier .json du même nom est migré automatiquement
+            sync_every: Nombre de lignes écrites entre deux fsync (1 = chaque
+                territoire est sur le disque avant de continuer, 0 = laissé au
+                système). Les lignes non synchronisées ne sont perdues qu'en
+                cas de coupure de courant, pas si le programme s'arrête.
         """
-        self.progress_file = Path(progress_file)
+        path = Path(progress_file)
+        self.progress_file = path.with_suffix(".jsonl")
+        self.legacy_file = path.with_suffix(".json")
+        self.sync_every = sync_every
         self.logger = get_logger()
-        self.processed: list[str] = []
-        self.failed: list[dict] = []
+        self.processed: set[str] = set()
+        self.hashes: dict[str, str] = {}
+        self.failed: dict[str, str] = {}
+        self._handle = None
+        self._unsynced = 0
         self._load()
 
     def _load(self):
-        """Charge la progression depuis le fichier."""
-        if self.progress_file.exists():
-            try:
-                with open(self.progress_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.processed = data.get("processed", [])
-                    self.failed = data.get("failed", [])
-                    self.logger.info(
-                        f"Progression chargée: {len(self.processed)} traités, "
-                        f"{len(self.failed)} en erreur"
-                    )
-            except (json.JSONDecodeError, IOError) as e:
-                self.logger.warning(f"Impossible de charger la progression: {e}")
-
-    def save(self):
-        """Sauvegarde la progression dans le fichier."""
-        self.progress_file.parent.mkdir(parents=True, exist_ok=True)
+        """Charge la progression (ancien fichier JSON, puis journal) et compacte le journal."""
+        migrated = self._migrate_legacy()
+        lines = self._replay() if self.progress_file.exists() else 0
+
+        if migrated or lines > len(self.processed) + len(self.failed):
+            self.compact()
+        if migrated or lines:
+            self.logger.info(
+                f"Progression chargée: {len(self.processed)} traités, "
+                f"{len(self.failed)} en erreur"
+            )
+
+    def _replay(self) -> int:
+        """
+        Rejoue le journal dans l'index en mémoire.
 
-        with open(self.progress_file, "w", encoding="utf-8") as f:
-            json.dump({
-                "processed": self.processed,
-                "failed": self.failed
-            }, f, indent=2, ensure_ascii=False)
+        Returns:
+            Nombre de lignes lues (y compris illisibles)
+        """
+        lines = 0
+        invalid = 0
+        try:
+            with open(self.progress_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    lines += 1
+                    try:
+                        self._apply(json.loads(line))
+                    except (json.JSONDecodeError, AttributeError):
+                        # Ligne tronquée par un arrêt brutal
+                        invalid += 1
+        except IOError as e:
+            self.logger.warning(f"Impossible de charger la progression: {e}")
+        if invalid:
+            self.logger.warning(f"Progression: {invalid} ligne(s) illisible(s) ignorée(s)")
+        return lines
+
+    def _apply(self, record: dict):
+        """Applique une ligne du journal à l'index."""
+        territory_id = record.get("id")
+        if record.get("status") == "processed":
+            self.processed.add(territory_id)
+            self.failed.pop(territory_id, None)
+            if record.get("hash"):
+                self.hashes[territory_id] = record["hash"]
+        elif record.get("status") == "failed":
+            self.failed[territory_id] = record.get("error", "")
+
+    def _migrate_legacy(self) -> bool:
+        """
+        Reprend l'ancien fichier JSON ({"processed": [...], "failed": [...]}).
 
-    def mark_processed(self, territory_id: str):
-        """Marque un territoire comme traité."""
-        if territory_id not in self.processed:
-            self.processed.append(territory_id)
-            self.save()
+        L'ancien fichier est renommé en .json.bak une fois repris.
+
+        Returns:
+            True si un ancien fichier a été migré
+        """
+        if not self.legacy_file.exists():
+            return False
+        try:
+            with open(self.legacy_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            self.logger.warning(f"Impossible de migrer l'ancienne progression: {e}")
+            return False
+
+        for item in data.get("failed", []):
+            self._apply({"id": item.get("id"), "status": "failed", "error": item.get("error", "")})
+        for territory_id in data.get("processed", []):
+            self._apply({"id": territory_id, "status": "processed"})
+
+        backup = self.legacy_file.with_suffix(".json.bak")
+        self.legacy_file.replace(backup)
+        self.logger.info(f"Progression migrée vers {self.progress_file.name} (ancien fichier: {backup.name})")
+        return True
+
+    def compact(self):
+        """Réécrit le journal avec une ligne par territoire (remplacement atomique)."""
+        self.close()
+        self.progress_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.progress_file.with_suffix(".jsonl.tmp")
+        with open(temp_file, "w", encoding="utf-8") as f:
+            for territory_id in sorted(self.processed):
+                record = {"id": territory_id, "status": "processed"}
+                if territory_id in self.hashes:
+                    record["hash"] = self.hashes[territory_id]
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            for territory_id, error in self.failed.items():
+                record = {"id": territory_id, "status": "failed", "error": error}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.progress_file)
+
+    def _append(self, record: dict):
+        """Ajoute une ligne au journal."""
+        if self._handle is None:
+            self.progress_file.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.progress_file, "a", encoding="utf-8")
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self._unsynced += 1
+        if self.sync_every and self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Force l'écriture sur disque des lignes ajoutées (fsync)."""
+        if self._handle is not None and self._unsynced:
+            os.fsync(self._handle.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        """Synchronise et ferme le journal (rouvert à la prochaine écriture)."""
+        if self._handle is not None:
+            self.sync()
+            self._handle.close()
+            self._handle = None
+
+    def mark_processed(self, territory_id: str, content_hash: str = ""):
+        """
+        Marque un territoire comme traité.
+
+        Args:
+            territory_id: Identité du territoire (numéro + suffixe)
+            content_hash: Empreinte du contenu traité ("" si inconnue)
+        """
+        if territory_id in self.processed and self.hashes.get(territory_id, "") == content_hash:
+            return
+        self.processed.add(territory_id)
+        self.failed.pop(territory_id, None)
+        record = {"id": territory_id, "status": "processed"}
+        if content_hash:
+            self.hashes[territory_id] = content_hash
+            record["hash"] = content_hash
+        self._append(record)
 
     def mark_failed(self, territory_id: str, error: str):
-        """Marque un territoire comme en erreur."""
-        self.failed.append({
-            "id": territory_id,
-            "error": error
-        })
-        self.save()
+        """Marque un territoire comme en erreur (une entrée par territoire)."""
+        if self.failed.get(territory_id) == error:
+            return
+        self.failed[territory_id] = error
+        self._append({"id": territory_id, "status": "failed", "error": error})
 
     def is_processed(self, territory_id: str) -> bool:
         """Vérifie si un territoire a déjà été traité."""
         return territory_id in self.processed
 
+    def claim(self, territory_id: str, content_hash: str = "") -> bool:
+        """
+        Réserve un territoire (un seul import utilise ce fichier: réservé s'il
+        reste à traiter, ou si son contenu a changé depuis son traitement).
+        """
+        if territory_id not in self.processed:
+            return True
+        recorded = self.hashes.get(territory_id, "")
+        return bool(content_hash and recorded) and recorded != content_hash
+
     def reset(self):
         """Réinitialise la progression."""
-        self.processed = []
-        self.failed = []
+        self.close()
+        self.processed = set()
+        self.hashes = {}
+        self.failed = {}
         if self.progress_file.exists():
             self.progress_file.unlink()
         self.logger.info("Progression réinitialisée")
@@ -195,5 +574,5 @@ class ProgressTracker:
         return {
             "processed_count": len(self.processed),
             "failed_count": len(self.failed),
-            "failed_territories": self.failed
+            "failed_territories": [{"id": k, "error": v} for k, v in self.failed.items()]
         }
@@ -0,0 +1,182 @@
+"""
+Cache des données chargées (fichier de territoires lu et nettoyé).
+
+Relire un gros classeur avec openpyxl est l'étape la plus lente du
+démarrage, refaite à chaque lancement (--verify, --dry-run, reprise après
+interruption). Après un chargement, les colonnes du mapping nettoyées sont
+enregistrées dans un format binaire en colonnes: Parquet si pyarrow est
+installé, pickle sinon. Au lancement suivant, si le fichier n'a pas changé,
+elles sont relues directement.
+
+Une entrée est identifiée par le chemin du fichier, sa taille, sa date de
+modification, l'empreinte de son contenu et le mapping des colonnes
+(EXCEL_COLUMNS): toute modification de l'un d'eux donne une nouvelle
+entrée, et les anciennes entrées du même fichier sont supprimées.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .logger_setup import get_logger
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# Version du contenu mis en cache: à incrémenter quand le nettoyage des
+# données change (DataLoader._clean_data), pour ne pas relire d'anciennes entrées
+CACHE_VERSION = 1
+
+# Clé des métadonnées Parquet où est conservé l'en-tête du fichier
+HEADER_METADATA = b"territory_automation.header"
+
+# Extensions des entrées (Parquet avec pyarrow, pickle sinon)
+ENTRY_EXTENSIONS = (".parquet", ".pkl")
+
+# Taille des blocs lus pour l'empreinte du fichier
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(file_path: Path) -> str:
+    """Empreinte du contenu d'un fichier (BLAKE2b, 32 caractères hexadécimaux)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Données chargées, enregistrées dans un dossier (une entrée par fichier source)."""
+
+    def __init__(self, folder: Path, max_entries: int = 5, refresh: bool = False):
+        """
+        Initialise le cache.
+
+        Args:
+            folder: Dossier des entrées (ex: data/cache)
+            max_entries: Nombre maximal d'entrées conservées (les moins
+                récemment utilisées sont supprimées)
+            refresh: Ignore les entrées existantes (le fichier est relu et
+                l'entrée remplacée)
+        """
+        self.folder = Path(folder)
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.extension = ".parquet" if PYARROW_AVAILABLE else ".pkl"
+        self.logger = get_logger()
+        # Empreinte du contenu par (chemin, taille, date): le fichier n'est lu qu'une fois
+        self._digests: dict[tuple, str] = {}
+
+    def entry_path(self, file_path: Path, column_mapping: dict) -> Path:
+        """
+        Chemin de l'entrée correspondant à l'état actuel du fichier.
+
+        Le nom commence par l'identifiant du fichier source (chemin), suivi
+        de l'empreinte de son état (taille, date, contenu) et du mapping.
+        """
+        source = Path(file_path).resolve()
+        stat = source.stat()
+        state = (str(source), stat.st_size, stat.st_mtime_ns)
+        if state not in self._digests:
+            self._digests[state] = file_digest(source)
+
+        source_id = hashlib.blake2b(str(source).encode("utf-8"), digest_size=6).hexdigest()
+        key = json.dumps({
+            "version": CACHE_VERSION,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content": self._digests[state],
+            "columns": list(column_mapping.items()),
+        }, ensure_ascii=False)
+        state_id = hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+        return self.folder / f"{source_id}-{state_id}{self.extension}"
+
+    def get(self, file_path: Path, column_mapping: dict) -> Optional[tuple[pd.DataFrame, list[str]]]:
+        """
+        Relit les données d'un fichier inchangé.
+
+        Returns:
+            (données nettoyées, en-tête du fichier), ou None si le fichier
+            n'est pas en cache (ou a changé depuis, ou refresh est demandé)
+        """
+        if self.refresh:
+            return None
+        entry = self.entry_path(file_path, column_mapping)
+        if not entry.exists():
+            return None
+
+        try:
+            if entry.suffix == ".parquet":
+                table = pq.read_table(entry)
+                header = json.loads((table.schema.metadata or {}).get(HEADER_METADATA, b"[]"))
+                data = table.to_pandas()
+            else:
+                with open(entry, "rb") as f:
+                    data, header = pickle.load(f)
+        except Exception as e:
+            self.logger.warning(f"Cache des données illisible, fichier relu: {e}")
+            entry.unlink(missing_ok=True)
+            return None
+
+        # Date d'utilisation (les entrées les moins récentes sont supprimées en premier)
+        os.utime(entry)
+        return data, header
+
+    def put(self, file_path: Path, column_mapping: dict, data: pd.DataFrame, header: list[str]):
+        """
+        Enregistre les données chargées d'un fichier.
+
+        Les entrées précédentes du même fichier sont supprimées. Une erreur
+        d'écriture n'interrompt pas le chargement (le cache est ignoré).
+        """
+        entry = self.entry_path(file_path, column_mapping)
+        temp_file = entry.with_name(entry.name + ".tmp")
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            if PYARROW_AVAILABLE:
+                table = pa.Table.from_pandas(data, preserve_index=False)
+                metadata = {
+                    **(table.schema.metadata or {}),
+                    HEADER_METADATA: json.dumps(header).encode("utf-8"),
+                }
+                pq.write_table(table.replace_schema_metadata(metadata), temp_file)
+            else:
+                with open(temp_file, "wb") as f:
+                    pickle.dump((data, header), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, entry)
+        except Exception as e:
+            self.logger.warning(f"Cache des données non écrit: {e}")
+            temp_file.unlink(missing_ok=True)
+            return
+
+        self._evict(entry)
+
+    def _evict(self, keep: Path):
+        """Supprime les anciennes entrées du même fichier, puis les moins récemment utilisées."""
+        source_id = keep.name.split("-", 1)[0]
+        entries = []
+        for path in self.folder.glob("*-*.*"):
+            if path == keep or path.suffix not in ENTRY_EXTENSIONS:
+                continue
+            if path.name.startswith(f"{source_id}-"):
+                path.unlink(missing_ok=True)
+            else:
+                entries.append(path)
+
+        excess = len(entries) + 1 - self.max_entries
+        if excess > 0:
+            # Une entrée peut être supprimée entre-temps par un autre import
+            entries.sort(key=lambda path: path.stat().st_mtime if path.exists() else 0)
+            for path in entries[:excess]:
+                path.unlink(missing_ok=True)
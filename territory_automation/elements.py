@@ -0,0 +1,384 @@
+"""
+Registre des éléments de l'interface NWS.
+
+Chaque élément logique (field_numero, dropdown_ville, btn_import_pdf...) est
+résolu une seule fois par formulaire en contrôle UI Automation, d'abord par
+son identifiant d'automatisation (data/elements.json), sinon par le contrôle
+situé à ses coordonnées calibrées. Les recherches suivantes ne coûtent qu'un
+accès au dictionnaire. Le cache est vidé à l'ouverture d'un nouveau formulaire.
+"""
+
+from typing import Optional
+
+try:
+    from pywinauto import Desktop
+    PYWINAUTO_AVAILABLE = True
+except ImportError:
+    PYWINAUTO_AVAILABLE = False
+
+from .logger_setup import get_logger
+
+
+# Éléments dont le clic ouvre un formulaire (invalide le cache)
+FORM_OPENERS = {"btn_new_territory", "list_first_territory"}
+
+# Éléments affichés seulement quand un formulaire de territoire est ouvert
+FORM_MARKERS = ("btn_carte", "field_numero", "dropdown_categorie")
+
+# Éléments éphémères (options de menus, modal): jamais résolus par position, car
+# le point calibré désigne un autre contrôle tant qu'ils ne sont pas affichés
+TRANSIENT_PREFIXES = ("dropdown_option_", "dropdown_ville_", "btn_confirm_")
+
+# Écrans NWS à afficher pour voir chaque groupe d'éléments (calibration)
+CALIBRATION_SCREENS = {
+    "menu": "Menu Territoires ouvert (bouton 'Liste des territoires' visible)",
+    "liste": "Liste des territoires (bouton '+', recherche et au moins une ligne)",
+    "formulaire": "Nouveau territoire: formulaire vide, onglet Details",
+    "menu_categorie": "Formulaire avec le menu Categorie ouvert",
+    "menu_type": "Formulaire avec le menu Type ouvert",
+    "confirmation_type": "Modal 'Etes-vous sur' apres le choix d'un type (pas En presentiel)",
+    "menu_ville": "Formulaire avec le menu Ville ouvert",
+    "carte": "Onglet Carte du formulaire (bouton 'Ajouter fichier' visible)",
+}
+
+# Éléments à calibrer avec leurs descriptions (et l'écran NWS où ils apparaissent)
+ELEMENTS_TO_CALIBRATE = [
+    # Navigation
+    {
+        "id": "btn_menu_territoires",
+        "name": "Menu Territoires",
+        "description": "Le bouton ou menu 'Territoires' dans la barre de navigation",
+        "group": "Navigation",
+        "screen": "menu"
+    },
+    {
+        "id": "btn_liste_territoires",
+        "name": "Liste des territoires",
+        "description": "Le bouton 'Liste des territoires' (apres avoir clique sur Territoires)",
+        "group": "Navigation",
+        "screen": "menu"
+    },
+    # Création territoire
+    {
+        "id": "btn_new_territory",
+        "name": "Bouton Nouveau (+)",
+        "description": "Le bouton '+' pour creer un nouveau territoire",
+        "group": "Creation",
+        "screen": "liste"
+    },
+    # Mise à jour de territoires existants (--update)
+    {
+        "id": "field_search_territory",
+        "name": "Champ de recherche",
+        "description": "Le champ de recherche au-dessus de la liste des territoires",
+        "group": "Mise a jour",
+        "screen": "liste"
+    },
+    {
+        "id": "list_first_territory",
+        "name": "Premier resultat",
+        "description": "La premiere ligne de la liste des territoires (apres une recherche)",
+        "group": "Mise a jour",
+        "screen": "liste"
+    },
+    # Champs du formulaire (ordre de saisie)
+    # 1. Catégorie
+    {
+        "id": "dropdown_categorie",
+        "name": "Menu deroulant Categorie",
+        "description": "Le menu deroulant pour selectionner la categorie (1er champ)",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "dropdown_option_sar",
+        "name": "Option 'SAR'",
+        "description": "L'option 'SAR' dans le menu Categorie (ouvrez-le d'abord)",
+        "group": "Formulaire",
+        "screen": "menu_categorie"
+    },
+    # 2. Numéro
+    {
+        "id": "field_numero",
+        "name": "Champ Numero",
+        "description": "Le champ de saisie du numero de territoire",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    # 3. Suffixe
+    {
+        "id": "field_suffixe",
+        "name": "Champ Suffixe",
+        "description": "Le champ de saisie du suffixe (A, B, etc.)",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    # 4. Type
+    {
+        "id": "dropdown_type",
+        "name": "Menu deroulant Type",
+        "description": "Le menu deroulant pour selectionner le type",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "dropdown_option_presentiel",
+        "name": "Option 'En presentiel'",
+        "description": "L'option 'En presentiel' dans le menu deroulant Type (ouvrez-le d'abord)",
+        "group": "Formulaire",
+        "screen": "menu_type"
+    },
+    {
+        "id": "dropdown_option_courrier",
+        "name": "Option 'Courrier'",
+        "description": "L'option 'Courrier' dans le menu deroulant Type",
+        "group": "Formulaire",
+        "screen": "menu_type"
+    },
+    {
+        "id": "dropdown_option_telephone",
+        "name": "Option 'Telephone'",
+        "description": "L'option 'Telephone' dans le menu deroulant Type",
+        "group": "Formulaire",
+        "screen": "menu_type"
+    },
+    {
+        "id": "dropdown_option_entreprise",
+        "name": "Option 'Entreprise'",
+        "description": "L'option 'Entreprise' dans le menu deroulant Type",
+        "group": "Formulaire",
+        "screen": "menu_type"
+    },
+    {
+        "id": "btn_confirm_type",
+        "name": "Bouton 'Oui' confirmation Type",
+        "description": "Le bouton 'Oui' du modal qui apparait quand on change de type (pas En presentiel)",
+        "group": "Formulaire",
+        "screen": "confirmation_type"
+    },
+    # 5. Ville
+    {
+        "id": "dropdown_ville",
+        "name": "Menu deroulant Ville",
+        "description": "Le menu deroulant pour selectionner la ville (apres Type)",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "dropdown_ville_aucun",
+        "name": "Option 'Aucun'",
+        "description": "L'option 'Aucun' dans le menu Ville (ouvrez-le d'abord)",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    {
+        "id": "dropdown_ville_carrieres",
+        "name": "Option 'CARRIERE S/ BOIS'",
+        "description": "L'option 'CARRIERE S/ BOIS' dans le menu Ville",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    {
+        "id": "dropdown_ville_maisons",
+        "name": "Option 'MAISONS-LAFFITTE'",
+        "description": "L'option 'MAISONS-LAFFITTE' dans le menu Ville",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    {
+        "id": "dropdown_ville_mesnil",
+        "name": "Option 'MESNIL LE ROI'",
+        "description": "L'option 'MESNIL LE ROI' dans le menu Ville",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    {
+        "id": "dropdown_ville_montesson",
+        "name": "Option 'MONTESSON'",
+        "description": "L'option 'MONTESSON' dans le menu Ville",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    {
+        "id": "dropdown_ville_sartrouville",
+        "name": "Option 'SARTROUVILLE'",
+        "description": "L'option 'SARTROUVILLE' dans le menu Ville",
+        "group": "Formulaire",
+        "screen": "menu_ville"
+    },
+    # 6. Lien GPS
+    {
+        "id": "field_lien_gps",
+        "name": "Champ Lien GPS",
+        "description": "Le champ de saisie du lien GPS",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "field_notes",
+        "name": "Champ Notes",
+        "description": "Le champ de saisie des notes generales",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "field_ne_pas_visiter",
+        "name": "Champ Ne pas visiter",
+        "description": "Le champ pour les adresses a ne pas visiter",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    {
+        "id": "field_notes_proclamateur",
+        "name": "Champ Notes proclamateur",
+        "description": "Le champ pour les notes du proclamateur",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    # Navigation formulaire
+    {
+        "id": "btn_carte",
+        "name": "Bouton Carte",
+        "description": "L'onglet ou bouton 'Carte' pour passer a l'ecran de la carte",
+        "group": "Formulaire",
+        "screen": "formulaire"
+    },
+    # Actions
+    {
+        "id": "btn_import_pdf",
+        "name": "Bouton Ajouter fichier",
+        "description": "Le bouton 'Ajouter fichier' pour importer un PDF",
+        "group": "Actions",
+        "screen": "carte"
+    },
+]
+
+
+
+# Clés acceptées dans un localisateur (transmises à child_window)
+LOCATOR_KEYS = ("auto_id", "control_type", "title", "title_re", "class_name", "found_index")
+
+
+class ElementRegistry:
+    """Résout et met en cache les contrôles UIA des éléments NWS."""
+
+    def __init__(self, coordinates: dict, locators: Optional[dict] = None):
+        """
+        Initialise le registre.
+
+        Args:
+            coordinates: Dictionnaire des coordonnées des éléments (secours)
+            locators: Mapping élément -> critères UIA (auto_id, control_type...)
+        """
+        self.coords = coordinates
+        self.locators = locators or {}
+        self.logger = get_logger()
+        self.root = None
+        self._desktop = Desktop(backend="uia") if PYWINAUTO_AVAILABLE else None
+        self._cache: dict = {}
+        # Éléments du cache résolus par leur point calibré (sans localisateur)
+        self._by_point: set = set()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def __contains__(self, element_name: str) -> bool:
+        """Indique si l'élément est adressable (localisateur ou coordonnées)."""
+        return element_name in self.locators or element_name in self.coords
+
+    def known_elements(self) -> set:
+        """Retourne l'ensemble des éléments adressables."""
+        return set(self.coords) | set(self.locators)
+
+    def set_root(self, root):
+        """
+        Définit la fenêtre racine dans laquelle chercher les localisateurs.
+
+        Args:
+            root: Fenêtre principale NWS (wrapper pywinauto)
+        """
+        self.root = root
+        self.invalidate()
+
+    def invalidate(self):
+        """Vide le cache (nouveau formulaire ouvert)."""
+        if self._cache:
+            self.stats["invalidations"] += 1
+        self._cache.clear()
+        self._by_point.clear()
+
+    def forget(self, element_name: str):
+        """Retire un élément du cache (contrôle devenu invalide)."""
+        self._cache.pop(element_name, None)
+        self._by_point.discard(element_name)
+
+    def resolve(self, element_name: str, by_point: bool = True):
+        """
+        Retourne le contrôle UIA d'un élément, depuis le cache si possible.
+
+        Args:
+            element_name: Nom de l'élément
+            by_point: Accepter le contrôle situé aux coordonnées calibrées. Ce
+                contrôle est toujours visible (c'est celui sous le point): il ne
+                renseigne pas sur la présence de l'élément lui-même.
+
+        Returns:
+            Wrapper pywinauto, ou None si l'élément est introuvable
+        """
+        if element_name in self._cache and (by_point or element_name not in self._by_point):
+            self.stats["hits"] += 1
+            return self._cache[element_name]
+
+        self.stats["misses"] += 1
+        element = self._resolve_by_locator(element_name)
+        if element is not None:
+            self._cache[element_name] = element
+            self._by_point.discard(element_name)
+            return element
+        if not by_point or element_name.startswith(TRANSIENT_PREFIXES):
+            return None
+
+        element = self._resolve_by_point(element_name)
+        # Les échecs ne sont pas mis en cache: l'élément peut apparaître plus tard
+        if element is not None:
+            self._cache[element_name] = element
+            self._by_point.add(element_name)
+        return element
+
+    def position(self, element_name: str) -> Optional[tuple[int, int]]:
+        """
+        Retourne le point de clic d'un élément: centre du contrôle résolu
+        par localisateur, sinon coordonnées calibrées.
+        """
+        if element_name in self.locators:
+            element = self.resolve(element_name)
+            if element is not None:
+                try:
+                    center = element.rectangle().mid_point()
+                    return center.x, center.y
+                except Exception:
+                    self.forget(element_name)
+
+        coords = self.coords.get(element_name)
+        return tuple(coords) if coords else None
+
+    def _resolve_by_locator(self, element_name: str):
+        """Cherche l'élément par ses critères UIA dans la fenêtre racine."""
+        locator = self.locators.get(element_name)
+        if not locator or self.root is None:
+            return None
+
+        criteria = {k: v for k, v in locator.items() if k in LOCATOR_KEYS}
+        try:
+            return self.root.child_window(**criteria).wrapper_object()
+        except Exception as e:
+            self.logger.debug(f"Localisateur introuvable pour {element_name}: {e}")
+            return None
+
+    def _resolve_by_point(self, element_name: str):
+        """Retourne le contrôle situé aux coordonnées calibrées de l'élément."""
+        if self._desktop is None or element_name not in self.coords:
+            return None
+        x, y = self.coords[element_name]
+        try:
+            return self._desktop.from_point(x, y)
+        except Exception:
+            return None
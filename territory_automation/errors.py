@@ -0,0 +1,12 @@
+"""
+Exceptions communes de l'automatisation.
+
+AutomationError est la base des erreurs d'un territoire (élément
+introuvable, import échoué, dialogue inattendu...): elles remontent
+jusqu'à la boucle de traitement, qui décide d'une nouvelle tentative.
+"""
+
+
+class AutomationError(Exception):
+    """Exception pour les erreurs d'automatisation."""
+    pass
@@ -0,0 +1,111 @@
+"""
+Export des territoires au format d'import en masse de NWS.
+
+Au lieu de saisir chaque territoire dans l'interface, l'exporteur écrit un
+fichier CSV que NWS importe en une seule opération (catégorie, numéro,
+suffixe, type, ville, notes). L'automatisation de l'interface ne sert
+ensuite qu'à ce que l'import ne couvre pas: les fichiers PDF joints
+(main.py --attachments-only).
+
+Les valeurs sont résolues par le planificateur (libellés des options,
+catégorie par défaut), exactement comme lors de la saisie par l'interface.
+Le fichier produit est déterministe: mêmes données, mêmes octets.
+"""
+
+import csv
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .logger_setup import get_logger
+from .planner import TerritoryPlanner, UPDATE_FIELDS
+
+
+# Clé du territoire -> élément du formulaire qui porte la valeur
+FIELD_ELEMENTS = {
+    "categorie": "dropdown_categorie",
+    "numero": "field_numero",
+    "suffixe": "field_suffixe",
+    "type": "dropdown_type",
+    "ville": "dropdown_ville",
+    "lien_gps": "field_lien_gps",
+    "notes": "field_notes",
+    "ne_pas_visiter": "field_ne_pas_visiter",
+    "notes_proclamateur": "field_notes_proclamateur",
+}
+
+
+class NWSImportExporter:
+    """Écrit un fichier d'import NWS à partir des territoires du DataLoader."""
+
+    def __init__(
+        self,
+        columns: dict,
+        categories: Optional[dict] = None,
+        villes: Optional[dict] = None,
+        labels: Optional[dict] = None,
+        delimiter: str = ","
+    ):
+        """
+        Initialise l'exporteur.
+
+        Args:
+            columns: Mapping clé du territoire -> en-tête de colonne NWS (ordre conservé)
+            categories: Mapping nom catégorie -> clé d'option (depuis options.json)
+            villes: Mapping nom ville -> clé d'option (depuis options.json)
+            labels: Mapping clé d'option -> libellé affiché dans NWS
+            delimiter: Séparateur de colonnes
+        """
+        unknown = [key for key in columns if key not in FIELD_ELEMENTS]
+        if unknown:
+            raise ValueError(f"Colonnes d'import inconnues: {unknown}")
+
+        self.columns = columns
+        self.delimiter = delimiter
+        self.logger = get_logger()
+        # Tous les champs sont « adressables »: seules les valeurs du plan sont utilisées
+        self.planner = TerritoryPlanner(UPDATE_FIELDS, Path("."), categories, villes, labels)
+
+    def row(self, territory: dict) -> list[str]:
+        """
+        Construit la ligne d'import d'un territoire.
+
+        Returns:
+            Valeurs dans l'ordre des colonnes
+        """
+        plan = self.planner.plan(territory, no_save=True)
+        for warning in plan.warnings:
+            # Les autres avertissements concernent la calibration de l'interface
+            if warning["step"] == 5:
+                self.logger.warning(f"  {plan.territory_id}: {warning['message']}")
+
+        values = {
+            action.target: action.value
+            for action in plan.actions
+            if action.op in ("select", "paste") and action.target
+        }
+        return [values.get(FIELD_ELEMENTS[key], "") for key in self.columns]
+
+    def export(self, territories: Iterable[dict], path: Path) -> int:
+        """
+        Écrit le fichier d'import.
+
+        Args:
+            territories: Territoires (dictionnaires du DataLoader)
+            path: Fichier CSV de destination
+
+        Returns:
+            Nombre de territoires écrits
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f, delimiter=self.delimiter, lineterminator="\r\n")
+            writer.writerow(self.columns.values())
+            for territory in territories:
+                writer.writerow(self.row(territory))
+                count += 1
+
+        self.logger.info(f"Fichier d'import NWS écrit: {path} ({count} territoires)")
+        return count
@@ -0,0 +1,270 @@
+"""
+Vérification des actions GUI par empreinte de région d'écran.
+
+Avant une action, une petite région autour de l'élément visé est capturée
+et réduite à une empreinte (luminance moyenne sur une grille de GRID x GRID
+blocs, calculée avec NumPy). Après l'action, l'empreinte est recalculée:
+si assez de blocs ont changé (menu ouvert, texte apparu dans le champ,
+modal fermé...), l'action a « porté ». Sinon le clic est probablement perdu.
+
+L'effet attendu peut être précisé par élément (EXPECTATIONS):
+- "changed": la région diffère de sa capture d'avant l'action (défaut)
+- "unchanged": la région doit rester identique (un changement signale un
+  effet inattendu: dialogue, menu resté ouvert)
+- "match": la région doit correspondre à une empreinte enregistrée
+  (<dossier>/<élément>.npy), par exemple le menu déroulant ouvert: un
+  changement quelconque de la région ne suffit plus
+
+Les captures viennent d'une source offrant grab_region(box): le bureau
+(DesktopBackend), le simulateur, ou des captures enregistrées
+(StoredScreens) pour vérifier les seuils hors ligne.
+"""
+
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+# Taille de la grille de l'empreinte (blocs par côté)
+GRID = 16
+
+# Coefficients de luminance (ITU-R BT.601)
+LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+# Effets attendus d'une action sur la région de l'élément
+EXPECTATIONS = ("changed", "unchanged", "match")
+
+
+def fingerprint(region: np.ndarray) -> np.ndarray:
+    """
+    Calcule l'empreinte d'une région (luminance moyenne par bloc).
+
+    Args:
+        region: Pixels (hauteur x largeur, niveaux de gris ou RGB/RGBA)
+
+    Returns:
+        Tableau uint8 d'au plus GRID x GRID blocs
+    """
+    pixels = np.asarray(region, dtype=np.float32)
+    if pixels.ndim == 3:
+        pixels = pixels[..., :3] @ LUMA
+    height, width = pixels.shape
+    rows, cols = min(GRID, height), min(GRID, width)
+    height, width = height - height % rows, width - width % cols
+    blocks = pixels[:height, :width].reshape(rows, height // rows, cols, width // cols)
+    return blocks.mean(axis=(1, 3)).astype(np.uint8)
+
+
+def difference(before: np.ndarray, after: np.ndarray, tolerance: int = 8) -> float:
+    """
+    Proportion des blocs dont la luminance a changé de plus de `tolerance`.
+
+    Returns:
+        Valeur entre 0 (identique) et 1 (tout a changé)
+    """
+    if before.shape != after.shape:
+        return 1.0
+    delta = np.abs(before.astype(np.int16) - after.astype(np.int16))
+    return np.count_nonzero(delta > tolerance) / delta.size
+
+
+def load_print(path: Path) -> np.ndarray:
+    """
+    Charge une empreinte enregistrée (.npy): l'empreinte elle-même, ou les
+    pixels de la région, réduits alors en empreinte.
+    """
+    data = np.load(path)
+    if data.ndim == 2 and data.dtype == np.uint8 and max(data.shape) <= GRID:
+        return data
+    return fingerprint(data)
+
+
+class Snapshot:
+    """Empreinte d'une région capturée avant une action, et effet attendu."""
+
+    __slots__ = ("element", "box", "print", "expect")
+
+    def __init__(
+        self,
+        element: str,
+        box: tuple[int, int, int, int],
+        print_: np.ndarray,
+        expect: str = "changed"
+    ):
+        self.element = element
+        self.box = box
+        self.print = print_
+        self.expect = expect
+
+
+class ActionVerifier:
+    """Compare les empreintes avant/après une action pour savoir si elle a porté."""
+
+    def __init__(
+        self,
+        source,
+        radius: int = 24,
+        tolerance: int = 8,
+        min_change: float = 0.02,
+        regions: Optional[dict] = None,
+        retry: bool = True,
+        expectations: Optional[dict] = None,
+        fingerprint_folder: Optional[Path] = None
+    ):
+        """
+        Initialise la vérification.
+
+        Args:
+            source: Source des captures (objet avec grab_region(box))
+            radius: Demi-côté de la région capturée autour du point (pixels)
+            tolerance: Écart de luminance ignoré par bloc (bruit, anticrénelage)
+            min_change: Proportion minimale de blocs modifiés pour conclure à un effet
+            regions: Mapping élément -> (dx, dy, largeur, hauteur) relatif au point,
+                pour les éléments dont l'effet est décalé (liste d'un menu déroulant)
+            retry: Si True, un clic sans effet visible est répété une fois
+            expectations: Mapping élément -> effet attendu d'un clic ("changed",
+                "unchanged" ou "match"), "changed" pour les éléments non listés
+            fingerprint_folder: Dossier des empreintes attendues (<élément>.npy)
+                des éléments "match"
+
+        Raises:
+            ValueError: Si un effet est inconnu, ou si l'empreinte attendue
+                d'un élément "match" est introuvable
+        """
+        self.source = source
+        self.radius = radius
+        self.tolerance = tolerance
+        self.min_change = min_change
+        self.regions = regions or {}
+        self.retry = retry
+        self.expectations = expectations or {}
+        self.stats = {"landed": 0, "missed": 0, "unavailable": 0}
+
+        # Empreintes attendues, chargées une fois (erreur de configuration signalée au démarrage)
+        self.expected_prints: dict[str, np.ndarray] = {}
+        for element, expect in self.expectations.items():
+            if expect not in EXPECTATIONS:
+                raise ValueError(f"Effet attendu inconnu pour {element}: {expect}")
+            if expect == "match":
+                path = Path(fingerprint_folder or ".") / f"{element}.npy"
+                if not path.exists():
+                    raise ValueError(f"Empreinte attendue introuvable pour {element}: {path}")
+                self.expected_prints[element] = load_print(path)
+
+    def box(self, element: str, x: int, y: int) -> tuple[int, int, int, int]:
+        """Région (gauche, haut, largeur, hauteur) surveillée pour un élément."""
+        if element in self.regions:
+            dx, dy, width, height = self.regions[element]
+            return x + dx, y + dy, width, height
+        return x - self.radius, y - self.radius, 2 * self.radius, 2 * self.radius
+
+    def capture(self, element: str, x: int, y: int, expect: Optional[str] = None) -> Optional[Snapshot]:
+        """
+        Capture l'empreinte de la région d'un élément.
+
+        Args:
+            element: Élément visé
+            x, y: Point de l'élément
+            expect: Effet attendu de l'action (défaut: celui de l'élément
+                dans `expectations`, sinon "changed")
+
+        Returns:
+            Snapshot, ou None si la capture n'est pas disponible
+        """
+        box = self.box(element, x, y)
+        region = self.source.grab_region(box)
+        if region is None or region.size == 0:
+            self.stats["unavailable"] += 1
+            return None
+        return Snapshot(element, box, fingerprint(region), expect or self.expectations.get(element, "changed"))
+
+    def changed(self, snapshot: Snapshot) -> Optional[bool]:
+        """
+        Indique si la région a changé depuis la capture.
+
+        Returns:
+            True/False, ou None si la capture n'est plus disponible
+        """
+        current = self._current(snapshot)
+        if current is None:
+            return None
+        return bool(difference(snapshot.print, current, self.tolerance) >= self.min_change)
+
+    def satisfied(self, snapshot: Snapshot) -> Optional[bool]:
+        """
+        Indique si la région montre l'effet attendu de l'action (snapshot.expect).
+
+        Returns:
+            True/False, ou None si la capture n'est plus disponible
+        """
+        current = self._current(snapshot)
+        if current is None:
+            return None
+        if snapshot.expect == "match":
+            expected = self.expected_prints[snapshot.element]
+            return bool(difference(expected, current, self.tolerance) < self.min_change)
+        score = difference(snapshot.print, current, self.tolerance)
+        if snapshot.expect == "unchanged":
+            return bool(score < self.min_change)
+        return bool(score >= self.min_change)
+
+    def _current(self, snapshot: Snapshot) -> Optional[np.ndarray]:
+        region = self.source.grab_region(snapshot.box)
+        if region is None or region.size == 0:
+            return None
+        return fingerprint(region)
+
+    def record(self, landed: bool):
+        """Compte le résultat d'une vérification."""
+        self.stats["landed" if landed else "missed"] += 1
+
+
+class StoredScreens:
+    """
+    Captures d'écran enregistrées, utilisées comme source hors ligne.
+
+    Les régions sont découpées dans la capture courante (show()). Formats:
+    .npy (NumPy), ou toute image lisible par Pillow si installé.
+    """
+
+    def __init__(self, frames: Optional[dict] = None):
+        """
+        Args:
+            frames: Mapping nom -> chemin de fichier ou tableau de pixels
+        """
+        self.frames = {name: self.load(frame) for name, frame in (frames or {}).items()}
+        self.current: Optional[np.ndarray] = None
+
+    @staticmethod
+    def load(frame: Union[str, Path, np.ndarray]) -> np.ndarray:
+        """Charge une capture (chemin .npy/.png... ou tableau)."""
+        if isinstance(frame, np.ndarray):
+            return frame
+        path = Path(frame)
+        if path.suffix.lower() == ".npy":
+            return np.load(path)
+        if not PIL_AVAILABLE:
+            raise ImportError(f"Pillow est requis pour lire {path.name} (ou utilisez .npy)")
+        with Image.open(path) as image:
+            return np.asarray(image.convert("RGB"))
+
+    def show(self, frame: Union[str, Path, np.ndarray]):
+        """Définit la capture courante (nom enregistré, chemin ou tableau)."""
+        if isinstance(frame, str) and frame in self.frames:
+            self.current = self.frames[frame]
+        else:
+            self.current = self.load(frame)
+
+    def grab_region(self, box: tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        if self.current is None:
+            return None
+        left, top, width, height = box
+        left, top = max(0, left), max(0, top)
+        return self.current[top:top + height, left:left + width]
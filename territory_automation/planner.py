@@ -0,0 +1,552 @@
+"""
+Compilation des territoires en plans d'actions sérialisables.
+
+Le planificateur prend toutes les décisions (catégorie par défaut, option de
+type, confirmation du modal, chemin du PDF) et produit une liste explicite
+d'actions. L'exécuteur rejoue ensuite ce plan sur un NWSAutomator.
+
+Les plans peuvent être sauvegardés en JSON ou JSONL, puis validés ou
+rejoués sans relire le fichier Excel.
+"""
+
+import json
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .changes import territory_key
+from .checkpoints import StepJournal
+from .errors import AutomationError
+from .logger_setup import get_logger
+from .tracing import Tracer
+
+
+# Libellés des étapes (pour les logs)
+STEP_LABELS = {
+    1: "Nouveau territoire",
+    2: "Catégorie",
+    3: "Numéro",
+    4: "Suffixe",
+    5: "Type",
+    6: "Ville",
+    7: "Champs texte",
+    8: "Onglet Carte",
+    9: "Import fichier",
+}
+
+# Options du menu déroulant Type
+TYPE_OPTIONS = {
+    "presentiel": "dropdown_option_presentiel",
+    "en présentiel": "dropdown_option_presentiel",
+    "courrier": "dropdown_option_courrier",
+    "telephone": "dropdown_option_telephone",
+    "téléphone": "dropdown_option_telephone",
+    "entreprise": "dropdown_option_entreprise",
+}
+
+# Types qui nécessitent confirmation (modal "Êtes-vous sûr")
+TYPES_NEED_CONFIRM = ["courrier", "telephone", "téléphone", "entreprise"]
+
+# Nom du modal de confirmation du type (règle "confirm" de MODAL_RULES)
+CONFIRM_TYPE_MODAL = "confirm_type"
+
+# Champs texte de l'étape 7 (clé territoire -> élément)
+TEXT_FIELDS = [
+    ("lien_gps", "field_lien_gps"),
+    ("notes", "field_notes"),
+    ("ne_pas_visiter", "field_ne_pas_visiter"),
+    ("notes_proclamateur", "field_notes_proclamateur"),
+]
+
+# Libellés NWS des options (clé d'option -> texte affiché dans le menu)
+DEFAULT_OPTION_LABELS = {
+    "dropdown_option_sar": "SAR",
+    "dropdown_option_presentiel": "En présentiel",
+    "dropdown_option_courrier": "Courrier",
+    "dropdown_option_telephone": "Téléphone",
+    "dropdown_option_entreprise": "Entreprise",
+    "dropdown_ville_aucun": "Aucun",
+    "dropdown_ville_carrieres": "CARRIERE S/ BOIS",
+    "dropdown_ville_maisons": "MAISONS-LAFFITTE",
+    "dropdown_ville_mesnil": "MESNIL LE ROI",
+    "dropdown_ville_montesson": "MONTESSON",
+    "dropdown_ville_sartrouville": "SARTROUVILLE",
+}
+
+# Éléments lus dans NWS et comparés en mode mise à jour
+UPDATE_FIELDS = [
+    "dropdown_categorie",
+    "field_numero",
+    "field_suffixe",
+    "dropdown_type",
+    "dropdown_ville",
+] + [element for _, element in TEXT_FIELDS]
+
+# Opérations reconnues par l'exécuteur
+ACTION_OPS = ("click", "paste", "press", "wait_for", "select", "import", "await_modal")
+
+# Opérations qui ne font qu'attendre (exécutées sans le verrou de saisie)
+WAIT_OPS = ("wait_for", "await_modal")
+
+
+class ActionFailed(AutomationError):
+    """Une action du plan n'a pas abouti (ex: import du fichier)."""
+    pass
+
+
+@dataclass
+class Action:
+    """
+    Action élémentaire d'un plan.
+
+    Attributes:
+        op: Opération ("click", "paste", "press", "wait_for", "select", "import", "await_modal")
+        step: Numéro de l'étape (voir STEP_LABELS)
+        target: Élément visé (click, wait_for, select, paste; champ actif si vide pour paste),
+            ou nom du dialogue validé par la surveillance (await_modal)
+        value: Texte à saisir, libellé d'option, touche, condition ("exists"/"enabled") ou chemin
+        delay: Clé du délai maximal dans le dictionnaire des délais
+        option: Élément calibré de l'option, utilisé si la sélection directe échoue (select)
+    """
+    op: str
+    step: int
+    target: str = ""
+    value: str = ""
+    delay: str = ""
+    option: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Action":
+        return cls(
+            op=data["op"],
+            step=int(data.get("step", 0)),
+            target=data.get("target", ""),
+            value=data.get("value", ""),
+            delay=data.get("delay", ""),
+            option=data.get("option", ""),
+        )
+
+
+@dataclass
+class TerritoryPlan:
+    """
+    Plan d'actions complet pour un territoire.
+
+    Attributes:
+        mode: "create" (nouveau territoire, toutes les étapes) ou "update"
+            (territoire existant, seulement les champs modifiés)
+        key: Identité dans la progression (numéro + suffixe, voir changes.py)
+        content_hash: Empreinte de la ligne planifiée ("" si inconnue)
+    """
+    territory_id: str
+    actions: list[Action] = field(default_factory=list)
+    warnings: list[dict] = field(default_factory=list)
+    mode: str = "create"
+    key: str = ""
+    content_hash: str = ""
+
+    @property
+    def progress_id(self) -> str:
+        """Identifiant utilisé dans la progression."""
+        return self.key or self.territory_id
+
+    def add(
+        self,
+        op: str,
+        step: int,
+        target: str = "",
+        value: str = "",
+        delay: str = "",
+        option: str = ""
+    ):
+        """Ajoute une action au plan."""
+        self.actions.append(Action(op, step, target, value, delay, option))
+
+    def warn(self, step: int, message: str):
+        """Ajoute un avertissement rattaché à une étape."""
+        self.warnings.append({"step": step, "message": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "territory_id": self.territory_id,
+            "actions": [asdict(action) for action in self.actions],
+            "warnings": self.warnings,
+            "mode": self.mode,
+            "key": self.key,
+            "content_hash": self.content_hash,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TerritoryPlan":
+        return cls(
+            territory_id=data["territory_id"],
+            actions=[Action.from_dict(a) for a in data.get("actions", [])],
+            warnings=list(data.get("warnings", [])),
+            mode=data.get("mode", "create"),
+            key=data.get("key", ""),
+            content_hash=data.get("content_hash", ""),
+        )
+
+
+class TerritoryPlanner:
+    """Transforme un territoire (dict) en plan d'actions."""
+
+    def __init__(
+        self,
+        elements: Iterable[str],
+        pdf_folder: Path,
+        categories: Optional[dict] = None,
+        villes: Optional[dict] = None,
+        labels: Optional[dict] = None,
+        confirmed_modals: Iterable[str] = ()
+    ):
+        """
+        Initialise le planificateur.
+
+        Args:
+            elements: Éléments adressables (coordonnées calibrées ou localisateurs UIA)
+            pdf_folder: Dossier contenant les PDFs
+            categories: Mapping nom catégorie -> clé de coordonnée
+            villes: Mapping nom ville -> clé de coordonnée
+            labels: Mapping clé d'option -> libellé affiché dans NWS
+            confirmed_modals: Dialogues validés par la surveillance (le plan
+                attend leur validation au lieu de cliquer sur leur bouton)
+        """
+        self.elements = set(elements)
+        self.pdf_folder = Path(pdf_folder)
+        self.categories = categories or {"SAR": "dropdown_option_sar"}
+        self.villes = villes or {}
+        self.labels = {**DEFAULT_OPTION_LABELS, **(labels or {})}
+        self.confirmed_modals = set(confirmed_modals)
+
+    def get_pdf_path(self, territory: dict) -> Path:
+        """Détermine le chemin du PDF pour un territoire."""
+        pdf_filename = territory.get("pdf_filename", "")
+        if not pdf_filename:
+            territory_id = territory.get("numero", "UNKNOWN")
+            pdf_filename = f"{territory_id}.pdf"
+
+        return self.pdf_folder / pdf_filename
+
+    def plan(self, territory: dict, no_save: bool = False) -> TerritoryPlan:
+        """
+        Construit le plan d'actions d'un territoire.
+
+        Args:
+            territory: Dictionnaire avec les données du territoire
+            no_save: Si True, n'inclut pas l'import du fichier
+
+        Returns:
+            Plan d'actions du territoire
+        """
+        plan = TerritoryPlan(
+            territory_id=territory.get("numero", "INCONNU"),
+            key=territory_key(territory.get("numero", "INCONNU"), territory.get("suffixe", "")),
+        )
+
+        # 1. Nouveau territoire
+        plan.add("click", 1, "btn_new_territory")
+        if "dropdown_categorie" in self.elements:
+            # Attendre que le formulaire soit affiché avant de le remplir
+            plan.add("wait_for", 1, "dropdown_categorie", "enabled", "navigation")
+
+        # 2. Catégorie
+        categorie = territory.get("categorie", "").upper().strip()
+        if not categorie:
+            # Valeur par défaut: première catégorie disponible
+            categorie = list(self.categories.keys())[0] if self.categories else "SAR"
+        if categorie and "dropdown_categorie" in self.elements:
+            option_id = self.categories.get(categorie, "")
+            self._add_dropdown(plan, 2, "dropdown_categorie", option_id, categorie)
+            if option_id not in self.elements:
+                plan.warn(2, f"Catégorie non calibrée, sélection par libellé: {categorie}")
+
+        # 3-4. Numéro et suffixe
+        self._add_field(plan, 3, "field_numero", territory.get("numero", ""))
+        self._add_field(plan, 4, "field_suffixe", territory.get("suffixe", ""))
+
+        # 5. Type
+        type_value = territory.get("type", "").lower().strip()
+        if type_value:
+            option_id = TYPE_OPTIONS.get(type_value)
+            if option_id:
+                self._add_dropdown(plan, 5, "dropdown_type", option_id, type_value)
+
+                # Si type autre que "En présentiel", confirmer le modal
+                if type_value in TYPES_NEED_CONFIRM:
+                    if CONFIRM_TYPE_MODAL in self.confirmed_modals:
+                        plan.add("await_modal", 5, CONFIRM_TYPE_MODAL, delay="confirm_modal")
+                    elif "btn_confirm_type" in self.elements:
+                        plan.add("wait_for", 5, "btn_confirm_type", "enabled", "confirm_modal")
+                        plan.add("click", 5, "btn_confirm_type")
+            else:
+                plan.warn(5, f"Type inconnu: {type_value}")
+
+        # 6. Ville
+        ville = territory.get("ville", "").upper().strip()
+        if ville and "dropdown_ville" in self.elements:
+            option_id = self.villes.get(ville, "")
+            self._add_dropdown(plan, 6, "dropdown_ville", option_id, ville)
+            if option_id not in self.elements:
+                plan.warn(6, f"Ville non calibrée, sélection par libellé: {ville}")
+
+        # 7. Champs texte
+        for key, element in TEXT_FIELDS:
+            self._add_field(plan, 7, element, territory.get(key, ""))
+
+        # 8. Onglet Carte
+        if "btn_carte" in self.elements:
+            plan.add("click", 8, "btn_carte")
+            plan.add("wait_for", 8, "btn_import_pdf", "enabled", "navigation")
+
+        # 9. Import du fichier
+        if not no_save:
+            pdf_path = self.get_pdf_path(territory)
+            if pdf_path.exists():
+                plan.add("import", 9, value=str(pdf_path.resolve()))
+            else:
+                plan.warn(9, f"FICHIER NON TROUVÉ: {pdf_path}")
+
+        return plan
+
+    def plan_update(self, territory: dict, current: dict) -> TerritoryPlan:
+        """
+        Construit le plan de mise à jour d'un territoire déjà présent dans NWS.
+
+        Seules les valeurs qui diffèrent de celles affichées par NWS sont
+        saisies. Une valeur illisible (None) est considérée comme différente.
+        Les cellules vides ne sont pas propagées (comme à la création), et
+        le fichier PDF n'est pas réimporté.
+
+        Args:
+            territory: Dictionnaire avec les données du territoire
+            current: Valeurs affichées par NWS, par élément (voir UPDATE_FIELDS)
+
+        Returns:
+            Plan d'actions (mode "update"), vide si rien n'a changé
+        """
+        full = self.plan(territory, no_save=True)
+        plan = TerritoryPlan(territory_id=full.territory_id, mode="update", key=full.key)
+        changed_steps = set()
+
+        for action in full.actions:
+            if action.op in ("select", "paste") and action.target:
+                shown = current.get(action.target)
+                if shown is not None:
+                    if action.op == "select":
+                        same = shown.strip().upper() == action.value.strip().upper()
+                    else:
+                        same = shown.strip() == action.value.strip()
+                    if same:
+                        continue
+                changed_steps.add(action.step)
+                plan.actions.append(action)
+            elif action.step == 5 and 5 in changed_steps:
+                # Confirmation du modal après un changement de type
+                plan.actions.append(action)
+
+        plan.warnings = [w for w in full.warnings if w["step"] in changed_steps]
+        return plan
+
+    def plan_attachment(self, territory: dict) -> TerritoryPlan:
+        """
+        Construit le plan d'ajout du fichier PDF à un territoire déjà présent
+        dans NWS (par exemple créé par le fichier d'import en masse).
+
+        Returns:
+            Plan d'actions (mode "update"): onglet Carte et import du fichier
+        """
+        full = self.plan(territory)
+        return TerritoryPlan(
+            territory_id=full.territory_id,
+            key=full.key,
+            actions=[a for a in full.actions if a.step in (8, 9)],
+            warnings=[w for w in full.warnings if w["step"] in (8, 9)],
+            mode="update",
+        )
+
+    def _add_field(self, plan: TerritoryPlan, step: int, field_name: str, value: str):
+        """Ajoute la saisie d'un champ texte (ignorée si la valeur est vide)."""
+        if not value:
+            return
+        plan.add("paste", step, field_name, value)
+
+    def _add_dropdown(
+        self,
+        plan: TerritoryPlan,
+        step: int,
+        dropdown_name: str,
+        option_name: str,
+        value: str
+    ):
+        """
+        Ajoute la sélection d'une option dans un menu déroulant.
+
+        L'option est désignée par son libellé NWS; l'élément calibré n'est
+        conservé que comme secours. Une option inconnue est sélectionnée
+        par la valeur Excel elle-même (aucune calibration nécessaire).
+        """
+        label = self.labels.get(option_name, value)
+        fallback = option_name if option_name in self.elements else ""
+        plan.add("select", step, dropdown_name, label, "dropdown_open", fallback)
+
+
+class PlanExecutor:
+    """Rejoue un plan d'actions sur un NWSAutomator."""
+
+    def __init__(self, automator, tracer: Optional[Tracer] = None):
+        """
+        Initialise l'exécuteur.
+
+        Args:
+            automator: Automatiseur NWS (ou toute implémentation des mêmes primitives)
+            tracer: Traceur des durées par étape (défaut: désactivé)
+        """
+        self.automator = automator
+        self.tracer = tracer or Tracer()
+        self.logger = get_logger()
+
+    def execute(self, plan: TerritoryPlan, journal: Optional[StepJournal] = None):
+        """
+        Exécute toutes les actions du plan.
+
+        Args:
+            plan: Plan du territoire
+            journal: Journal des étapes; les étapes déjà terminées lors d'une
+                tentative précédente sont sautées, l'étape en échec y est notée
+
+        Raises:
+            ValueError: Si une opération est inconnue
+        """
+        actions_by_step: dict[int, list[Action]] = {}
+        for action in plan.actions:
+            actions_by_step.setdefault(action.step, []).append(action)
+
+        warnings_by_step: dict[int, list[str]] = {}
+        for warning in plan.warnings:
+            warnings_by_step.setdefault(warning["step"], []).append(warning["message"])
+
+        if plan.mode == "update":
+            # Mise à jour: seules les étapes modifiées sont affichées
+            steps = set(actions_by_step) | set(warnings_by_step)
+        else:
+            steps = set(STEP_LABELS) | set(actions_by_step)
+
+        for step in sorted(steps):
+            label = STEP_LABELS.get(step, '')
+            if journal is not None and journal.is_done(step):
+                self.logger.info(f"[ÉTAPE {step}] {label} (déjà faite)")
+                continue
+            self.logger.info(f"[ÉTAPE {step}] {label}")
+            for message in warnings_by_step.get(step, []):
+                self.logger.warning(f"  {message}")
+
+            try:
+                with self.tracer.span(f"ÉTAPE {step} {label}".strip(), "step", territory=plan.territory_id):
+                    for action in actions_by_step.get(step, []):
+                        self.run_action(action)
+            except Exception as e:
+                if journal is not None:
+                    journal.fail(step, e)
+                raise
+            if journal is not None:
+                journal.done(step)
+
+    def run_action(self, action: Action):
+        """
+        Exécute une action élémentaire.
+
+        Les actions de saisie détiennent le verrou de saisie de
+        l'automatiseur: la surveillance des dialogues n'envoie pas de touche
+        pendant ce temps. Les attentes le laissent libre.
+
+        Raises:
+            ActionFailed: Si l'import du fichier échoue
+        """
+        automator = self.automator
+        if hasattr(automator, "check_modals"):
+            # Dialogue inattendu: inutile de poursuivre le territoire
+            automator.check_modals()
+
+        input_lock = getattr(automator, "input_lock", None)
+        if input_lock is None or action.op in WAIT_OPS:
+            self._dispatch(action)
+        else:
+            with input_lock:
+                self._dispatch(action)
+
+    def _dispatch(self, action: Action):
+        automator = self.automator
+        if action.op == "click":
+            automator.click(action.target)
+        elif action.op == "paste":
+            if action.target:
+                automator.fill_field(action.target, action.value)
+            else:
+                automator.type_text(action.value)
+        elif action.op == "press":
+            automator.press(action.value)
+        elif action.op == "wait_for":
+            automator.wait_for(action.target, action.value, action.delay)
+        elif action.op == "await_modal":
+            automator.await_modal(action.target, action.delay)
+        elif action.op == "select":
+            automator.select_dropdown_value(action.target, action.value, action.option)
+        elif action.op == "import":
+            if automator.import_pdf(Path(action.value)) is False:
+                raise ActionFailed(f"Import du fichier échoué: {Path(action.value).name}")
+        else:
+            raise ValueError(f"Opération inconnue: {action.op}")
+
+
+def save_plans(plans: Iterable[TerritoryPlan], path: Path) -> int:
+    """
+    Sauvegarde des plans en JSON (liste) ou JSONL (un plan par ligne).
+
+    Args:
+        plans: Plans à sauvegarder
+        path: Fichier de destination (.json ou .jsonl)
+
+    Returns:
+        Nombre de plans écrits
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+
+    with open(path, "w", encoding="utf-8") as f:
+        if path.suffix.lower() == ".jsonl":
+            for plan in plans:
+                f.write(json.dumps(plan.to_dict(), ensure_ascii=False) + "\n")
+                count += 1
+        else:
+            data = [plan.to_dict() for plan in plans]
+            json.dump(data, f, indent=2, ensure_ascii=False)
+            count = len(data)
+
+    return count
+
+
+def load_plans(path: Path) -> list[TerritoryPlan]:
+    """
+    Charge des plans depuis un fichier JSON ou JSONL.
+
+    Raises:
+        ValueError: Si une action utilise une opération inconnue
+    """
+    path = Path(path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        if path.suffix.lower() == ".jsonl":
+            data = [json.loads(line) for line in f if line.strip()]
+        else:
+            data = json.load(f)
+
+    plans = [TerritoryPlan.from_dict(item) for item in data]
+    for plan in plans:
+        for action in plan.actions:
+            if action.op not in ACTION_OPS:
+                raise ValueError(
+                    f"Opération inconnue dans le plan {plan.territory_id}: {action.op}"
+                )
+    return plans
@@ -0,0 +1,403 @@
+"""
+Profils de calibration par disposition d'écran.
+
+Les coordonnées calibrées ne valent que pour une disposition donnée: taille
+de l'écran, échelle d'affichage Windows (DPI) et position/taille de la
+fenêtre NWS. data/calibration.json contient donc un profil par disposition,
+et celui qui correspond à l'écran détecté est choisi au démarrage.
+
+Pour une disposition jamais calibrée mais proportionnelle à un profil
+existant (fenêtre déplacée, ou agrandie dans le même rapport que l'échelle
+d'affichage), les coordonnées sont dérivées par une transformation affine
+calculée une fois, au lieu d'imposer une nouvelle calibration.
+
+Format du fichier:
+    {
+      "active": "1920x1080@100%/1280x800",
+      "profiles": {
+        "1920x1080@100%/1280x800": {
+          "layout": {"screen": [1920, 1080], "scale": 1.0, "window": [0, 0, 1280, 800]},
+          "coordinates": {"btn_new_territory": [50, 150], ...}
+        }
+      }
+    }
+
+L'ancien format (coordonnées à plat) est lu comme un profil unique "default".
+"""
+
+import ctypes
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .logger_setup import get_logger
+
+
+# Nom du profil des calibrations sans disposition connue (ancien format)
+DEFAULT_PROFILE = "default"
+
+# Écart relatif toléré entre les rapports d'agrandissement (proportionnalité)
+PROFILE_TOLERANCE = 0.02
+
+# Écart toléré (pixels) pour considérer deux fenêtres comme identiques
+POSITION_TOLERANCE = 2
+
+
+@dataclass(frozen=True)
+class Layout:
+    """
+    Disposition de l'écran lors d'une calibration ou d'une exécution.
+
+    Attributes:
+        screen: Taille de l'écran principal (largeur, hauteur) en pixels physiques
+        scale: Échelle d'affichage Windows (1.0 = 100%, 1.25 = 125%...)
+        window: Fenêtre NWS (gauche, haut, largeur, hauteur), None si inconnue
+    """
+    screen: tuple[int, int]
+    scale: float = 1.0
+    window: Optional[tuple[int, int, int, int]] = None
+
+    @property
+    def key(self) -> str:
+        """Nom du profil (ex: "1920x1080@125%/1280x800")."""
+        name = f"{self.screen[0]}x{self.screen[1]}@{round(self.scale * 100)}%"
+        if self.window is not None:
+            name += f"/{self.window[2]}x{self.window[3]}"
+        return name
+
+    def to_dict(self) -> dict:
+        return {
+            "screen": list(self.screen),
+            "scale": self.scale,
+            "window": list(self.window) if self.window is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> Optional["Layout"]:
+        if not data or "screen" not in data:
+            return None
+        window = data.get("window")
+        return cls(
+            screen=tuple(data["screen"]),
+            scale=float(data.get("scale", 1.0)),
+            window=tuple(window) if window else None,
+        )
+
+
+class Affine:
+    """
+    Transformation affine des coordonnées: x' = a.x + b.y + c, y' = d.x + e.y + f.
+
+    La matrice est calculée une fois (between()) puis appliquée à tous les
+    éléments d'un profil.
+    """
+
+    __slots__ = ("a", "b", "c", "d", "e", "f")
+
+    def __init__(self, a: float, b: float, c: float, d: float, e: float, f: float):
+        self.a, self.b, self.c = a, b, c
+        self.d, self.e, self.f = d, e, f
+
+    @classmethod
+    def between(
+        cls,
+        source: Layout,
+        target: Layout,
+        tolerance: float = PROFILE_TOLERANCE
+    ) -> Optional["Affine"]:
+        """
+        Transformation d'une disposition calibrée vers une disposition proportionnelle.
+
+        Les fenêtres NWS sont comparées si elles sont connues des deux côtés,
+        sinon les écrans. La disposition est proportionnelle si le rapport
+        d'agrandissement est le même en largeur et en hauteur, et égal au
+        rapport des échelles d'affichage (les contrôles Windows ne grandissent
+        qu'avec le DPI).
+
+        Returns:
+            Affine, ou None si les dispositions ne sont pas proportionnelles
+        """
+        if source.window is not None and target.window is not None:
+            source_frame, target_frame = source.window, target.window
+        else:
+            source_frame = (0, 0, *source.screen)
+            target_frame = (0, 0, *target.screen)
+
+        left, top, width, height = source_frame
+        new_left, new_top, new_width, new_height = target_frame
+        if width <= 0 or height <= 0:
+            return None
+
+        ratio_x, ratio_y = new_width / width, new_height / height
+        ratio_dpi = target.scale / source.scale
+        if not (_close(ratio_x, ratio_y, tolerance) and _close(ratio_x, ratio_dpi, tolerance)):
+            return None
+
+        ratio = ratio_dpi
+        return cls(ratio, 0.0, new_left - ratio * left, 0.0, ratio, new_top - ratio * top)
+
+    @property
+    def is_identity(self) -> bool:
+        """True si la transformation ne déplace aucun point de plus d'un demi-pixel."""
+        return (
+            math.isclose(self.a, 1.0) and math.isclose(self.e, 1.0)
+            and self.b == 0 and self.d == 0
+            and abs(self.c) < 0.5 and abs(self.f) < 0.5
+        )
+
+    def apply(self, x: float, y: float) -> tuple[int, int]:
+        """Transforme un point (arrondi au pixel)."""
+        return (
+            round(self.a * x + self.b * y + self.c),
+            round(self.d * x + self.e * y + self.f),
+        )
+
+    def apply_all(self, coordinates: dict) -> dict:
+        """Transforme toutes les coordonnées d'un profil."""
+        return {name: self.apply(*point[:2]) for name, point in coordinates.items()}
+
+    def describe(self) -> str:
+        return f"x{self.a:.3g}, décalage ({self.c:+.0f}, {self.f:+.0f})"
+
+
+def _close(a: float, b: float, tolerance: float) -> bool:
+    return abs(a - b) <= tolerance * max(abs(a), abs(b))
+
+
+@dataclass
+class ProfileChoice:
+    """
+    Profil retenu pour une disposition.
+
+    Attributes:
+        profile: Nom du profil calibré utilisé (None si aucune calibration)
+        coordinates: Coordonnées (transformées si dérivées)
+        transform: Transformation appliquée, None si le profil est utilisé tel quel
+        detail: Explication du choix (pour le journal)
+    """
+    profile: Optional[str]
+    coordinates: dict
+    transform: Optional[Affine] = None
+    detail: str = ""
+
+
+class CalibrationProfiles:
+    """Profils de calibration enregistrés dans data/calibration.json."""
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: Fichier de calibration (profils, ou ancien format à plat)
+        """
+        self.path = Path(path)
+        self.active: Optional[str] = None
+        self.profiles: dict[str, dict] = {}
+        self.load()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.profiles
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def load(self):
+        """Charge les profils (l'ancien format devient le profil "default")."""
+        self.profiles = {}
+        self.active = None
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+
+        if isinstance(data.get("profiles"), dict):
+            for name, profile in data["profiles"].items():
+                self.profiles[name] = {
+                    "layout": Layout.from_dict(profile.get("layout")),
+                    "coordinates": _points(profile.get("coordinates", {})),
+                }
+            self.active = data.get("active")
+        elif data:
+            self.profiles[DEFAULT_PROFILE] = {"layout": None, "coordinates": _points(data)}
+            self.active = DEFAULT_PROFILE
+
+        if self.active not in self.profiles:
+            self.active = next(iter(self.profiles), None)
+
+    def save(self):
+        """Écrit tous les profils dans le fichier de calibration."""
+        data = {
+            "active": self.active,
+            "profiles": {
+                name: {
+                    "layout": profile["layout"].to_dict() if profile["layout"] else None,
+                    "coordinates": {k: list(v) for k, v in profile["coordinates"].items()},
+                }
+                for name, profile in self.profiles.items()
+            },
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def store(self, layout: Optional[Layout], coordinates: dict) -> str:
+        """
+        Enregistre les coordonnées calibrées pour une disposition (profil actif).
+
+        Args:
+            layout: Disposition de la calibration (None = profil "default")
+            coordinates: Coordonnées des éléments
+
+        Returns:
+            Nom du profil enregistré
+        """
+        name = layout.key if layout is not None else DEFAULT_PROFILE
+        self.profiles[name] = {"layout": layout, "coordinates": _points(coordinates)}
+        self.active = name
+        self.save()
+        return name
+
+    def select(
+        self,
+        layout: Optional[Layout],
+        name: Optional[str] = None,
+        tolerance: float = PROFILE_TOLERANCE
+    ) -> ProfileChoice:
+        """
+        Choisit le profil correspondant à une disposition.
+
+        Ordre: profil imposé, profil identique, profil proportionnel (coordonnées
+        transformées, le plus proche en échelle), puis profil actif en dernier
+        recours (avec avertissement dans `detail`).
+
+        Args:
+            layout: Disposition détectée (None si non détectable)
+            name: Profil imposé (--profile)
+            tolerance: Écart relatif toléré entre les rapports d'agrandissement
+
+        Raises:
+            KeyError: Si le profil imposé n'existe pas
+        """
+        if not self.profiles:
+            return ProfileChoice(None, {}, detail="aucune calibration")
+
+        if name is not None:
+            return ProfileChoice(name, dict(self.profiles[name]["coordinates"]), detail=f"profil imposé {name}")
+
+        if layout is None:
+            return self._fallback("disposition de l'écran non détectable")
+
+        candidates = []
+        for profile_name, profile in self.profiles.items():
+            if profile["layout"] is None:
+                continue
+            transform = Affine.between(profile["layout"], layout, tolerance)
+            if transform is None:
+                continue
+            if transform.is_identity and _same_window(profile["layout"], layout):
+                return ProfileChoice(
+                    profile_name, dict(profile["coordinates"]), detail=f"profil {profile_name}"
+                )
+            candidates.append((abs(math.log(transform.a)), profile_name, transform))
+
+        if candidates:
+            _, profile_name, transform = min(candidates, key=lambda c: c[:2])
+            return ProfileChoice(
+                profile_name,
+                transform.apply_all(self.profiles[profile_name]["coordinates"]),
+                transform,
+                detail=f"dérivé du profil {profile_name} pour {layout.key} ({transform.describe()})",
+            )
+
+        return self._fallback(f"aucun profil pour {layout.key}")
+
+    def _fallback(self, reason: str) -> ProfileChoice:
+        profile = self.profiles[self.active]
+        detail = f"profil {self.active}"
+        if profile["layout"] is not None:
+            detail += f" ({reason})"
+        return ProfileChoice(self.active, dict(profile["coordinates"]), detail=detail)
+
+
+def _points(coordinates: dict) -> dict:
+    """Convertit les coordonnées JSON (listes) en tuples."""
+    return {k: tuple(v) if isinstance(v, list) else v for k, v in coordinates.items()}
+
+
+def _same_window(calibrated: Layout, current: Layout) -> bool:
+    """Fenêtres identiques, ou fenêtre inconnue d'un côté (écran identique)."""
+    if calibrated.window is None or current.window is None:
+        return True
+    return all(abs(a - b) <= POSITION_TOLERANCE for a, b in zip(calibrated.window, current.window))
+
+
+def find_window(title: str) -> Optional[int]:
+    """
+    Cherche une fenêtre visible dont le titre contient `title`.
+
+    Returns:
+        Handle de la fenêtre, ou None (introuvable, ou hors Windows)
+    """
+    if not hasattr(ctypes, "windll"):
+        return None
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    found = []
+
+    @ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+    def visit(handle, _):
+        if user32.IsWindowVisible(handle):
+            length = user32.GetWindowTextLengthW(handle)
+            buffer = ctypes.create_unicode_buffer(length + 1)
+            user32.GetWindowTextW(handle, buffer, length + 1)
+            if title in buffer.value:
+                found.append(handle)
+                return False
+        return True
+
+    user32.EnumWindows(visit, 0)
+    return found[0] if found else None
+
+
+def detect_layout(handle: Optional[int] = None) -> Optional[Layout]:
+    """
+    Détecte la disposition de l'écran (et de la fenêtre NWS si `handle` est donné).
+
+    Les tailles sont en pixels physiques, comme les coordonnées de pyautogui
+    (le processus est déclaré « DPI aware »).
+
+    Returns:
+        Layout, ou None hors Windows
+    """
+    if not hasattr(ctypes, "windll"):
+        return None
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    try:
+        user32.SetProcessDPIAware()
+    except Exception:
+        pass
+
+    try:
+        screen = (user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
+        try:
+            dpi = user32.GetDpiForSystem()
+        except AttributeError:
+            # Windows antérieur à 10 (1607)
+            dpi = 96
+        window = None
+        if handle:
+            rect = wintypes.RECT()
+            if user32.GetWindowRect(handle, ctypes.byref(rect)):
+                window = (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+    except Exception as e:
+        get_logger().debug(f"Disposition de l'écran non détectée: {e}")
+        return None
+
+    return Layout(screen, round(dpi / 96, 2), window)
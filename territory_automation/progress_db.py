@@ -0,0 +1,372 @@
+"""
+Suivi de progression dans une base SQLite, partageable entre processus.
+
+Même interface que ProgressTracker (data_loader.py), plus:
+- claim(): réserve un territoire de façon atomique, pour que plusieurs
+  imports lancés sur différentes sessions NWS ne saisissent jamais le même;
+- un historique des tentatives (session, début, fin, résultat) par territoire;
+- des requêtes indexées sur les territoires traités, en échec ou en cours.
+
+La base est en mode WAL: les lectures ne bloquent pas les écritures, et
+chaque écriture est une transaction courte. Le fichier doit être sur un
+disque local (SQLite ne gère pas le verrouillage sur un partage réseau).
+"""
+
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional
+
+from .logger_setup import get_logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS territories (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    hash TEXT,
+    claimed_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS territories_status ON territories(status);
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    territory_id TEXT NOT NULL,
+    owner TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS attempts_territory ON attempts(territory_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# États d'un territoire (une réservation en cours est notée à part: owner, claimed_at)
+PENDING = "pending"
+PROCESSED = "processed"
+FAILED = "failed"
+
+
+class SQLiteProgressTracker:
+    """Suit la progression dans une base SQLite (mode WAL)."""
+
+    def __init__(
+        self,
+        db_file: Path,
+        sync_every: int = 1,
+        owner: Optional[str] = None,
+        claim_timeout: float = 600.0,
+        seed_from: Optional[Path] = None
+    ):
+        """
+        Initialise le tracker.
+
+        Args:
+            db_file: Chemin de la base SQLite
+            sync_every: 1 = chaque écriture est sur le disque avant de continuer
+                (synchronous=FULL); autre valeur = synchronous=NORMAL (seule une
+                coupure de courant peut perdre les dernières écritures)
+            owner: Nom de la session qui traite les territoires (défaut: poste-pid)
+            claim_timeout: Délai (secondes) après lequel un territoire réservé par
+                une session arrêtée brutalement peut être repris
+            seed_from: Journal JSONL dont la progression est reprise si la base est
+                vide (passage de ProgressTracker à SQLite sans tout refaire)
+        """
+        self.progress_file = Path(db_file)
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.claim_timeout = claim_timeout
+        self.logger = get_logger()
+        # Territoires traités / en échec, relus seulement si la base a changé
+        self._snapshot_cache = None
+        self._writes = 0
+
+        self.progress_file.parent.mkdir(parents=True, exist_ok=True)
+        # Transactions explicites (BEGIN IMMEDIATE) pour les réservations
+        self.db = sqlite3.connect(self.progress_file, timeout=30.0, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"PRAGMA synchronous={'FULL' if sync_every == 1 else 'NORMAL'}")
+        self.db.executescript(SCHEMA)
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(territories)")}
+        if "hash" not in columns:
+            self.db.execute("ALTER TABLE territories ADD COLUMN hash TEXT")
+
+        # Le journal n'est repris qu'une fois, à la création de la base: une
+        # base vidée ensuite par reset() reste vide
+        if self._meta("seeded") is None:
+            if seed_from is not None and self._count() == 0:
+                self._seed(Path(seed_from))
+            self._set_meta("seeded", "1")
+
+        summary = self.get_summary()
+        if summary["processed_count"] or summary["failed_count"]:
+            self.logger.info(
+                f"Progression chargée: {summary['processed_count']} traités, "
+                f"{summary['failed_count']} en erreur ({self.progress_file.name})"
+            )
+
+    def _count(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM territories").fetchone()[0]
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+
+    def _seed(self, journal_file: Path):
+        """Reprend la progression d'un journal JSONL (ou d'un ancien fichier JSON)."""
+        from .data_loader import ProgressTracker
+
+        if not journal_file.with_suffix(".jsonl").exists() and not journal_file.with_suffix(".json").exists():
+            return
+        journal = ProgressTracker(journal_file)
+        now = time.time()
+        self._writes += 1
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.executemany(
+                "INSERT OR IGNORE INTO territories (id, status, hash, updated_at) VALUES (?, ?, ?, ?)",
+                [(territory_id, PROCESSED, journal.hashes.get(territory_id), now)
+                 for territory_id in journal.processed]
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO territories (id, status, error, updated_at) VALUES (?, ?, ?, ?)",
+                [(territory_id, FAILED, error, now) for territory_id, error in journal.failed.items()]
+            )
+        journal.close()
+        self.logger.info(f"Progression reprise de {journal.progress_file.name}")
+
+    # =========================================================================
+    # Interface de ProgressTracker
+    # =========================================================================
+
+    def _snapshot(self) -> tuple[set[str], dict[str, str], dict[str, str]]:
+        """
+        Territoires traités, empreintes et échecs, lus en une requête.
+
+        Le résultat est conservé tant que la base n'a pas changé (écriture de
+        cette session, ou d'une autre session: PRAGMA data_version).
+        """
+        version = (self.db.execute("PRAGMA data_version").fetchone()[0], self._writes)
+        if self._snapshot_cache is None or self._snapshot_cache[0] != version:
+            processed, hashes, failed = set(), {}, {}
+            rows = self.db.execute(
+                "SELECT id, status, hash, error FROM territories "
+                "WHERE status IN (?, ?) ORDER BY updated_at",
+                (PROCESSED, FAILED)
+            )
+            for territory_id, status, content_hash, error in rows:
+                if status == PROCESSED:
+                    processed.add(territory_id)
+                    if content_hash is not None:
+                        hashes[territory_id] = content_hash
+                    if error is not None:
+                        failed[territory_id] = error
+                else:
+                    failed[territory_id] = error or ""
+            self._snapshot_cache = (version, (processed, hashes, failed))
+        return self._snapshot_cache[1]
+
+    @property
+    def processed(self) -> set[str]:
+        """Territoires traités (ne pas modifier)."""
+        return self._snapshot()[0]
+
+    @property
+    def hashes(self) -> dict[str, str]:
+        """Empreinte du contenu de chaque territoire traité (si connue)."""
+        return self._snapshot()[1]
+
+    @property
+    def failed(self) -> dict[str, str]:
+        """
+        Territoires en échec (identifiant -> dernière erreur), y compris les
+        territoires traités dont la mise à jour a ensuite échoué.
+        """
+        return self._snapshot()[2]
+
+    def is_processed(self, territory_id: str) -> bool:
+        """Vérifie si un territoire a déjà été traité (par n'importe quelle session)."""
+        row = self.db.execute(
+            "SELECT 1 FROM territories WHERE id = ? AND status = ?", (territory_id, PROCESSED)
+        ).fetchone()
+        return row is not None
+
+    def claim(self, territory_id: str, content_hash: str = "") -> bool:
+        """
+        Réserve un territoire pour cette session (opération atomique).
+
+        Args:
+            territory_id: Identité du territoire (numéro + suffixe)
+            content_hash: Empreinte du contenu à traiter; un territoire déjà
+                traité est réservé à nouveau si son empreinte a changé
+
+        Returns:
+            False si le territoire est déjà traité (avec ce contenu), ou réservé par une autre
+            session depuis moins de `claim_timeout` secondes (un territoire en
+            échec peut être repris par n'importe quelle session)
+        """
+        now = time.time()
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            row = self.db.execute(
+                "SELECT status, owner, claimed_at, hash FROM territories WHERE id = ?", (territory_id,)
+            ).fetchone()
+            if row is not None:
+                status, owner, claimed_at, recorded = row
+                if status == PROCESSED and not (content_hash and recorded and recorded != content_hash):
+                    return False
+                if claimed_at is not None and owner != self.owner and now - claimed_at < self.claim_timeout:
+                    return False
+
+            # L'état n'est pas modifié: un territoire traité puis modifié reste traité
+            self.db.execute(
+                """
+                INSERT INTO territories (id, status, owner, attempts, claimed_at, updated_at)
+                VALUES (?, ?, ?, 1, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    owner = excluded.owner, attempts = attempts + 1,
+                    claimed_at = excluded.claimed_at, updated_at = excluded.updated_at
+                """,
+                (territory_id, PENDING, self.owner, now, now)
+            )
+            self.db.execute(
+                "INSERT INTO attempts (territory_id, owner, started_at) VALUES (?, ?, ?)",
+                (territory_id, self.owner, now)
+            )
+        return True
+
+    def _finish(
+        self,
+        territory_id: str,
+        status: str,
+        error: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ):
+        """
+        Termine la tentative en cours (réservée par claim(), ou implicite).
+
+        Un échec sur un territoire déjà traité (mise à jour d'une ligne
+        modifiée) le laisse traité, avec l'erreur: il ne doit pas être recréé.
+        """
+        now = time.time()
+        self._writes += 1
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            updated = self.db.execute(
+                """
+                UPDATE attempts SET finished_at = ?, status = ?, error = ?
+                WHERE id = (
+                    SELECT MAX(id) FROM attempts
+                    WHERE territory_id = ? AND owner = ? AND finished_at IS NULL
+                )
+                """,
+                (now, status, error, territory_id, self.owner)
+            ).rowcount
+            if not updated:
+                self.db.execute(
+                    """
+                    INSERT INTO attempts (territory_id, owner, started_at, finished_at, status, error)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (territory_id, self.owner, now, now, status, error)
+                )
+            self.db.execute(
+                """
+                INSERT INTO territories (id, status, attempts, error, hash, updated_at)
+                VALUES (?, ?, 1, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    status = CASE WHEN status = ? THEN status ELSE excluded.status END,
+                    error = excluded.error, hash = COALESCE(excluded.hash, hash),
+                    attempts = attempts + ?, owner = NULL, claimed_at = NULL,
+                    updated_at = excluded.updated_at
+                """,
+                (territory_id, status, error, content_hash, now, PROCESSED, 0 if updated else 1)
+            )
+
+    def mark_processed(self, territory_id: str, content_hash: str = ""):
+        """Marque un territoire comme traité (avec l'empreinte du contenu traité, si connue)."""
+        self._finish(territory_id, PROCESSED, content_hash=content_hash or None)
+
+    def mark_failed(self, territory_id: str, error: str):
+        """Marque un territoire comme en erreur (la dernière erreur est conservée)."""
+        self._finish(territory_id, FAILED, error)
+
+    def reset(self):
+        """Réinitialise la progression (toutes les sessions, sans reprendre le journal ensuite)."""
+        self._writes += 1
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute("DELETE FROM attempts")
+            self.db.execute("DELETE FROM territories")
+        self.logger.info("Progression réinitialisée")
+
+    def sync(self):
+        """Les écritures sont validées à chaque opération (rien à faire)."""
+        pass
+
+    def close(self):
+        """Libère les territoires réservés par cette session et ferme la base."""
+        if self.db is None:
+            return
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            self.db.execute(
+                "UPDATE territories SET owner = NULL, claimed_at = NULL WHERE owner = ?",
+                (self.owner,)
+            )
+        self.db.close()
+        self.db = None
+
+    def get_summary(self) -> dict:
+        """Retourne un résumé de la progression."""
+        processed, _, failed = self._snapshot()
+        return {
+            "processed_count": len(processed),
+            "failed_count": len(failed),
+            "failed_territories": [{"id": k, "error": v} for k, v in failed.items()],
+        }
+
+    # =========================================================================
+    # Requêtes
+    # =========================================================================
+
+    def pending(self) -> list[dict]:
+        """Territoires en cours (réservés) ou jamais terminés (session, date de réservation)."""
+        rows = self.db.execute(
+            "SELECT id, status, owner, claimed_at, attempts FROM territories "
+            "WHERE status = ? OR claimed_at IS NOT NULL ORDER BY updated_at",
+            (PENDING,)
+        )
+        return [
+            {"id": r[0], "status": r[1], "owner": r[2], "claimed_at": r[3], "attempts": r[4]}
+            for r in rows
+        ]
+
+    def history(self, territory_id: str) -> list[dict]:
+        """Tentatives d'un territoire, de la plus ancienne à la plus récente."""
+        rows = self.db.execute(
+            "SELECT owner, started_at, finished_at, status, error FROM attempts "
+            "WHERE territory_id = ? ORDER BY id",
+            (territory_id,)
+        )
+        return [
+            {"owner": r[0], "started_at": r[1], "finished_at": r[2], "status": r[3], "error": r[4]}
+            for r in rows
+        ]
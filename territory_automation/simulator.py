@@ -0,0 +1,677 @@
+"""
+Simulateur headless de New World Scheduler.
+
+Modélise l'écran des territoires (navigation, formulaire, menus déroulants,
+modal de confirmation du type, boîte de dialogue d'ouverture de fichier) en
+pur Python. Le simulateur implémente à la fois le backend GUI (clics, touches,
+presse-papiers) et la sonde UI (UIProbe): NWSAutomator et run_automation
+tournent donc sans bureau Windows, par exemple sous Linux en CI.
+
+Les temps de réponse sont configurables par type d'événement, et des échecs
+peuvent être injectés (clics perdus, plantage après N actions, messages
+d'erreur inattendus).
+"""
+
+import itertools
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Optional
+
+import numpy as np
+
+from .backends import GUIBackend, WindowConnection
+from .planner import DEFAULT_OPTION_LABELS
+from .waits import UIProbe
+
+
+# Titre des fenêtres simulées
+MAIN_WINDOW_TITLE = "NW Scheduler"
+CONFIRM_MODAL_TITLE = "Êtes-vous sûr ?"
+FILE_DIALOG_TITLE = "Ouvrir"
+STARTUP_TIP_TITLE = "Astuce du jour"
+ERROR_POPUP_TITLE = "Erreur"
+
+# Handles des fenêtres simulées (un nouveau handle à chaque ouverture d'un
+# dialogue, comme sous Windows: voir _open_window)
+WINDOW_HANDLES = {
+    MAIN_WINDOW_TITLE: 1,
+    CONFIRM_MODAL_TITLE: 2,
+    STARTUP_TIP_TITLE: 3,
+    FILE_DIALOG_TITLE: 4,
+    ERROR_POPUP_TITLE: 5,
+}
+
+# Champs texte du formulaire (élément -> clé du territoire)
+FORM_FIELDS = {
+    "field_numero": "numero",
+    "field_suffixe": "suffixe",
+    "field_lien_gps": "lien_gps",
+    "field_notes": "notes",
+    "field_ne_pas_visiter": "ne_pas_visiter",
+    "field_notes_proclamateur": "notes_proclamateur",
+}
+
+# Menus déroulants (élément -> clé du territoire, options)
+FORM_DROPDOWNS = {
+    "dropdown_categorie": ("categorie", ["dropdown_option_sar"]),
+    "dropdown_type": ("type", [
+        "dropdown_option_presentiel",
+        "dropdown_option_courrier",
+        "dropdown_option_telephone",
+        "dropdown_option_entreprise",
+    ]),
+    "dropdown_ville": ("ville", [
+        "dropdown_ville_aucun",
+        "dropdown_ville_carrieres",
+        "dropdown_ville_maisons",
+        "dropdown_ville_mesnil",
+        "dropdown_ville_montesson",
+        "dropdown_ville_sartrouville",
+    ]),
+}
+
+NAVIGATION_ELEMENTS = [
+    "btn_menu_territoires",
+    "btn_liste_territoires",
+    "btn_new_territory",
+    "field_search_territory",
+    "list_first_territory",
+]
+FORM_BUTTONS = ["btn_confirm_type", "btn_carte", "btn_import_pdf"]
+
+# Type par défaut d'un nouveau territoire (pas de modal de confirmation)
+DEFAULT_TYPE = "En présentiel"
+
+# Latences par défaut (secondes): réponse instantanée
+DEFAULT_LATENCY = {
+    "launch": 0.0,      # Démarrage de l'application
+    "navigation": 0.0,  # Menus, onglets, nouveau formulaire
+    "input": 0.0,       # Collage / écriture d'une valeur
+    "dropdown": 0.0,    # Ouverture d'un menu déroulant
+    "modal": 0.0,       # Apparition du modal de confirmation
+    "dialog": 0.0,      # Ouverture/fermeture de la boîte "Ouvrir"
+}
+
+
+class _SimWindow:
+    """Fenêtre simulée (interface minimale utilisée par NWSAutomator)."""
+
+    def __init__(self, simulator: "NWSSimulator", title: str):
+        self.simulator = simulator
+        self.title = title
+
+    def set_focus(self):
+        self.simulator._advance()
+
+    def activate(self):
+        self.simulator._advance()
+
+
+class _SimProcess:
+    """Processus NWS simulé (interface de subprocess.Popen utilisée au lancement)."""
+
+    def __init__(self, simulator: "NWSSimulator"):
+        self.simulator = simulator
+
+    def poll(self) -> Optional[int]:
+        return 1 if self.simulator.crashed else None
+
+
+class NWSSimulator(GUIBackend, UIProbe):
+    """Interface NWS simulée: backend GUI et sonde UI à la fois."""
+
+    def __init__(
+        self,
+        latency: Optional[dict] = None,
+        latency_scale: float = 1.0,
+        miss_rate: float = 0.0,
+        error_rate: float = 0.0,
+        fail_elements: Optional[list] = None,
+        crash_after: Optional[int] = None,
+        running: bool = True,
+        startup_tip: bool = False,
+        value_pattern: bool = True,
+        uia_selection: bool = True,
+        extra_villes: Optional[list] = None,
+        records: Optional[list[dict]] = None,
+        sleep_scale: float = 0.0,
+        seed: int = 0
+    ):
+        """
+        Initialise le simulateur.
+
+        Args:
+            latency: Latences par type d'événement (voir DEFAULT_LATENCY)
+            latency_scale: Facteur appliqué à toutes les latences
+            miss_rate: Probabilité qu'un clic soit perdu
+            error_rate: Probabilité qu'un clic fasse apparaître un message d'erreur
+            fail_elements: Éléments dont les clics sont toujours perdus
+            crash_after: Nombre d'actions après lequel l'application plante
+            running: Si True, NWS est déjà lancé
+            startup_tip: Si True, une astuce s'affiche au démarrage
+            value_pattern: Si True, les champs acceptent l'écriture directe (ValuePattern)
+            uia_selection: Si True, les menus acceptent la sélection directe par libellé
+            extra_villes: Villes supplémentaires présentes dans NWS mais non calibrées
+            records: Territoires déjà présents dans NWS (valeurs affichées par champ)
+            sleep_scale: Facteur appliqué aux pauses fixes (0 = pas de pause)
+            seed: Graine du générateur aléatoire (échecs reproductibles)
+        """
+        self.latency = {k: v * latency_scale for k, v in {**DEFAULT_LATENCY, **(latency or {})}.items()}
+        self.miss_rate = miss_rate
+        self.error_rate = error_rate
+        self.fail_elements = set(fail_elements or [])
+        self.crash_after = crash_after
+        self.startup_tip = startup_tip
+        self.value_pattern = value_pattern
+        self.uia_selection = uia_selection
+        self.sleep_scale = sleep_scale
+        self.rng = random.Random(seed)
+        self.pid = 4242
+
+        # Options des menus (clé d'option -> libellé)
+        self.labels = dict(DEFAULT_OPTION_LABELS)
+        self.dropdown_labels = {
+            name: [self.labels[o] for o in options]
+            for name, (_, options) in FORM_DROPDOWNS.items()
+        }
+        self.dropdown_labels["dropdown_ville"] += list(extra_villes or [])
+
+        # Disposition: un point unique par élément
+        names = (
+            NAVIGATION_ELEMENTS + list(FORM_DROPDOWNS)
+            + [o for _, options in FORM_DROPDOWNS.values() for o in options]
+            + list(FORM_FIELDS) + FORM_BUTTONS
+        )
+        self.coordinates = {name: (20 + 40 * i, 300) for i, name in enumerate(names)}
+        self._by_point = {point: name for name, point in self.coordinates.items()}
+        self._option_dropdown = {
+            option: name for name, (_, options) in FORM_DROPDOWNS.items() for option in options
+        }
+
+        # État de l'application
+        self.ready_at: Optional[float] = time.monotonic() if running else None
+        self.crashed = False
+        self.tip_open = startup_tip and running
+        self.screen = "home"
+        self.form: Optional[dict] = None
+        self.tab = "details"
+        self.open_dropdown: Optional[str] = None
+        self.typeahead = ""
+        self.modal_type: Optional[str] = None
+        self.dialog: Optional[dict] = None
+        self.error_open = False
+        self.focus: Optional[str] = None
+        self.select_all = False
+        self.search = ""
+        self.clipboard = ""
+        self.pause = 0.0
+        self._openings: Counter = Counter()
+
+        # Territoires créés dans NWS (dans l'ordre de création)
+        self.records: list[dict] = [self._empty_form() | dict(r) for r in records or []]
+
+        # Événements différés (échéance, ordre, effet)
+        self._events: list = []
+        self._counter = itertools.count()
+        # La surveillance des dialogues interroge le simulateur depuis un autre thread
+        self._lock = threading.RLock()
+
+        self.stats = {"actions": 0, "missed_clicks": 0, "blocked_clicks": 0, "errors": 0}
+
+    def automator_kwargs(self) -> dict:
+        """Paramètres de NWSAutomator pour piloter ce simulateur."""
+        return {
+            "backend": self,
+            "probe": self,
+            "coordinates": dict(self.coordinates),
+            "locators": {},
+        }
+
+    # =========================================================================
+    # Moteur d'événements
+    # =========================================================================
+
+    def _advance(self):
+        """Applique les événements dont l'échéance est passée."""
+        if not self._events:
+            return
+        with self._lock:
+            now = time.monotonic()
+            due = [e for e in self._events if e[0] <= now]
+            if not due:
+                return
+            self._events = [e for e in self._events if e[0] > now]
+            for _, _, effect in sorted(due, key=lambda e: (e[0], e[1])):
+                effect()
+
+    def _schedule(self, kind: str, effect):
+        """Programme un effet après la latence du type donné."""
+        delay = self.latency.get(kind, 0.0)
+        if delay <= 0:
+            effect()
+        else:
+            self._events.append((time.monotonic() + delay, next(self._counter), effect))
+
+    def _action(self):
+        """Compte une action et déclenche un éventuel plantage."""
+        self._advance()
+        self.stats["actions"] += 1
+        if self.crash_after is not None and self.stats["actions"] > self.crash_after:
+            self.crashed = True
+            self._events.clear()
+
+    @property
+    def running(self) -> bool:
+        return (
+            not self.crashed
+            and self.ready_at is not None
+            and time.monotonic() >= self.ready_at
+        )
+
+    # =========================================================================
+    # Modèle de l'interface
+    # =========================================================================
+
+    def _visible(self, name: str) -> bool:
+        """Indique si un élément est affiché."""
+        if not self.running:
+            return False
+        if name == "btn_menu_territoires":
+            return True
+        if name == "btn_liste_territoires":
+            return self.screen in ("menu", "list")
+        if name in ("btn_new_territory", "field_search_territory"):
+            return self.screen == "list"
+        if name == "list_first_territory":
+            return self.screen == "list" and self._search_result() is not None
+        if name == "btn_confirm_type":
+            return self.modal_type is not None
+        if name in self._option_dropdown:
+            return self.open_dropdown == self._option_dropdown[name]
+        if self.form is None:
+            return False
+        if name == "btn_carte":
+            return True
+        if name == "btn_import_pdf":
+            return self.tab == "carte"
+        if name in FORM_FIELDS or name in FORM_DROPDOWNS:
+            return self.tab == "details"
+        return False
+
+    def _blocked(self, name: str) -> bool:
+        """Indique si un modal ou une boîte de dialogue empêche d'atteindre l'élément."""
+        if self.dialog is not None or self.tip_open or self.error_open:
+            return True
+        if self.modal_type is not None:
+            return name != "btn_confirm_type"
+        return False
+
+    def _search_result(self) -> Optional[dict]:
+        """Premier territoire correspondant à la recherche (numéro et suffixe)."""
+        query = self.search.strip().upper()
+        if not query:
+            return None
+        for record in self.records:
+            if f"{record['numero']} {record['suffixe']}".strip().upper() == query:
+                return record
+        return None
+
+    def _window_titles(self) -> list[str]:
+        if not self.running:
+            return []
+        titles = [MAIN_WINDOW_TITLE]
+        if self.tip_open:
+            titles.append(STARTUP_TIP_TITLE)
+        if self.modal_type is not None:
+            titles.append(CONFIRM_MODAL_TITLE)
+        if self.dialog is not None:
+            titles.append(FILE_DIALOG_TITLE)
+        if self.error_open:
+            titles.append(ERROR_POPUP_TITLE)
+        return titles
+
+    def _shades(self, state: str) -> np.ndarray:
+        """Quatre niveaux de gris dérivés d'un état (rendu déterministe)."""
+        return np.frombuffer(zlib.crc32(state.encode("utf-8")).to_bytes(4, "little"), np.uint8)
+
+    def _render(self, box: tuple[int, int, int, int]) -> np.ndarray:
+        """
+        Dessine une région de l'écran simulé: un fond qui dépend de l'écran
+        affiché, et un motif par élément visible qui dépend de son état (focus,
+        valeur, menu ouvert). Un clic perdu ne change donc aucun pixel.
+        """
+        left, top, width, height = box
+        if not self.running:
+            return np.zeros((height, width), np.uint8)
+
+        form = self.form is not None
+        image = np.full((height, width), self._shades(f"{self.screen}|{self.tab}|{form}")[0], np.uint8)
+        for name, (x, y) in self.coordinates.items():
+            if not (left - 15 <= x < left + width + 15 and top - 8 <= y < top + height + 8):
+                continue
+            if not self._visible(name):
+                continue
+            value = self.element_value(name) or ""
+            shades = self._shades(f"{name}|{self.focus == name}|{self.open_dropdown == name}|{value}")
+            cx, cy = x - left, y - top
+            for i, (dx, dy) in enumerate(((-15, -8), (0, -8), (-15, 0), (0, 0))):
+                x0, y0 = max(0, cx + dx), max(0, cy + dy)
+                image[y0:max(0, cy + dy + 8), x0:max(0, cx + dx + 15)] = shades[i]
+
+        if self.dialog is not None or self.tip_open or self.error_open or self.modal_type is not None:
+            image //= 2
+        return image
+
+    def _select(self, dropdown_name: str, label: str):
+        """Sélectionne une option (le type attend la confirmation du modal)."""
+        key = FORM_DROPDOWNS[dropdown_name][0]
+        self.open_dropdown = None
+        self.typeahead = ""
+        if self.form is None:
+            return
+        if key == "type" and label != DEFAULT_TYPE and label != self.form.get("type"):
+            def open_modal():
+                self.modal_type = label
+                self._open_window(CONFIRM_MODAL_TITLE)
+            self._schedule("modal", open_modal)
+        else:
+            self.form[key] = label
+
+    def _open_window(self, title: str):
+        """Note l'ouverture d'un dialogue (nouveau handle)."""
+        self._openings[title] += 1
+
+    def _window_handle(self, title: str) -> int:
+        return WINDOW_HANDLES[title] + 100 * self._openings[title]
+
+    def _confirm_type(self):
+        """Valide le modal de confirmation du type (bouton "Oui", ou Entrée)."""
+        if self.form is not None:
+            self.form["type"] = self.modal_type
+        self.modal_type = None
+        self.focus = "dropdown_type"
+
+    @staticmethod
+    def _empty_form() -> dict:
+        return {
+            "categorie": "",
+            "type": DEFAULT_TYPE,
+            "ville": "",
+            **{key: "" for key in FORM_FIELDS.values()},
+            "attachments": [],
+        }
+
+    def _new_form(self):
+        self.form = self._empty_form()
+        self.records.append(self.form)
+        self.tab = "details"
+        self.focus = None
+
+    def _on_click(self, name: str):
+        """Effet d'un clic réussi sur un élément."""
+        self.focus = name
+        self.select_all = False
+
+        if name == "btn_menu_territoires":
+            self._schedule("navigation", lambda: setattr(self, "screen", "menu"))
+        elif name == "btn_liste_territoires":
+            self._schedule("navigation", lambda: setattr(self, "screen", "list"))
+        elif name == "btn_new_territory":
+            self.open_dropdown = None
+            self.form = None
+            self._schedule("navigation", self._new_form)
+        elif name == "list_first_territory":
+            record = self._search_result()
+            self.open_dropdown = None
+            self.form = None
+
+            def open_record():
+                self.form = record
+                self.tab = "details"
+            self._schedule("navigation", open_record)
+        elif name in FORM_DROPDOWNS:
+            if self.open_dropdown == name:
+                self.open_dropdown = None
+            else:
+                self.typeahead = ""
+                self._schedule("dropdown", lambda: setattr(self, "open_dropdown", name))
+        elif name in self._option_dropdown:
+            dropdown = self._option_dropdown[name]
+            self._select(dropdown, self.labels[name])
+        elif name == "btn_confirm_type":
+            self._confirm_type()
+        elif name == "btn_carte":
+            self.open_dropdown = None
+            self._schedule("navigation", lambda: setattr(self, "tab", "carte"))
+        elif name == "btn_import_pdf":
+            def open_dialog():
+                self.dialog = {"filename": ""}
+                self._open_window(FILE_DIALOG_TITLE)
+                self.focus = "dialog_filename"
+            self._schedule("dialog", open_dialog)
+
+    def _paste(self):
+        """Colle le presse-papiers dans l'élément qui a le focus."""
+        text = self.clipboard
+        replace = self.select_all
+        self.select_all = False
+
+        if self.dialog is not None:
+            def set_filename():
+                self.dialog["filename"] = text if replace else self.dialog["filename"] + text
+            self._schedule("input", set_filename)
+        elif self.open_dropdown is not None:
+            self.typeahead = text
+        elif self.focus == "field_search_territory":
+            def set_search():
+                self.search = text if replace else self.search + text
+            self._schedule("input", set_search)
+        elif self.focus in FORM_FIELDS and self.form is not None and not self._blocked(self.focus):
+            key = FORM_FIELDS[self.focus]
+            form = self.form
+
+            def set_value():
+                form[key] = text if replace else form[key] + text
+            self._schedule("input", set_value)
+
+    # =========================================================================
+    # Backend GUI
+    # =========================================================================
+
+    def set_pause(self, seconds: float):
+        self.pause = seconds
+
+    def click(self, x: int, y: int):
+        self._action()
+        name = self._by_point.get((x, y))
+        if name is None or not self._visible(name):
+            self.stats["missed_clicks"] += 1
+            return
+        if self._blocked(name):
+            self.stats["blocked_clicks"] += 1
+            return
+        if name in self.fail_elements or self.rng.random() < self.miss_rate:
+            self.stats["missed_clicks"] += 1
+            return
+        self._on_click(name)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            def open_error():
+                self.error_open = True
+                self._open_window(ERROR_POPUP_TITLE)
+                self.stats["errors"] += 1
+            self._schedule("modal", open_error)
+
+    def double_click(self, x: int, y: int):
+        self.click(x, y)
+
+    def press(self, key: str):
+        self._action()
+        if not self.running:
+            return
+        key = key.lower()
+
+        if key in ("escape", "esc"):
+            if self.error_open:
+                self.error_open = False
+            elif self.tip_open:
+                self.tip_open = False
+            elif self.dialog is not None:
+                self._schedule("dialog", lambda: setattr(self, "dialog", None))
+            elif self.modal_type is not None:
+                self.modal_type = None
+            elif self.open_dropdown is not None:
+                self.open_dropdown = None
+        elif key == "enter":
+            if self.error_open:
+                self.error_open = False
+            elif self.tip_open:
+                self.tip_open = False
+            elif self.dialog is not None:
+                filename = self.dialog["filename"]
+                form = self.form
+
+                def close_dialog():
+                    if filename and form is not None:
+                        form["attachments"].append(filename)
+                    self.dialog = None
+                    self.focus = "btn_import_pdf"
+                self._schedule("dialog", close_dialog)
+            elif self.modal_type is not None:
+                self._confirm_type()
+            elif self.open_dropdown is not None:
+                dropdown = self.open_dropdown
+                match = [
+                    label for label in self.dropdown_labels[dropdown]
+                    if label.upper() == self.typeahead.strip().upper()
+                ]
+                if match:
+                    self._select(dropdown, match[0])
+                self.focus = dropdown
+
+    def hotkey(self, *keys: str):
+        self._action()
+        if not self.running:
+            return
+        keys = tuple(k.lower() for k in keys)
+        if keys == ("ctrl", "a"):
+            self.select_all = True
+        elif keys == ("ctrl", "v"):
+            self._paste()
+
+    def copy(self, text: str):
+        self.clipboard = text
+
+    def find_windows(self, title: str) -> list:
+        self._advance()
+        return [_SimWindow(self, t) for t in self._window_titles() if title in t]
+
+    def start_process(self, exe_path: str):
+        if self.ready_at is None or self.crashed:
+            self.crashed = False
+            self.ready_at = time.monotonic() + self.latency["launch"]
+            self.tip_open = self.startup_tip
+            self._open_window(STARTUP_TIP_TITLE)
+            self.screen = "home"
+            self.error_open = False
+        return _SimProcess(self)
+
+    def connect(self, window_title: str, timeout: float = 2.0) -> Optional[WindowConnection]:
+        self._advance()
+        if not self.running or window_title not in MAIN_WINDOW_TITLE:
+            return None
+        return WindowConnection(_SimWindow(self, MAIN_WINDOW_TITLE), handle=1, pid=self.pid)
+
+    def grab_region(self, box: tuple[int, int, int, int]) -> Optional[np.ndarray]:
+        self._advance()
+        return self._render(box)
+
+    def sleep(self, seconds: float):
+        if self.sleep_scale > 0:
+            time.sleep(seconds * self.sleep_scale)
+
+    # =========================================================================
+    # Sonde UI
+    # =========================================================================
+
+    def element_exists(self, element_name: str) -> Optional[bool]:
+        self._advance()
+        return self._visible(element_name)
+
+    def element_enabled(self, element_name: str) -> Optional[bool]:
+        self._advance()
+        return self._visible(element_name) and not self._blocked(element_name)
+
+    def element_has_focus(self, element_name: str) -> Optional[bool]:
+        self._advance()
+        return self.running and self.focus == element_name
+
+    def window_exists(self, title_pattern: str) -> Optional[bool]:
+        self._advance()
+        return any(re.match(title_pattern, t) for t in self._window_titles())
+
+    def focused_element(self) -> Optional[object]:
+        self._advance()
+        return self.focus or ""
+
+    def focused_value(self) -> Optional[str]:
+        self._advance()
+        if self.dialog is not None:
+            return self.dialog["filename"]
+        if self.open_dropdown is not None:
+            return self.typeahead
+        if self.focus == "field_search_territory":
+            return self.search
+        if self.focus in FORM_FIELDS and self.form is not None:
+            return self.form[FORM_FIELDS[self.focus]]
+        return ""
+
+    def foreground_window(self) -> Optional[tuple[int, int]]:
+        self._advance()
+        if not self.running:
+            return 0, 0
+        if self.dialog is not None or self.modal_type is not None or self.tip_open or self.error_open:
+            return 2, self.pid
+        return 1, self.pid
+
+    def process_windows(self) -> Optional[list[tuple[int, int, str]]]:
+        self._advance()
+        return [(self._window_handle(t), self.pid, t) for t in self._window_titles()]
+
+    def set_element_value(self, element_name: str, text: str) -> Optional[bool]:
+        self._action()
+        if not self.value_pattern or element_name not in FORM_FIELDS:
+            return None
+        if self.form is None or not self._visible(element_name) or self._blocked(element_name):
+            return False
+        self.form[FORM_FIELDS[element_name]] = text
+        return True
+
+    def element_value(self, element_name: str) -> Optional[str]:
+        self._advance()
+        if self.form is None:
+            return None
+        if element_name in FORM_FIELDS:
+            return self.form[FORM_FIELDS[element_name]]
+        if element_name in FORM_DROPDOWNS:
+            return self.form[FORM_DROPDOWNS[element_name][0]]
+        return None
+
+    def dropdown_items(self, dropdown_name: str) -> Optional[list[str]]:
+        if not self.uia_selection or dropdown_name not in self.dropdown_labels:
+            return None
+        return list(self.dropdown_labels[dropdown_name])
+
+    def select_item(self, dropdown_name: str, item_text: str) -> Optional[bool]:
+        self._action()
+        if not self.uia_selection or dropdown_name not in FORM_DROPDOWNS:
+            return None
+        if not self._visible(dropdown_name) or self._blocked(dropdown_name):
+            return False
+        if item_text not in self.dropdown_labels[dropdown_name]:
+            return False
+        self._select(dropdown_name, item_text)
+        return True
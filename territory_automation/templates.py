@@ -0,0 +1,276 @@
+"""
+Calibration automatique par recherche de modèles (template matching).
+
+Chaque élément calibré est associé à une vignette de référence: un extrait
+de capture d'écran centré sur son point de clic, enregistré une fois
+(data/templates/). Pour recalibrer, une capture de chaque écran NWS suffit:
+chaque vignette y est recherchée par corrélation croisée normalisée, calculée
+pour toutes les positions à la fois (FFT NumPy et images intégrales).
+
+Une correspondance est jugée peu fiable si son score est bas, ou si une
+autre position de l'écran obtient presque le même score (champs vides
+identiques, par exemple).
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .fingerprint import LUMA
+
+
+# Taille par défaut des vignettes de référence (largeur, hauteur)
+TEMPLATE_SIZE = (96, 32)
+
+# Fichier d'index des vignettes (écran et point de clic de chaque élément)
+TEMPLATE_INDEX = "templates.json"
+
+
+@dataclass
+class Match:
+    """
+    Résultat de la recherche d'une vignette.
+
+    Attributes:
+        element: Nom de l'élément
+        x, y: Point de clic trouvé
+        score: Corrélation normalisée de la meilleure position (-1 à 1)
+        margin: Écart avec la meilleure position concurrente
+        confident: False si le score ou l'écart est insuffisant
+    """
+    element: str
+    x: int
+    y: int
+    score: float
+    margin: float
+    confident: bool
+
+
+def grayscale(image: np.ndarray) -> np.ndarray:
+    """Convertit une capture (RGB/RGBA ou niveaux de gris) en luminance float64."""
+    pixels = np.asarray(image, dtype=np.float64)
+    if pixels.ndim == 3:
+        pixels = pixels[..., :3] @ LUMA.astype(np.float64)
+    return pixels
+
+
+def _fast_length(n: int) -> int:
+    """Plus petite longueur >= n de la forme 2^a 3^b 5^c (FFT rapide)."""
+    length = n
+    while True:
+        rest = length
+        for factor in (2, 3, 5):
+            while rest % factor == 0:
+                rest //= factor
+        if rest == 1:
+            return length
+        length += 1
+
+
+class TemplateSearch:
+    """
+    Recherche de vignettes dans une capture d'écran.
+
+    La transformée de Fourier de la capture et ses images intégrales sont
+    calculées une seule fois et partagées par toutes les vignettes.
+    """
+
+    def __init__(self, image: np.ndarray):
+        """
+        Args:
+            image: Capture d'écran (hauteur x largeur [x canaux])
+        """
+        self.image = grayscale(image)
+        # Images intégrales de I et I² (sommes sur une fenêtre en O(1))
+        self._sum = np.pad(self.image.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self._sum2 = np.pad((self.image ** 2).cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        self._spectra: dict[tuple[int, int], np.ndarray] = {}
+
+    def _spectrum(self, shape: tuple[int, int]) -> np.ndarray:
+        if shape not in self._spectra:
+            self._spectra[shape] = np.fft.rfft2(self.image, shape)
+        return self._spectra[shape]
+
+    def _window_sums(self, table: np.ndarray, h: int, w: int) -> np.ndarray:
+        return table[h:, w:] - table[:-h, w:] - table[h:, :-w] + table[:-h, :-w]
+
+    def scores(self, template: np.ndarray) -> np.ndarray:
+        """
+        Corrélation croisée normalisée de la vignette à chaque position.
+
+        Returns:
+            Carte des scores (hauteur - h + 1) x (largeur - w + 1), indexée
+            par le coin supérieur gauche de la fenêtre
+        """
+        template = grayscale(template)
+        h, w = template.shape
+        height, width = self.image.shape
+        if h > height or w > width:
+            return np.zeros((0, 0))
+
+        centered = template - template.mean()
+        norm = np.sqrt((centered ** 2).sum())
+        if norm == 0:
+            # Vignette uniforme: aucune position ne se distingue
+            return np.zeros((height - h + 1, width - w + 1))
+
+        # Corrélation = convolution avec la vignette retournée
+        shape = (_fast_length(height + h - 1), _fast_length(width + w - 1))
+        product = self._spectrum(shape) * np.fft.rfft2(centered[::-1, ::-1], shape)
+        correlation = np.fft.irfft2(product, shape)[h - 1:height, w - 1:width]
+
+        count = h * w
+        sums = self._window_sums(self._sum, h, w)
+        variance = self._window_sums(self._sum2, h, w) - sums ** 2 / count
+        denominator = np.sqrt(np.maximum(variance, 0)) * norm
+
+        scores = np.zeros_like(correlation)
+        np.divide(correlation, denominator, out=scores, where=denominator > 1e-6 * norm)
+        return scores
+
+    def locate(
+        self,
+        element: str,
+        template: np.ndarray,
+        anchor: tuple[int, int],
+        min_score: float = 0.8,
+        min_margin: float = 0.05
+    ) -> Optional[Match]:
+        """
+        Cherche une vignette et retourne le point de clic correspondant.
+
+        Args:
+            element: Nom de l'élément
+            template: Vignette de référence
+            anchor: Point de clic dans la vignette (dx, dy)
+            min_score: Score minimal d'une correspondance fiable
+            min_margin: Écart minimal avec la meilleure position concurrente
+
+        Returns:
+            Match, ou None si la vignette dépasse de la capture
+        """
+        scores = self.scores(template)
+        if scores.size == 0:
+            return None
+
+        best = np.unravel_index(np.argmax(scores), scores.shape)
+        score = float(scores[best])
+
+        # Meilleure position concurrente, hors du voisinage de la première
+        h, w = np.asarray(template).shape[:2]
+        top, left = best
+        masked = scores.copy()
+        masked[max(0, top - h // 2):top + h // 2 + 1, max(0, left - w // 2):left + w // 2 + 1] = -1
+        runner_up = float(masked.max()) if masked.size else -1.0
+        margin = score - runner_up
+
+        return Match(
+            element=element,
+            x=int(left + anchor[0]),
+            y=int(top + anchor[1]),
+            score=score,
+            margin=margin,
+            confident=score >= min_score and margin >= min_margin,
+        )
+
+
+def crop_template(
+    image: np.ndarray,
+    x: int,
+    y: int,
+    size: tuple[int, int] = TEMPLATE_SIZE
+) -> tuple[np.ndarray, tuple[int, int]]:
+    """
+    Découpe la vignette d'un élément autour de son point de clic.
+
+    Returns:
+        (vignette en niveaux de gris uint8, point de clic dans la vignette)
+    """
+    pixels = grayscale(image)
+    height, width = pixels.shape
+    w, h = size
+    left = min(max(0, x - w // 2), max(0, width - w))
+    top = min(max(0, y - h // 2), max(0, height - h))
+    crop = pixels[top:top + h, left:left + w]
+    return np.round(crop).astype(np.uint8), (x - left, y - top)
+
+
+class TemplateStore:
+    """Vignettes de référence enregistrées (un fichier .npy par élément + index JSON)."""
+
+    def __init__(self, folder: Path):
+        """
+        Args:
+            folder: Dossier des vignettes (ex: data/templates)
+        """
+        self.folder = Path(folder)
+        self.index: dict[str, dict] = {}
+        index_file = self.folder / TEMPLATE_INDEX
+        if index_file.exists():
+            with open(index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def __contains__(self, element: str) -> bool:
+        return element in self.index
+
+    def save(self, element: str, screen: str, template: np.ndarray, anchor: tuple[int, int]):
+        """Enregistre la vignette d'un élément (l'index est écrit par flush())."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        np.save(self.folder / f"{element}.npy", template)
+        self.index[element] = {"screen": screen, "anchor": list(anchor)}
+
+    def flush(self):
+        """Écrit l'index des vignettes."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with open(self.folder / TEMPLATE_INDEX, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2, ensure_ascii=False)
+
+    def load(self, element: str) -> tuple[np.ndarray, tuple[int, int], str]:
+        """
+        Charge la vignette d'un élément.
+
+        Returns:
+            (vignette, point de clic dans la vignette, écran)
+        """
+        entry = self.index[element]
+        template = np.load(self.folder / f"{element}.npy")
+        return template, tuple(entry["anchor"]), entry["screen"]
+
+
+def auto_calibrate(
+    screens: dict[str, np.ndarray],
+    store: TemplateStore,
+    elements: list[str],
+    min_score: float = 0.8,
+    min_margin: float = 0.05
+) -> list[Match]:
+    """
+    Localise chaque élément dans la capture de son écran.
+
+    Args:
+        screens: Mapping écran -> capture
+        store: Vignettes de référence
+        elements: Éléments à localiser (ceux sans vignette ou sans capture sont ignorés)
+        min_score: Score minimal d'une correspondance fiable
+        min_margin: Écart minimal avec la meilleure position concurrente
+
+    Returns:
+        Une correspondance par élément localisé
+    """
+    searches: dict[str, TemplateSearch] = {}
+    matches = []
+    for element in elements:
+        if element not in store:
+            continue
+        template, anchor, screen = store.load(element)
+        if screen not in screens:
+            continue
+        if screen not in searches:
+            searches[screen] = TemplateSearch(screens[screen])
+        match = searches[screen].locate(element, template, anchor, min_score, min_margin)
+        if match is not None:
+            matches.append(match)
+    return matches
@@ -0,0 +1,200 @@
+"""
+Mesure des durées par étape et par action (spans).
+
+Chaque étape du plan (ÉTAPE 1 à 9) et chaque primitive (click, type_text,
+import_pdf, launch_application...) peut être enregistrée comme un span.
+Les spans s'exportent au format Chrome trace (chrome://tracing, Perfetto)
+et en résumé CSV (nombre, total, p50, p95, max par span).
+
+Désactivé, le traceur ne coûte qu'un test de booléen par appel.
+"""
+
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class _NullSpan:
+    """Span inactif (traceur désactivé)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """Span actif: mesure la durée d'un bloc."""
+
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.cat, self.start, end, self.args)
+        return False
+
+
+class Tracer:
+    """Enregistre les spans d'une exécution."""
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initialise le traceur.
+
+        Args:
+            enabled: Si False, span() ne mesure rien
+        """
+        self.enabled = enabled
+        self.events: list[tuple] = []
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, cat: str = "action", **args):
+        """
+        Retourne un gestionnaire de contexte mesurant la durée du bloc.
+
+        Args:
+            name: Nom du span (ex: "click", "ÉTAPE 5 Type")
+            cat: Catégorie ("step", "action", "territory"...)
+            **args: Informations affichées dans la trace (élément, territoire...)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def _record(self, name: str, cat: str, start: int, end: int, args: dict):
+        with self._lock:
+            self.events.append((name, cat, start, end, threading.get_ident(), args))
+
+    def clear(self):
+        """Oublie les spans enregistrés."""
+        with self._lock:
+            self.events.clear()
+
+    def durations(self) -> dict[tuple[str, str], list[float]]:
+        """Retourne les durées (secondes) groupées par (catégorie, nom)."""
+        grouped: dict[tuple[str, str], list[float]] = {}
+        for name, cat, start, end, _, _ in self.events:
+            grouped.setdefault((cat, name), []).append((end - start) / 1e9)
+        return grouped
+
+    def summary(self) -> list[dict]:
+        """
+        Résume les durées par span.
+
+        Returns:
+            Une ligne par (catégorie, nom): count, total, p50, p95, max (secondes)
+        """
+        rows = []
+        for (cat, name), values in self.durations().items():
+            values.sort()
+            rows.append({
+                "cat": cat,
+                "name": name,
+                "count": len(values),
+                "total": sum(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "max": values[-1],
+            })
+        rows.sort(key=lambda r: r["total"], reverse=True)
+        return rows
+
+    def export_chrome_trace(self, path: Path) -> Path:
+        """
+        Écrit les spans au format Chrome trace (événements complets "X").
+
+        Le fichier s'ouvre dans chrome://tracing ou https://ui.perfetto.dev.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": (start - self._origin) / 1000,
+                "dur": (end - start) / 1000,
+                "pid": pid,
+                "tid": tid,
+                "args": args,
+            }
+            for name, cat, start, end, tid, args in self.events
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+    def export_csv(self, path: Path) -> Path:
+        """Écrit le résumé par span (durées en millisecondes) au format CSV."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["cat", "name", "count", "total_ms", "p50_ms", "p95_ms", "max_ms"])
+            for row in self.summary():
+                writer.writerow([
+                    row["cat"], row["name"], row["count"],
+                    *(f"{row[k] * 1000:.3f}" for k in ("total", "p50", "p95", "max")),
+                ])
+        return path
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    """Percentile par interpolation linéaire (valeurs triées)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * percent / 100
+    low = int(k)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (k - low)
+
+
+def traced(cat: str = "action", name: Optional[str] = None, target: bool = True):
+    """
+    Décorateur de méthode: mesure chaque appel avec le traceur `self.tracer`.
+
+    Args:
+        cat: Catégorie du span
+        name: Nom du span (défaut: nom de la méthode)
+        target: Si True, le premier argument (chaîne ou chemin) est joint au
+            span (élément cliqué, fichier importé...)
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            tracer = self.tracer
+            if not tracer.enabled:
+                return func(self, *args, **kwargs)
+            span_args = {}
+            if target and args and isinstance(args[0], (str, Path)):
+                span_args["target"] = str(args[0])
+            with _Span(tracer, span_name, cat, span_args):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,394 @@
+"""
+Attentes conditionnelles pour l'automatisation de NWS.
+
+Chaque action attend une condition concrète (élément présent ou activé,
+fenêtre ouverte, changement de focus...) au lieu d'un délai fixe. Les délais
+de config.py ne servent plus que de plafond (timeout).
+
+L'observation de l'interface passe par une sonde (UIProbe) interchangeable :
+PywinautoProbe sous Windows, ou toute implémentation factice sous Linux.
+"""
+
+import re
+import time
+from typing import Callable, Optional
+
+try:
+    from pywinauto import Desktop, findwindows, handleprops, win32functions
+    from pywinauto.uia_defines import IUIA
+    from pywinauto.uia_element_info import UIAElementInfo
+    PYWINAUTO_AVAILABLE = True
+except ImportError:
+    PYWINAUTO_AVAILABLE = False
+
+from .logger_setup import get_logger
+from .elements import ElementRegistry
+
+
+# Une condition retourne True/False, ou None si la sonde ne sait pas répondre
+Condition = Callable[[], Optional[bool]]
+
+# Classe win32 des boîtes de dialogue (MessageBox, Ouvrir...)
+DIALOG_CLASS = "#32770"
+
+
+class UIProbe:
+    """
+    Interface d'observation de l'interface NWS.
+
+    Chaque méthode retourne None lorsque l'information n'est pas disponible.
+    Cette implémentation de base ne sait rien observer : les attentes
+    retombent alors sur le délai fixe (comportement historique).
+    """
+
+    def element_exists(self, element_name: str) -> Optional[bool]:
+        """Indique si l'élément est présent et visible."""
+        return None
+
+    def element_enabled(self, element_name: str) -> Optional[bool]:
+        """Indique si l'élément est activé (cliquable)."""
+        return None
+
+    def element_has_focus(self, element_name: str) -> Optional[bool]:
+        """Indique si l'élément a le focus clavier."""
+        return None
+
+    def window_exists(self, title_pattern: str) -> Optional[bool]:
+        """Indique si une fenêtre dont le titre correspond au motif existe."""
+        return None
+
+    def focused_element(self) -> Optional[object]:
+        """Retourne un jeton opaque identifiant l'élément qui a le focus."""
+        return None
+
+    def focused_value(self) -> Optional[str]:
+        """Retourne le texte de l'élément qui a le focus."""
+        return None
+
+    def foreground_window(self) -> Optional[tuple[int, int]]:
+        """Retourne (handle, pid) de la fenêtre au premier plan."""
+        return None
+
+    def process_windows(self) -> Optional[list[tuple[int, int, str]]]:
+        """
+        Retourne (handle, pid, titre) des fenêtres de premier niveau visibles
+        susceptibles d'être des dialogues (titrées, ou de classe dialogue).
+        """
+        return None
+
+    def set_element_value(self, element_name: str, text: str) -> Optional[bool]:
+        """
+        Écrit directement la valeur d'un champ (UIA ValuePattern), sans clic
+        ni presse-papiers. Retourne None si l'écriture directe n'est pas
+        possible pour ce champ.
+        """
+        return None
+
+    def element_value(self, element_name: str) -> Optional[str]:
+        """Retourne la valeur affichée d'un élément (texte du champ, option choisie)."""
+        return None
+
+    def dropdown_items(self, dropdown_name: str) -> Optional[list[str]]:
+        """Retourne les libellés des options d'un menu déroulant."""
+        return None
+
+    def select_item(self, dropdown_name: str, item_text: str) -> Optional[bool]:
+        """
+        Sélectionne directement une option d'un menu déroulant par son libellé
+        (UIA SelectionItem / ExpandCollapse). Retourne None si non supporté.
+        """
+        return None
+
+
+class PywinautoProbe(UIProbe):
+    """
+    Sonde basée sur UI Automation (pywinauto).
+
+    Les éléments sont résolus (et mis en cache) par le registre des éléments.
+    La présence et l'état d'un élément ne sont observables que s'il est
+    trouvé par son localisateur: le contrôle situé à ses coordonnées
+    calibrées est toujours visible, même avant l'affichage de l'élément.
+    """
+
+    def __init__(self, registry: ElementRegistry):
+        """
+        Initialise la sonde.
+
+        Args:
+            registry: Registre des éléments NWS
+        """
+        self.registry = registry
+        self.logger = get_logger()
+        self._desktop = Desktop(backend="uia") if PYWINAUTO_AVAILABLE else None
+
+    def _element(self, element_name: str, by_point: bool = True):
+        """Retourne le contrôle UIA de l'élément (depuis le cache si possible)."""
+        if self._desktop is None:
+            return None
+        return self.registry.resolve(element_name, by_point=by_point)
+
+    def _focused_info(self):
+        """Retourne les informations UIA de l'élément qui a le focus."""
+        if not PYWINAUTO_AVAILABLE:
+            return None
+        try:
+            return UIAElementInfo(IUIA().iuia.GetFocusedElement())
+        except Exception:
+            return None
+
+    def element_exists(self, element_name: str) -> Optional[bool]:
+        if self._desktop is None or element_name not in self.registry.locators:
+            return None
+        element = self._element(element_name, by_point=False)
+        if element is None:
+            return None
+        try:
+            return element.is_visible()
+        except Exception:
+            self.registry.forget(element_name)
+            return False
+
+    def element_enabled(self, element_name: str) -> Optional[bool]:
+        if self._desktop is None or element_name not in self.registry.locators:
+            return None
+        element = self._element(element_name, by_point=False)
+        if element is None:
+            return None
+        try:
+            return element.is_visible() and element.is_enabled()
+        except Exception:
+            self.registry.forget(element_name)
+            return False
+
+    def element_has_focus(self, element_name: str) -> Optional[bool]:
+        if self._desktop is None:
+            return None
+        element = self._element(element_name)
+        focused = self._focused_info()
+        if element is None or focused is None:
+            return False
+        return element.element_info.runtime_id == focused.runtime_id
+
+    def window_exists(self, title_pattern: str) -> Optional[bool]:
+        if self._desktop is None:
+            return None
+        try:
+            return bool(self._desktop.windows(title_re=title_pattern))
+        except Exception:
+            return False
+
+    def focused_element(self) -> Optional[object]:
+        focused = self._focused_info()
+        if focused is None:
+            return None
+        return tuple(focused.runtime_id or ())
+
+    def focused_value(self) -> Optional[str]:
+        focused = self._focused_info()
+        if focused is None:
+            return None
+        try:
+            return focused.element.GetCurrentPropertyValue(30045)  # UIA_ValueValuePropertyId
+        except Exception:
+            return None
+
+    def foreground_window(self) -> Optional[tuple[int, int]]:
+        if not PYWINAUTO_AVAILABLE:
+            return None
+        try:
+            handle = win32functions.GetForegroundWindow()
+            return handle, handleprops.processid(handle)
+        except Exception:
+            return None
+
+    def process_windows(self) -> Optional[list[tuple[int, int, str]]]:
+        if not PYWINAUTO_AVAILABLE:
+            return None
+        try:
+            # Énumération win32: les dialogues possédés par NWS sont de premier niveau.
+            # Les listes déroulantes (ComboLBox) et info-bulles sont aussi de premier
+            # niveau, mais sans titre: les ignorer, sinon la règle par défaut les ferme
+            return [
+                (info.handle, info.process_id, info.name)
+                for info in findwindows.find_elements(backend="win32", visible_only=True)
+                if info.name or info.class_name == DIALOG_CLASS
+            ]
+        except Exception:
+            return None
+
+    def set_element_value(self, element_name: str, text: str) -> Optional[bool]:
+        element = self._element(element_name)
+        if element is None:
+            return None
+        try:
+            value_pattern = element.iface_value
+        except Exception:
+            # Le contrôle n'implémente pas ValuePattern
+            return None
+        try:
+            if value_pattern.CurrentIsReadOnly:
+                return None
+            value_pattern.SetValue(text)
+            return value_pattern.CurrentValue == text
+        except Exception:
+            self.registry.forget(element_name)
+            return False
+
+    def element_value(self, element_name: str) -> Optional[str]:
+        element = self._element(element_name)
+        if element is None:
+            return None
+        try:
+            if hasattr(element, "selected_text"):
+                return element.selected_text()
+            return element.iface_value.CurrentValue
+        except Exception:
+            return None
+
+    def dropdown_items(self, dropdown_name: str) -> Optional[list[str]]:
+        element = self._element(dropdown_name)
+        if element is None or not hasattr(element, "texts"):
+            return None
+        try:
+            return [t for t in element.texts() if t]
+        except Exception:
+            self.registry.forget(dropdown_name)
+            return None
+
+    def select_item(self, dropdown_name: str, item_text: str) -> Optional[bool]:
+        element = self._element(dropdown_name)
+        if element is None or not hasattr(element, "select"):
+            return None
+        try:
+            element.select(item_text)
+            return element.selected_text() == item_text
+        except Exception:
+            self.registry.forget(dropdown_name)
+            return False
+
+
+class Waiter:
+    """Attend des conditions sur l'interface, avec un délai maximal."""
+
+    def __init__(
+        self,
+        probe: Optional[UIProbe] = None,
+        poll_interval: float = 0.02,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+        interrupt: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialise l'attente.
+
+        Args:
+            probe: Sonde d'observation de l'interface
+            poll_interval: Intervalle entre deux vérifications (secondes)
+            sleep: Fonction d'attente (remplaçable pour les tests)
+            clock: Horloge monotone (remplaçable pour les tests)
+            interrupt: Appelée à chaque vérification; peut lever une exception
+                pour abandonner l'attente (dialogue inattendu)
+        """
+        self.probe = probe or UIProbe()
+        self.poll_interval = poll_interval
+        self.sleep = sleep
+        self.clock = clock
+        self.interrupt = interrupt
+        self.logger = get_logger()
+
+    def wait_until(self, condition: Condition, timeout: float, description: str = "") -> bool:
+        """
+        Attend que la condition soit vraie.
+
+        Si la sonde ne sait pas évaluer la condition (None), attend le délai
+        complet comme auparavant et considère l'action comme terminée.
+
+        Args:
+            condition: Condition à évaluer
+            timeout: Délai maximal (secondes)
+            description: Description pour les logs
+
+        Returns:
+            True si la condition est remplie (ou non observable), False si timeout
+        """
+        deadline = self.clock() + timeout
+
+        while True:
+            if self.interrupt is not None:
+                self.interrupt()
+            result = condition()
+            if result is None:
+                self.sleep(max(0.0, deadline - self.clock()))
+                return True
+            if result:
+                return True
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                if description:
+                    self.logger.debug(f"Attente expirée ({timeout:.2f}s): {description}")
+                return False
+            self.sleep(min(self.poll_interval, remaining))
+
+    # =========================================================================
+    # Conditions usuelles
+    # =========================================================================
+
+    def element_exists(self, element_name: str, timeout: float) -> bool:
+        """Attend qu'un élément soit présent."""
+        return self.wait_until(
+            lambda: self.probe.element_exists(element_name),
+            timeout,
+            f"élément {element_name} présent"
+        )
+
+    def element_enabled(self, element_name: str, timeout: float) -> bool:
+        """Attend qu'un élément soit activé."""
+        return self.wait_until(
+            lambda: self.probe.element_enabled(element_name),
+            timeout,
+            f"élément {element_name} activé"
+        )
+
+    def element_focused(self, element_name: str, timeout: float) -> bool:
+        """Attend qu'un élément reçoive le focus."""
+        return self.wait_until(
+            lambda: self.probe.element_has_focus(element_name),
+            timeout,
+            f"focus sur {element_name}"
+        )
+
+    def window_appears(self, title_pattern: str, timeout: float) -> bool:
+        """Attend qu'une fenêtre apparaisse."""
+        return self.wait_until(
+            lambda: self.probe.window_exists(title_pattern),
+            timeout,
+            f"fenêtre '{title_pattern}' ouverte"
+        )
+
+    def window_closes(self, title_pattern: str, timeout: float) -> bool:
+        """Attend qu'une fenêtre disparaisse."""
+        def closed():
+            exists = self.probe.window_exists(title_pattern)
+            return None if exists is None else not exists
+        return self.wait_until(closed, timeout, f"fenêtre '{title_pattern}' fermée")
+
+    def focus_changes(self, previous: Optional[object], timeout: float) -> bool:
+        """Attend que le focus quitte l'élément identifié par `previous`."""
+        def changed():
+            current = self.probe.focused_element()
+            if current is None or previous is None:
+                return None
+            return current != previous
+        return self.wait_until(changed, timeout, "changement de focus")
+
+    def value_equals(self, text: str, timeout: float) -> bool:
+        """Attend que l'élément qui a le focus contienne le texte."""
+        def matches():
+            value = self.probe.focused_value()
+            return None if value is None else value == text
+        return self.wait_until(matches, timeout, "saisie prise en compte")
+
+
+def title_pattern(*titles: str) -> str:
+    """Construit un motif de titre de fenêtre à partir de plusieurs titres."""
+    return ".*(" + "|".join(re.escape(t) for t in titles) + ").*"
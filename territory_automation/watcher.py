@@ -0,0 +1,237 @@
+"""
+Surveillance des dialogues modaux de NWS.
+
+Un thread de fond examine régulièrement les fenêtres de premier niveau du
+processus NWS. Chaque nouvelle fenêtre est comparée à une table de règles
+(motif de titre -> action):
+- "expect": dialogue attendu, traité par le plan (boîte "Ouvrir")
+- "confirm": dialogue attendu, validé par Entrée (modal de type); le plan
+  attend cette validation au lieu de cliquer lui-même sur le bouton
+- "enter" / "escape": dialogue fermé immédiatement par une touche
+- "none": aucune touche
+
+Les touches du thread de surveillance et les actions du plan passent par un
+même verrou de saisie (input_lock): une touche n'est jamais envoyée pendant
+un clic ou une saisie du thread principal.
+
+Une règle peut aussi interrompre le territoire en cours ("abort"): la
+prochaine action ou attente lève ModalInterrupt, au lieu de cliquer dans
+le vide jusqu'à la fin du territoire.
+"""
+
+import re
+import threading
+from collections import Counter
+from typing import Optional
+
+from .errors import AutomationError
+from .logger_setup import get_logger
+
+
+# Règle appliquée aux fenêtres qui ne correspondent à aucune règle
+DEFAULT_MODAL_RULE = {"action": "escape", "abort": True}
+
+MODAL_ACTIONS = ("expect", "confirm", "enter", "escape", "none")
+
+
+class ModalInterrupt(AutomationError):
+    """Territoire interrompu par un dialogue inattendu."""
+    pass
+
+
+class ModalWatcher:
+    """Surveille les dialogues de NWS et applique la table de règles."""
+
+    def __init__(
+        self,
+        probe,
+        backend,
+        rules: list[dict],
+        default_rule: Optional[dict] = None,
+        interval: float = 0.05,
+        input_lock: Optional[threading.RLock] = None
+    ):
+        """
+        Initialise la surveillance.
+
+        Args:
+            probe: Sonde UI (doit implémenter process_windows)
+            backend: Backend GUI (touches Entrée/Échap)
+            rules: Règles {"title": motif, "action": ..., "abort": bool, "any_process": bool},
+                examinées dans l'ordre; une règle "confirm" porte aussi un nom
+                ("name"), attendu par le plan (action "await_modal")
+            default_rule: Règle des fenêtres sans correspondance
+            interval: Intervalle entre deux examens (secondes)
+            input_lock: Verrou partagé avec le thread qui exécute le plan
+                (défaut: verrou propre à la surveillance)
+        """
+        for rule in rules:
+            if rule.get("action", "none") not in MODAL_ACTIONS:
+                raise ValueError(f"Action de dialogue inconnue: {rule.get('action')}")
+            if rule.get("action") == "confirm" and not rule.get("name"):
+                raise ValueError(f"Règle \"confirm\" sans nom: {rule['title']}")
+
+        self.probe = probe
+        self.backend = backend
+        self.rules = [(re.compile(rule["title"], re.IGNORECASE), rule) for rule in rules]
+        self.default_rule = default_rule or DEFAULT_MODAL_RULE
+        self.interval = interval
+        self.input_lock = input_lock or threading.RLock()
+        self.logger = get_logger()
+
+        self.pid: Optional[int] = None
+        self._known: set = set()
+        self._alert: Optional[str] = None
+        self._confirmed: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"expected": 0, "resolved": 0, "aborted": 0}
+
+    # =========================================================================
+    # Cycle de vie
+    # =========================================================================
+
+    def start(self, pid: Optional[int]) -> bool:
+        """
+        Démarre la surveillance du processus NWS.
+
+        Les fenêtres déjà ouvertes (fenêtre principale...) sont ignorées.
+
+        Returns:
+            True si la surveillance est active, False si les fenêtres ne sont pas observables
+        """
+        self.stop()
+        windows = self.probe.process_windows()
+        if windows is None or pid is None:
+            self.logger.debug("Surveillance des dialogues indisponible")
+            return False
+
+        self.pid = pid
+        self._known = {handle for handle, _, _ in windows}
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="modal-watcher", daemon=True)
+        self._thread.start()
+        self.logger.debug("Surveillance des dialogues démarrée")
+        return True
+
+    def stop(self):
+        """Arrête la surveillance."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        # UI Automation exige l'initialisation COM dans chaque thread
+        try:
+            import comtypes
+            comtypes.CoInitializeEx()
+        except Exception:
+            pass
+
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self.logger.debug(f"Surveillance des dialogues: {e}")
+            self._stop.wait(self.interval)
+
+    # =========================================================================
+    # Examen des fenêtres
+    # =========================================================================
+
+    def poll(self):
+        """Examine les fenêtres une fois et applique les règles aux nouvelles."""
+        windows = self.probe.process_windows()
+        if windows is None:
+            return
+
+        current = set()
+        for handle, pid, title in windows:
+            current.add(handle)
+            if handle in self._known:
+                continue
+            rule = self._match(title)
+            if pid != self.pid and not rule.get("any_process"):
+                continue
+            self._known.add(handle)
+            self._apply(title, rule)
+
+        # Les fenêtres fermées peuvent réapparaître (même handle réutilisé)
+        self._known &= current
+
+    def confirmed_modals(self) -> set[str]:
+        """Noms des dialogues validés par la surveillance (règles "confirm")."""
+        return {rule["name"] for _, rule in self.rules if rule.get("action") == "confirm"}
+
+    def _match(self, title: str) -> dict:
+        for pattern, rule in self.rules:
+            if pattern.search(title):
+                return rule
+        return self.default_rule
+
+    def _apply(self, title: str, rule: dict):
+        action = rule.get("action", "none")
+
+        # L'interruption est signalée avant la touche: le thread principal,
+        # qui détient peut-être le verrou de saisie, abandonne son action
+        if rule.get("abort"):
+            with self._lock:
+                if self._alert is None:
+                    self._alert = title
+            self.stats["aborted"] += 1
+            self.logger.warning(f"  Dialogue inattendu: \"{title}\" - territoire interrompu")
+
+        if action == "expect":
+            self.stats["expected"] += 1
+            self.logger.debug(f"Dialogue attendu: \"{title}\"")
+        elif action == "confirm":
+            with self.input_lock:
+                self.backend.press("enter")
+            with self._lock:
+                self._confirmed[rule["name"]] += 1
+            self.stats["expected"] += 1
+            self.logger.debug(f"Dialogue attendu: \"{title}\" validé")
+        elif action in ("enter", "escape"):
+            with self.input_lock:
+                self.backend.press(action)
+            self.stats["resolved"] += 1
+            self.logger.info(f"  Dialogue \"{title}\" fermé ({action})")
+
+    # =========================================================================
+    # Interruption du territoire en cours
+    # =========================================================================
+
+    def reset(self):
+        """Oublie l'interruption en attente et les validations (nouveau territoire)."""
+        with self._lock:
+            self._alert = None
+            self._confirmed.clear()
+
+    def take_confirmed(self, name: str) -> bool:
+        """
+        Consomme une validation du dialogue `name` par la surveillance.
+
+        Returns:
+            True si le dialogue a été validé depuis la dernière consommation
+        """
+        with self._lock:
+            if self._confirmed[name] <= 0:
+                return False
+            self._confirmed[name] -= 1
+            return True
+
+    def check(self):
+        """
+        Lève ModalInterrupt si un dialogue inattendu est apparu.
+
+        Raises:
+            ModalInterrupt: Avec le titre du dialogue
+        """
+        if self._alert is None:
+            return
+        with self._lock:
+            title, self._alert = self._alert, None
+        if title is not None:
+            raise ModalInterrupt(f"Dialogue inattendu: \"{title}\"")
@@ -0,0 +1,65 @@
+"""
+Configuration commune des tests (pytest).
+
+Les tests pilotent le simulateur NWS (territory_automation/simulator.py):
+ils tournent sans Windows ni New World Scheduler.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from config import CATEGORIES, VILLES, OPTION_LABELS, EXCEL_COLUMNS  # noqa: E402
+
+
+# Délais de l'automatiseur pendant les tests (plafonds des attentes)
+TEST_DELAYS = {
+    "after_click": 0.3,
+    "after_type": 0.1,
+    "after_paste": 0.3,
+    "dropdown_open": 0.3,
+    "confirm_modal": 0.3,
+    "dialog_open": 1.5,
+    "navigation": 0.5,
+    "app_launch": 1.0,
+    "after_save": 1.0,
+    "between_territories": 0.0,
+    "input_pause": 0.0,
+    "focus_cache_ttl": 1.0,
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--update-golden",
+        action="store_true",
+        help="Réécrit les fichiers de référence de tests/fixtures"
+    )
+
+
+def make_territory(index: int, **values) -> dict:
+    """Territoire avec toutes les clés de EXCEL_COLUMNS (vides sauf numéro et notes)."""
+    territory = {key: "" for key in EXCEL_COLUMNS}
+    territory.update(numero=f"T-{index:03d}", notes=f"Note {index}")
+    territory.update(values)
+    return territory
+
+
+@pytest.fixture
+def automator_kwargs(tmp_path) -> dict:
+    """Paramètres communs de NWSAutomator (sans backend: à compléter par le simulateur)."""
+    pdf_folder = tmp_path / "pdfs"
+    pdf_folder.mkdir()
+    return {
+        "exe_path": "NW Scheduler.exe",
+        "window_title": "NW Scheduler",
+        "delays": TEST_DELAYS,
+        "pdf_folder": pdf_folder,
+        "categories": CATEGORIES,
+        "villes": VILLES,
+        "labels": OPTION_LABELS,
+    }
@@ -0,0 +1,69 @@
+"""
+Décisions de relance (plan_rerun) selon la progression enregistrée.
+"""
+
+from territory_automation.changes import (
+    CHANGED, DUPLICATE, LEGACY, NEW, RETRY, UNCHANGED, UNTRACKED, plan_rerun,
+)
+from territory_automation.data_loader import ProgressTracker
+
+
+def decisions(tracker, rows: list[tuple[str, str]], seen=None) -> dict[str, str]:
+    keys, hashes = zip(*rows)
+    rerun = plan_rerun(keys, hashes, tracker, seen)
+    return dict(zip(rerun.keys, rerun.decisions))
+
+
+def test_tracked_rows(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    tracker.mark_processed("1", "h1")
+    tracker.mark_processed("2", "h2")
+    tracker.mark_failed("3", "timeout")
+
+    assert decisions(tracker, [("1", "h1"), ("2", "h2-bis"), ("3", "h3"), ("4", "h4")]) == {
+        "1": UNCHANGED, "2": CHANGED, "3": RETRY, "4": NEW,
+    }
+    tracker.close()
+
+
+def test_legacy_numero_maps_to_row_without_suffix(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    # Ancienne progression: numéro seul, sans empreinte
+    tracker.mark_processed("12")
+    tracker.mark_processed("20.0")
+    tracker.mark_failed("12/C", "timeout")
+
+    result = decisions(tracker, [
+        ("12", "a"), ("12/A", "b"), ("12/B", "c"), ("12/C", "d"),
+        ("13/A", "e"), ("20", "f"), ("20/A", "g"),
+    ])
+    assert result == {
+        "12": UNTRACKED,
+        "12/A": LEGACY,
+        "12/B": LEGACY,
+        "12/C": RETRY,
+        "13/A": NEW,
+        "20": UNTRACKED,
+        "20/A": LEGACY,
+    }
+    tracker.close()
+
+
+def test_suffixed_rows_of_a_hashed_numero_are_new(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    tracker.mark_processed("12", "h12")
+
+    assert decisions(tracker, [("12", "h12"), ("12/A", "x")]) == {"12": UNCHANGED, "12/A": NEW}
+    tracker.close()
+
+
+def test_duplicates_across_chunks(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    seen = set()
+
+    rerun = plan_rerun(["1", "2", "1"], ["a", "b", "c"], tracker, seen)
+    assert rerun.decisions == [NEW, NEW, DUPLICATE]
+    rerun = plan_rerun(["2", "3"], ["b", "c"], tracker, seen)
+    assert rerun.decisions == [DUPLICATE, NEW]
+    assert seen == {"1", "2", "3"}
+    tracker.close()
@@ -0,0 +1,115 @@
+"""
+Exécution répartie (ShardCoordinator) contre plusieurs simulateurs NWS.
+"""
+
+import time
+from collections import Counter
+from pathlib import Path
+
+from conftest import make_territory
+from territory_automation.automation import NWSAutomator
+from territory_automation.coordinator import AutomatorFactory, ShardCoordinator
+from territory_automation.data_loader import ProgressTracker
+from territory_automation.errors import AutomationError
+from territory_automation.simulator import NWSSimulator
+
+
+class RecordingFactory:
+    """
+    Automatiseurs du simulateur qui notent chaque territoire créé dans un
+    fichier partagé entre les workers. Le worker `stalled` reste bloqué après
+    son premier territoire créé, avant d'envoyer le résultat.
+    """
+
+    def __init__(self, automator_kwargs: dict, log_file: Path, stalled: str, stall_seconds: float):
+        self.factory = AutomatorFactory(automator_kwargs, {})
+        self.log_file = log_file
+        self.stalled = stalled
+        self.stall_seconds = stall_seconds
+
+    def __call__(self, session: dict):
+        automator = self.factory(session)
+        execute_plan = automator.execute_plan
+        stall = [self.stall_seconds if session["name"] == self.stalled else 0.0]
+
+        def recorded(plan, no_save=False, journal=None):
+            ok = execute_plan(plan, no_save=no_save, journal=journal)
+            if ok:
+                with open(self.log_file, "a", encoding="utf-8") as f:
+                    f.write(f"{plan.progress_id}\n")
+                if stall[0]:
+                    time.sleep(stall[0])
+                    stall[0] = 0.0
+            return ok
+
+        automator.execute_plan = recorded
+        return automator
+
+
+class FailingFactory:
+    """Automatiseurs du simulateur dont la saisie de `failing` échoue toujours."""
+
+    def __init__(self, automator_kwargs: dict, failing: str):
+        self.factory = AutomatorFactory(automator_kwargs, {})
+        self.failing = failing
+
+    def __call__(self, session: dict):
+        automator = self.factory(session)
+        execute_plan = automator.execute_plan
+
+        def failing(plan, no_save=False, journal=None):
+            if plan.progress_id == self.failing:
+                raise AutomationError("Dialogue inattendu: \"Erreur\"")
+            return execute_plan(plan, no_save=no_save, journal=journal)
+
+        automator.execute_plan = failing
+        return automator
+
+
+def make_plans(automator_kwargs: dict, count: int) -> list:
+    automator = NWSAutomator(**automator_kwargs, **NWSSimulator().automator_kwargs())
+    return [automator.planner.plan(make_territory(i)) for i in range(count)]
+
+
+def test_stalled_worker_creates_no_duplicates(tmp_path, automator_kwargs):
+    plans = make_plans(automator_kwargs, 12)
+    log_file = tmp_path / "created.txt"
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    coordinator = ShardCoordinator(
+        sessions=[{"name": "w0"}, {"name": "w1"}, {"name": "w2"}],
+        factory=RecordingFactory(automator_kwargs, log_file, stalled="w0", stall_seconds=2.0),
+        tracker=tracker,
+        shard_size=3,
+        stall_timeout=1.5,
+    )
+
+    stats = coordinator.run(plans)
+    tracker.close()
+
+    created = Counter(log_file.read_text(encoding="utf-8").split())
+    assert [tid for tid, count in created.items() if count > 1] == []
+    assert set(created) == {plan.progress_id for plan in plans}
+    assert stats["processed"] == len(plans)
+    assert stats["failed"] == 0
+    assert stats["unassigned"] == 0
+    # Le résultat du worker bloqué est arrivé après son retrait, et a été accepté
+    assert stats["per_worker"]["w0"] == 1
+    assert tracker.processed == {plan.progress_id for plan in plans}
+
+
+def test_worker_reports_the_last_error(tmp_path, automator_kwargs):
+    plans = make_plans(automator_kwargs, 3)
+    failing = plans[1].progress_id
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    coordinator = ShardCoordinator(
+        sessions=[{"name": "w0"}],
+        factory=FailingFactory(automator_kwargs, failing),
+        tracker=tracker,
+        max_retries=2,
+    )
+
+    stats = coordinator.run(plans)
+    tracker.close()
+
+    assert (stats["processed"], stats["failed"]) == (2, 1)
+    assert tracker.failed == {failing: 'Dialogue inattendu: "Erreur" (w0)'}
@@ -0,0 +1,192 @@
+"""
+Chargement des données (DataLoader): conversion des nombres, territoires
+construits par colonnes, lecture par blocs et cache des données.
+"""
+
+import os
+
+import pandas as pd
+
+from config import EXCEL_COLUMNS
+from territory_automation import data_loader
+from territory_automation.data_loader import DataLoader
+from territory_automation.dataset_cache import DatasetCache
+
+
+def write_csv(path, rows: list[dict]):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_numeric_columns(tmp_path):
+    path = write_csv(tmp_path / "territoires.csv", [
+        {EXCEL_COLUMNS["numero"]: "007", EXCEL_COLUMNS["notes"]: "a"},
+        {EXCEL_COLUMNS["numero"]: "12.0", EXCEL_COLUMNS["notes"]: "b"},
+        {EXCEL_COLUMNS["numero"]: "3.50", EXCEL_COLUMNS["notes"]: "c"},
+    ])
+    loader = DataLoader(path, EXCEL_COLUMNS)
+    loader.load()
+
+    assert [t["numero"] for t in loader.get_all_territories()] == ["7", "12", "3.5"]
+
+
+def test_integers_beyond_int64_keep_their_text(tmp_path):
+    path = write_csv(tmp_path / "territoires.csv", [
+        {EXCEL_COLUMNS["numero"]: "12345678901234567890"},
+        {EXCEL_COLUMNS["numero"]: "-9223372036854775809"},
+        {EXCEL_COLUMNS["numero"]: "9223372036854775807"},
+        {EXCEL_COLUMNS["numero"]: "42.0"},
+    ])
+    loader = DataLoader(path, EXCEL_COLUMNS)
+    loader.load()
+
+    assert [t["numero"] for t in loader.get_all_territories()] == [
+        "12345678901234567890", "-9223372036854775809", "9223372036854775807", "42",
+    ]
+
+
+# Colonnes du fichier: une colonne hors mapping, deux colonnes du mapping absentes
+ROWS = [
+    {"Numero": "001", "Suffixe": "", "Categorie": "SAR", "Type": "Courrier", "Ville": "SARTROUVILLE",
+     "Lien_GPS": "https://maps.google.com/?q=48.9,2.1", "Notes": "Note, avec virgule",
+     "Ne_Pas_Visiter": "3", "Commentaire": "hors mapping"},
+    {"Numero": "2", "Suffixe": "A", "Categorie": "SAR", "Type": "", "Ville": "Maisons-Laffitte",
+     "Lien_GPS": "", "Notes": "", "Ne_Pas_Visiter": "", "Commentaire": ""},
+    {"Numero": "2", "Suffixe": "B", "Categorie": "", "Type": "Téléphone", "Ville": "",
+     "Lien_GPS": "", "Notes": "Ligne\nsur deux", "Ne_Pas_Visiter": "5.50", "Commentaire": "x"},
+    {"Numero": "12.0", "Suffixe": "", "Categorie": "MLF", "Type": "Entreprise", "Ville": "",
+     "Lien_GPS": "", "Notes": "N/A", "Ne_Pas_Visiter": "", "Commentaire": ""},
+    {"Numero": "4", "Suffixe": "C", "Categorie": "SAR", "Type": "", "Ville": "Sartrouville",
+     "Lien_GPS": "", "Notes": "Dernière", "Ne_Pas_Visiter": "", "Commentaire": ""},
+]
+
+
+def loaded(path) -> DataLoader:
+    loader = DataLoader(path, EXCEL_COLUMNS)
+    loader.load()
+    return loader
+
+
+def row_wise_records(loader: DataLoader) -> list[dict]:
+    """Construction ligne par ligne (ancien get_territory), référence des colonnes."""
+    records = []
+    for _, row in loader.data.iterrows():
+        records.append({
+            key: str(row[col_name]) if col_name in loader.data.columns else ""
+            for key, col_name in EXCEL_COLUMNS.items()
+        })
+    return records
+
+
+def test_column_wise_records_match_row_wise(tmp_path):
+    loader = loaded(write_csv(tmp_path / "territoires.csv", ROWS))
+
+    records = loader.get_all_territories()
+    assert records == row_wise_records(loader)
+    assert list(loader.iter_territories()) == records
+    assert [loader.get_territory(i) for i in range(len(loader))] == records
+    assert [r["numero"] for r in records] == ["1", "2", "2", "12", "4"]
+    assert records[2]["ne_pas_visiter"] == "5.5"
+    assert records[0]["notes_proclamateur"] == ""
+    # Copie: modifier un territoire ne modifie pas la liste partagée
+    loader.get_territory(0)["notes"] = "modifiée"
+    assert loader.get_all_territories()[0]["notes"] == "Note, avec virgule"
+
+
+def write_xlsx(path, rows: list[dict]):
+    """Classeur avec des cellules numériques (numéros, nombres), comme saisi dans Excel."""
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    columns = list(rows[0])
+    sheet.append(columns)
+    for row in rows:
+        values = []
+        for column in columns:
+            value = row[column]
+            if column in ("Numero", "Ne_Pas_Visiter") and value:
+                value = float(value) if "." in value else int(value)
+            values.append(value or None)
+        sheet.append(values)
+    workbook.save(path)
+    return path
+
+
+def streamed_records(path, chunk_size: int) -> tuple[list[dict], list]:
+    chunks = list(DataLoader(path, EXCEL_COLUMNS).stream(chunk_size=chunk_size))
+    records = [record for chunk in chunks for record in chunk.get_all_territories()]
+    fingerprints = [row for chunk in chunks for row in chunk.fingerprints().itertuples(index=False)]
+    return records, fingerprints
+
+
+def test_stream_chunks_match_load(tmp_path):
+    for path in (
+        write_csv(tmp_path / "territoires.csv", ROWS),
+        write_xlsx(tmp_path / "territoires.xlsx", ROWS),
+    ):
+        loader = loaded(path)
+        expected = loader.get_all_territories()
+        for chunk_size in (1, 2, len(ROWS) + 1):
+            records, fingerprints = streamed_records(path, chunk_size)
+            assert records == expected, (path.name, chunk_size)
+            assert fingerprints == list(loader.fingerprints().itertuples(index=False))
+
+
+def test_cache_hit_matches_load(tmp_path, monkeypatch):
+    path = write_csv(tmp_path / "territoires.csv", ROWS)
+    expected = loaded(path)
+    cache = DatasetCache(tmp_path / "cache")
+
+    first = DataLoader(path, EXCEL_COLUMNS, cache=cache)
+    first.load()
+    assert cache.entry_path(path, EXCEL_COLUMNS).exists()
+
+    # Fichier inchangé: relu du cache, sans pandas.read_csv
+    def no_read(*args, **kwargs):
+        raise AssertionError("fichier relu malgré le cache")
+    monkeypatch.setattr(data_loader.pd, "read_csv", no_read)
+    cached = DataLoader(path, EXCEL_COLUMNS, cache=DatasetCache(tmp_path / "cache"))
+    cached.load()
+
+    assert cached.header == expected.header
+    assert cached.get_all_territories() == expected.get_all_territories()
+    assert cached.fingerprints().equals(expected.fingerprints())
+
+
+def test_cache_key_follows_mapping_and_content(tmp_path):
+    path = write_csv(tmp_path / "territoires.csv", ROWS)
+    cache = DatasetCache(tmp_path / "cache")
+    DataLoader(path, EXCEL_COLUMNS, cache=cache).load()
+
+    # Mapping différent: autre entrée
+    mapping = {key: column for key, column in EXCEL_COLUMNS.items() if key != "notes"}
+    assert cache.entry_path(path, mapping) != cache.entry_path(path, EXCEL_COLUMNS)
+    assert cache.get(path, mapping) is None
+    assert cache.get(path, EXCEL_COLUMNS) is not None
+
+    # Contenu modifié, même taille et même date: l'empreinte du contenu change la clé
+    before = cache.entry_path(path, EXCEL_COLUMNS)
+    stat = path.stat()
+    content = path.read_text(encoding="utf-8")
+    assert "Dernière" in content
+    path.write_text(content.replace("Dernière", "Derniére"), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert path.stat().st_size == stat.st_size
+
+    fresh = DatasetCache(tmp_path / "cache")
+    assert fresh.entry_path(path, EXCEL_COLUMNS) != before
+    assert fresh.get(path, EXCEL_COLUMNS) is None
+    reloaded = DataLoader(path, EXCEL_COLUMNS, cache=fresh)
+    reloaded.load()
+    assert reloaded.get_all_territories()[-1]["notes"] == "Derniére"
+    # L'ancienne entrée du même fichier est remplacée
+    assert not before.exists()
+
+
+def test_refresh_ignores_the_cache(tmp_path):
+    path = write_csv(tmp_path / "territoires.csv", ROWS)
+    DataLoader(path, EXCEL_COLUMNS, cache=DatasetCache(tmp_path / "cache")).load()
+
+    refresh = DatasetCache(tmp_path / "cache", refresh=True)
+    assert refresh.get(path, EXCEL_COLUMNS) is None
@@ -0,0 +1,73 @@
+"""
+Fichier d'import NWS (--export-nws), comparé à un fichier de référence.
+
+Pour régénérer la référence après un changement voulu du format:
+    uv run pytest tests/test_exporter.py --update-golden
+(puis relisez le diff de tests/fixtures/nws_import_golden.csv)
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from config import EXCEL_COLUMNS
+from territory_automation.data_loader import DataLoader
+from territory_automation.exporter import NWSImportExporter
+
+FIXTURES = Path(__file__).parent / "fixtures"
+GOLDEN = FIXTURES / "nws_import_golden.csv"
+
+COLUMNS = {
+    "categorie": "Category",
+    "numero": "Number",
+    "suffixe": "Suffix",
+    "type": "Type",
+    "ville": "Locality",
+    "notes": "Notes",
+}
+CATEGORIES = {"SAR": "dropdown_option_sar", "MAI": "dropdown_option_mai"}
+VILLES = {"SARTROUVILLE": "dropdown_ville_sartrouville", "": "dropdown_ville_aucun"}
+LABELS = {
+    "dropdown_option_sar": "Sartrouville (SAR)",
+    "dropdown_option_mai": "Maisons (MAI)",
+    "dropdown_ville_sartrouville": "Sartrouville",
+    "dropdown_ville_aucun": "(Aucune)",
+}
+
+# Lignes du fichier de données (colonnes de EXCEL_COLUMNS)
+ROWS = [
+    # Suffixe vide, libellés de catégorie et de ville
+    {"numero": "SAR-1-01", "suffixe": "", "categorie": "SAR", "type": "Courrier",
+     "ville": "SARTROUVILLE", "notes": "Résidence"},
+    # Suffixe, catégorie en minuscules, ville vide, notes avec séparateur et guillemets
+    {"numero": "SAR-1-02", "suffixe": "A", "categorie": "mai", "type": "téléphone",
+     "ville": "", "notes": 'Digicode; "1234"'},
+    # Catégorie vide (première catégorie), type par défaut, numéro lu comme nombre
+    {"numero": "7", "suffixe": "", "categorie": "", "type": "",
+     "ville": "SARTROUVILLE", "notes": ""},
+]
+
+
+def export(tmp_path: Path, delimiter: str = ";") -> Path:
+    frame = pd.DataFrame([{EXCEL_COLUMNS[k]: row.get(k, "") for k in EXCEL_COLUMNS} for row in ROWS])
+    data_file = tmp_path / "territories.csv"
+    frame.to_csv(data_file, index=False, encoding="utf-8-sig")
+    loader = DataLoader(data_file, EXCEL_COLUMNS)
+    loader.load()
+
+    path = tmp_path / "nws_import.csv"
+    exporter = NWSImportExporter(COLUMNS, CATEGORIES, VILLES, LABELS, delimiter)
+    assert exporter.export(loader.iter_territories(), path) == len(ROWS)
+    return path
+
+
+def test_export_matches_golden(tmp_path, request):
+    output = export(tmp_path).read_bytes()
+    if request.config.getoption("--update-golden"):
+        GOLDEN.write_bytes(output)
+    assert output == GOLDEN.read_bytes()
+
+
+def test_export_uses_delimiter(tmp_path):
+    header = export(tmp_path, delimiter="\t").read_bytes().splitlines()[0]
+    assert header == "\ufeffCategory\tNumber\tSuffix\tType\tLocality\tNotes".encode("utf-8")
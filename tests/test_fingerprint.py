@@ -0,0 +1,95 @@
+"""
+Effets attendus des actions (ActionVerifier) sur des captures enregistrées.
+"""
+
+import numpy as np
+import pytest
+
+from territory_automation.fingerprint import ActionVerifier, StoredScreens, fingerprint
+
+# Menu déroulant calibré en (100, 60); sa liste s'ouvre dessous
+DROPDOWN = (100, 60)
+REGION = (-40, -20, 160, 100)
+
+
+def screen(menu: str = "") -> np.ndarray:
+    """Capture RGB: fond clair, menu déroulant, et liste ouverte éventuelle."""
+    image = np.full((200, 300, 3), 230, dtype=np.uint8)
+    image[50:70, 60:200] = 250
+    if menu == "type":
+        image[70:140, 60:200] = 255
+        for row in range(75, 140, 16):
+            image[row:row + 4, 66:150] = 40
+    elif menu == "error":
+        # Dialogue d'erreur par-dessus: la région change aussi
+        image[30:150, 40:260] = 120
+    return image
+
+
+@pytest.fixture
+def screens(tmp_path) -> StoredScreens:
+    frames = {}
+    for name in ("closed", "type", "error"):
+        path = tmp_path / f"{name}.npy"
+        np.save(path, screen(name if name != "closed" else ""))
+        frames[name] = path
+    return StoredScreens(frames)
+
+
+def verify(verifier: ActionVerifier, screens: StoredScreens, before: str, after: str):
+    screens.show(before)
+    snapshot = verifier.capture("dropdown_type", *DROPDOWN)
+    screens.show(after)
+    return verifier.satisfied(snapshot)
+
+
+def make_verifier(screens, expect=None, folder=None) -> ActionVerifier:
+    return ActionVerifier(
+        screens,
+        regions={"dropdown_type": REGION},
+        expectations={"dropdown_type": expect} if expect else None,
+        fingerprint_folder=folder,
+    )
+
+
+def test_changed_is_the_default(screens):
+    verifier = make_verifier(screens)
+    assert verify(verifier, screens, "closed", "type") is True
+    assert verify(verifier, screens, "closed", "closed") is False
+    # Tout changement compte, y compris un dialogue d'erreur
+    assert verify(verifier, screens, "closed", "error") is True
+
+
+def test_unchanged(screens):
+    verifier = make_verifier(screens, "unchanged")
+    assert verify(verifier, screens, "closed", "closed") is True
+    assert verify(verifier, screens, "closed", "type") is False
+
+
+def test_match_stored_fingerprint(screens, tmp_path):
+    folder = tmp_path / "fingerprints"
+    folder.mkdir()
+    left, top, width, height = DROPDOWN[0] + REGION[0], DROPDOWN[1] + REGION[1], REGION[2], REGION[3]
+    np.save(folder / "dropdown_type.npy", fingerprint(screen("type")[top:top + height, left:left + width]))
+
+    verifier = make_verifier(screens, "match", folder)
+    assert verify(verifier, screens, "closed", "type") is True
+    assert verify(verifier, screens, "closed", "error") is False
+    assert verify(verifier, screens, "closed", "closed") is False
+    # Indépendant de la capture d'avant l'action
+    assert verify(verifier, screens, "type", "type") is True
+
+
+def test_match_accepts_stored_region(screens, tmp_path):
+    left, top = DROPDOWN[0] + REGION[0], DROPDOWN[1] + REGION[1]
+    np.save(tmp_path / "dropdown_type.npy", screen("type")[top:top + REGION[3], left:left + REGION[2]])
+
+    verifier = make_verifier(screens, "match", tmp_path)
+    assert verify(verifier, screens, "closed", "type") is True
+
+
+def test_invalid_expectations(screens, tmp_path):
+    with pytest.raises(ValueError):
+        make_verifier(screens, "appeared")
+    with pytest.raises(ValueError):
+        make_verifier(screens, "match", tmp_path)
@@ -0,0 +1,109 @@
+"""
+Progression en journal JSONL (ProgressTracker): migration, compactage, reprise.
+"""
+
+import json
+
+from territory_automation import data_loader
+from territory_automation.data_loader import ProgressTracker
+
+
+def journal_lines(tracker: ProgressTracker) -> list[dict]:
+    return [json.loads(line) for line in tracker.progress_file.read_text(encoding="utf-8").splitlines()]
+
+
+def test_migrates_legacy_json(tmp_path):
+    legacy = tmp_path / "progress.json"
+    legacy.write_text(json.dumps({
+        "processed": ["1", "2"],
+        "failed": [{"id": "2", "error": "ancien échec"}, {"id": "3", "error": "timeout"}],
+    }), encoding="utf-8")
+
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    tracker.close()
+
+    assert tracker.processed == {"1", "2"}
+    assert tracker.failed == {"3": "timeout"}
+    assert not legacy.exists()
+    assert (tmp_path / "progress.json.bak").exists()
+    assert len(journal_lines(tracker)) == 3
+
+    # Migration unique: le journal suffit au chargement suivant
+    reloaded = ProgressTracker(tmp_path / "progress.jsonl")
+    assert (reloaded.processed, reloaded.failed) == ({"1", "2"}, {"3": "timeout"})
+    reloaded.close()
+
+
+def test_journal_is_compacted_on_load(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    tracker.mark_processed("1", "h1")
+    tracker.mark_processed("1", "h2")
+    tracker.mark_failed("2", "timeout")
+    tracker.mark_failed("2", "dialogue inattendu")
+    tracker.mark_processed("2", "h3")
+    tracker.mark_failed("3", "timeout")
+    tracker.close()
+    assert len(journal_lines(tracker)) == 6
+
+    reloaded = ProgressTracker(tmp_path / "progress.jsonl")
+    reloaded.close()
+
+    assert reloaded.processed == {"1", "2"}
+    assert reloaded.hashes == {"1": "h2", "2": "h3"}
+    assert reloaded.failed == {"3": "timeout"}
+    assert journal_lines(reloaded) == [
+        {"id": "1", "status": "processed", "hash": "h2"},
+        {"id": "2", "status": "processed", "hash": "h3"},
+        {"id": "3", "status": "failed", "error": "timeout"},
+    ]
+    assert not reloaded.progress_file.with_suffix(".jsonl.tmp").exists()
+
+
+def test_torn_last_line_after_a_crash(tmp_path):
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+    tracker.mark_processed("1", "h1")
+    tracker.mark_processed("2", "h2")
+    tracker.close()
+    # Arrêt brutal pendant l'écriture de la ligne suivante
+    with open(tracker.progress_file, "a", encoding="utf-8") as f:
+        f.write('{"id": "3", "sta')
+
+    reloaded = ProgressTracker(tmp_path / "progress.jsonl")
+    assert reloaded.processed == {"1", "2"}
+    reloaded.mark_processed("3", "h3")
+    reloaded.close()
+
+    # Ligne tronquée écartée par le compactage: la suivante reste lisible
+    assert [record["id"] for record in journal_lines(reloaded)] == ["1", "2", "3"]
+    assert ProgressTracker(tmp_path / "progress.jsonl").processed == {"1", "2", "3"}
+
+
+def test_sync_every_batches_fsync(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(data_loader.os, "fsync", lambda fd: synced.append(fd))
+
+    tracker = ProgressTracker(tmp_path / "batched.jsonl", sync_every=3)
+    for i in range(7):
+        tracker.mark_processed(str(i), f"h{i}")
+    assert len(synced) == 2
+    tracker.close()
+    assert len(synced) == 3
+
+    synced.clear()
+    tracker = ProgressTracker(tmp_path / "every.jsonl")
+    for i in range(4):
+        tracker.mark_processed(str(i))
+    assert len(synced) == 4
+    # Déjà traité avec la même empreinte: aucune écriture
+    tracker.mark_processed("0")
+    tracker.close()
+    assert len(synced) == 4
+
+    synced.clear()
+    tracker = ProgressTracker(tmp_path / "system.jsonl", sync_every=0)
+    for i in range(4):
+        tracker.mark_processed(str(i))
+    assert synced == []
+    tracker.close()
+    assert len(synced) == 1
+    assert len(journal_lines(tracker)) == 4
@@ -0,0 +1,93 @@
+"""
+Progression SQLite partagée (SQLiteProgressTracker): réservations entre sessions.
+"""
+
+import threading
+
+from territory_automation.progress_db import SQLiteProgressTracker
+
+
+def open_tracker(db_file, owner: str, **kwargs) -> SQLiteProgressTracker:
+    return SQLiteProgressTracker(db_file, owner=owner, **kwargs)
+
+
+def test_only_one_session_wins_a_claim(tmp_path):
+    db_file = tmp_path / "progress.db"
+    first, second = open_tracker(db_file, "vm1"), open_tracker(db_file, "vm2")
+
+    assert first.claim("12/A") is True
+    assert second.claim("12/A") is False
+    # La session qui détient la réservation peut la renouveler (nouvelle tentative)
+    assert first.claim("12/A") is True
+
+    first.mark_processed("12/A", "h1")
+    assert second.claim("12/A", "h1") is False
+    # Contenu modifié depuis le traitement: de nouveau réservable
+    assert second.claim("12/A", "h2") is True
+    assert first.claim("12/A", "h2") is False
+
+    # Réservations libérées à la fermeture de la session
+    assert first.claim("13") is True
+    first.close()
+    assert second.claim("13") is True
+    assert [attempt["owner"] for attempt in second.history("13")] == ["vm1", "vm2"]
+    second.close()
+
+
+def test_stale_claim_is_taken_over(tmp_path):
+    db_file = tmp_path / "progress.db"
+    crashed = open_tracker(db_file, "vm1")
+    assert crashed.claim("7") is True
+
+    # Session arrêtée brutalement: réservation reprise après claim_timeout
+    assert open_tracker(db_file, "vm2").claim("7") is False
+    other = open_tracker(db_file, "vm3", claim_timeout=0.0)
+    assert other.claim("7") is True
+    other.close()
+
+
+def test_concurrent_claims_are_exclusive(tmp_path):
+    db_file = tmp_path / "progress.db"
+    open_tracker(db_file, "init").close()
+    ids = [str(i) for i in range(60)]
+    won = {}
+    start = threading.Barrier(2)
+
+    def session(owner: str):
+        # Une connexion par thread, comme une connexion par import
+        tracker = open_tracker(db_file, owner)
+        start.wait()
+        won[owner] = [territory_id for territory_id in ids if tracker.claim(territory_id)]
+        tracker.db.close()
+
+    threads = [threading.Thread(target=session, args=(owner,)) for owner in ("vm1", "vm2")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not set(won["vm1"]) & set(won["vm2"])
+    assert sorted(won["vm1"] + won["vm2"], key=int) == ids
+
+
+def test_snapshot_refreshed_after_another_session_writes(tmp_path):
+    db_file = tmp_path / "progress.db"
+    writer, reader = open_tracker(db_file, "vm1"), open_tracker(db_file, "vm2")
+
+    assert reader.processed == set()
+    snapshot = reader._snapshot()
+    # Base inchangée: l'instantané est réutilisé sans nouvelle requête
+    assert reader._snapshot() is snapshot
+
+    writer.mark_processed("1", "h1")
+    writer.mark_failed("2", "timeout")
+
+    # PRAGMA data_version a changé pour la connexion du lecteur
+    assert reader.processed == {"1"}
+    assert reader.hashes == {"1": "h1"}
+    assert reader.failed == {"2": "timeout"}
+    assert reader.is_processed("1")
+    assert reader._snapshot() is not snapshot
+
+    writer.close()
+    reader.close()
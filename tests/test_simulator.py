@@ -0,0 +1,95 @@
+"""
+Automatisation de bout en bout contre le simulateur NWS.
+"""
+
+import logging
+
+import pandas as pd
+
+from conftest import make_territory
+from config import EXCEL_COLUMNS
+from main import run_automation
+from territory_automation.automation import NWSAutomator
+from territory_automation.data_loader import DataLoader, ProgressTracker
+from territory_automation.simulator import NWSSimulator
+
+
+def make_automator(automator_kwargs: dict, simulator: NWSSimulator) -> NWSAutomator:
+    automator = NWSAutomator(**automator_kwargs, **simulator.automator_kwargs())
+    assert automator.launch_application()
+    return automator
+
+
+def make_loader(tmp_path, territories: list[dict]) -> DataLoader:
+    path = tmp_path / "territoires.csv"
+    pd.DataFrame([
+        {column: territory[key] for key, column in EXCEL_COLUMNS.items()}
+        for territory in territories
+    ]).to_csv(path, index=False)
+    loader = DataLoader(path, EXCEL_COLUMNS)
+    loader.load()
+    return loader
+
+
+def test_creates_territory(automator_kwargs):
+    simulator = NWSSimulator()
+    automator = make_automator(automator_kwargs, simulator)
+    territory = make_territory(
+        1, suffixe="A", categorie="SAR", type="Courrier", ville="SARTROUVILLE",
+        lien_gps="https://maps.google.com/?q=48.9,2.1",
+    )
+
+    assert automator.process_territory(territory, no_save=True)
+
+    record = simulator.records[-1]
+    assert record["numero"] == "T-001"
+    assert record["suffixe"] == "A"
+    assert record["categorie"] == "SAR"
+    assert record["type"] == "Courrier"
+    assert record["ville"] == "SARTROUVILLE"
+    assert record["lien_gps"] == "https://maps.google.com/?q=48.9,2.1"
+    assert record["notes"] == "Note 1"
+
+
+def test_creates_territory_without_uia(automator_kwargs):
+    """Sans ValuePattern ni sélection UIA: presse-papiers et saisie du libellé."""
+    simulator = NWSSimulator(value_pattern=False, uia_selection=False)
+    automator = make_automator(automator_kwargs, simulator)
+
+    assert automator.process_territory(make_territory(2, type="Téléphone"), no_save=True)
+
+    record = simulator.records[-1]
+    assert (record["numero"], record["type"], record["notes"]) == ("T-002", "Téléphone", "Note 2")
+    assert automator.metrics["text_direct"] == 0
+    assert automator.metrics["text_paste"] > 0
+
+
+def test_update_changes_modified_fields_only(automator_kwargs):
+    existing = {"numero": "T-003", "categorie": "SAR", "type": "Courrier", "notes": "Ancienne note"}
+    simulator = NWSSimulator(records=[existing])
+    automator = make_automator(automator_kwargs, simulator)
+
+    changed = automator.update_territory(
+        make_territory(3, categorie="SAR", type="Courrier", notes="Nouvelle note")
+    )
+
+    assert changed == 1
+    assert len(simulator.records) == 1
+    assert simulator.records[0]["notes"] == "Nouvelle note"
+    assert simulator.records[0]["type"] == "Courrier"
+
+
+def test_run_automation_with_lost_clicks(tmp_path, automator_kwargs):
+    territories = [make_territory(i, type="Courrier" if i % 2 else "") for i in range(20)]
+    loader = make_loader(tmp_path, territories)
+    simulator = NWSSimulator(miss_rate=0.02, seed=1)
+    automator = make_automator(automator_kwargs, simulator)
+    tracker = ProgressTracker(tmp_path / "progress.jsonl")
+
+    run_automation(logging.getLogger("territory_automation"), loader, tracker, automator)
+    tracker.close()
+
+    numeros = [record["numero"] for record in simulator.records]
+    assert simulator.stats["missed_clicks"] > 0
+    assert sorted(numeros) == sorted(t["numero"] for t in territories)
+    assert tracker.processed == set(numeros)
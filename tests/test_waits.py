@@ -0,0 +1,175 @@
+"""
+Attentes conditionnelles (Waiter) contre une sonde factice scriptée.
+"""
+
+import pytest
+
+from territory_automation.elements import ElementRegistry
+from territory_automation.waits import PywinautoProbe, UIProbe, Waiter
+
+
+class FakeClock:
+    """Horloge et attente simulées: sleep() avance le temps sans dormir."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class ScriptedProbe(UIProbe):
+    """Sonde dont l'élément apparaît à un instant donné (None: non observable)."""
+
+    def __init__(self, clock: FakeClock, appears_at=None, observable: bool = True):
+        self.clock = clock
+        self.appears_at = appears_at
+        self.observable = observable
+        self.calls = 0
+
+    def element_exists(self, element_name):
+        self.calls += 1
+        if not self.observable:
+            return None
+        return self.appears_at is not None and self.clock() >= self.appears_at
+
+
+def make_waiter(probe, clock, **kwargs) -> Waiter:
+    return Waiter(probe, poll_interval=0.05, sleep=clock.sleep, clock=clock, **kwargs)
+
+
+def test_condition_met_before_timeout():
+    clock = FakeClock()
+    probe = ScriptedProbe(clock, appears_at=0.2)
+
+    assert make_waiter(probe, clock).element_exists("dropdown_option_sar", 1.0) is True
+    assert clock.now == pytest.approx(0.2)
+    assert probe.calls == 5
+
+
+def test_immediate_condition_does_not_sleep():
+    clock = FakeClock()
+    probe = ScriptedProbe(clock, appears_at=0.0)
+
+    assert make_waiter(probe, clock).element_exists("btn_carte", 1.0) is True
+    assert clock.sleeps == []
+
+
+def test_timeout():
+    clock = FakeClock()
+    probe = ScriptedProbe(clock)
+
+    assert make_waiter(probe, clock).element_exists("btn_carte", 0.3) is False
+    assert clock.now == pytest.approx(0.3)
+    # Jamais au-delà du délai maximal
+    assert max(clock.sleeps) <= 0.05 + 1e-9
+
+
+def test_unobservable_waits_the_full_timeout():
+    clock = FakeClock()
+    probe = ScriptedProbe(clock, observable=False)
+
+    assert make_waiter(probe, clock).element_exists("btn_carte", 0.7) is True
+    assert clock.sleeps == [pytest.approx(0.7)]
+    assert probe.calls == 1
+
+
+def test_window_closes_inverts_the_probe():
+    clock = FakeClock()
+
+    class Windows(UIProbe):
+        def window_exists(self, title_pattern):
+            return clock() < 0.1
+
+    waiter = make_waiter(Windows(), clock)
+    assert waiter.window_closes("Ouvrir", 1.0) is True
+    assert clock.now == pytest.approx(0.1)
+    # Sonde de base: rien d'observable, délai complet
+    clock.sleeps.clear()
+    assert make_waiter(UIProbe(), clock).window_closes("Ouvrir", 0.4) is True
+    assert clock.sleeps == [pytest.approx(0.4)]
+
+
+def test_interrupt_aborts_the_wait():
+    clock = FakeClock()
+    probe = ScriptedProbe(clock)
+
+    def interrupt():
+        if clock() >= 0.1:
+            raise RuntimeError("dialogue inattendu")
+
+    with pytest.raises(RuntimeError):
+        make_waiter(probe, clock, interrupt=interrupt).element_exists("btn_carte", 1.0)
+    assert clock.now == pytest.approx(0.1)
+
+
+class _Control:
+    def __init__(self, visible: bool = True, enabled: bool = True):
+        self.visible = visible
+        self.enabled = enabled
+
+    def is_visible(self):
+        return self.visible
+
+    def is_enabled(self):
+        return self.enabled
+
+
+class _Registry(ElementRegistry):
+    """Registre dont les contrôles sont scriptés (ni UIA ni bureau)."""
+
+    def __init__(self, coordinates, locators, located, under_point):
+        super().__init__(coordinates, locators)
+        self.located = located
+        self.under_point = under_point
+
+    def _resolve_by_locator(self, element_name):
+        return self.located.get(element_name) if element_name in self.locators else None
+
+    def _resolve_by_point(self, element_name):
+        return self.under_point if element_name in self.coords else None
+
+
+def make_probe(located: dict) -> PywinautoProbe:
+    registry = _Registry(
+        coordinates={
+            "btn_liste_territoires": (400, 300), "btn_carte": (50, 80),
+            "btn_confirm_type": (420, 320), "btn_import_pdf": (600, 500),
+        },
+        locators={"btn_carte": {"auto_id": "TabCarte"}, "btn_import_pdf": {"auto_id": "AddFile"}},
+        located=located,
+        under_point=_Control(),
+    )
+    probe = PywinautoProbe(registry)
+    # Bureau UIA simulé: la sonde interroge le registre
+    probe._desktop = object()
+    return probe
+
+
+def test_probe_ignores_controls_under_the_calibrated_point():
+    probe = make_probe({"btn_carte": _Control(enabled=False)})
+
+    # Seul le contrôle sous le point est visible: l'élément n'est pas observable
+    assert probe.element_exists("btn_liste_territoires") is None
+    assert probe.element_enabled("btn_liste_territoires") is None
+    # Trouvé par localisateur: état réel
+    assert probe.element_exists("btn_carte") is True
+    assert probe.element_enabled("btn_carte") is False
+    # Le clic reste possible au point calibré
+    assert probe.registry.resolve("btn_liste_territoires") is probe.registry.under_point
+    assert probe.element_exists("btn_liste_territoires") is None
+
+
+def test_transient_elements_are_never_resolved_by_point():
+    probe = make_probe({})
+
+    assert probe.registry.resolve("btn_confirm_type") is None
+    assert probe.element_enabled("btn_confirm_type") is None
+    # Localisateur sans contrôle (onglet pas encore affiché): non observable
+    assert probe.element_exists("btn_import_pdf") is None
+    assert probe.registry.position("btn_confirm_type") == (420, 320)
@@ -0,0 +1,149 @@
+"""
+Surveillance des dialogues (ModalWatcher) contre le simulateur NWS.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import make_territory
+from config import MODAL_RULES, MODAL_DEFAULT_RULE
+from territory_automation.automation import NWSAutomator
+from territory_automation import waits
+from territory_automation.checkpoints import StepJournal
+from territory_automation.elements import ElementRegistry
+from territory_automation.simulator import NWSSimulator
+from territory_automation.watcher import ModalWatcher, ModalInterrupt
+
+
+def make_automator(automator_kwargs: dict, simulator: NWSSimulator) -> NWSAutomator:
+    return NWSAutomator(
+        **automator_kwargs,
+        **simulator.automator_kwargs(),
+        modal_watcher_config={
+            "enabled": True,
+            "interval": 0.02,
+            "rules": MODAL_RULES,
+            "default_rule": MODAL_DEFAULT_RULE,
+        },
+    )
+
+
+def test_type_confirmation_resolved_by_watcher(automator_kwargs):
+    simulator = NWSSimulator()
+    automator = make_automator(automator_kwargs, simulator)
+    assert automator.launch_application()
+
+    territory = make_territory(1, type="Courrier")
+    plan = automator.planner.plan(territory, no_save=True)
+    ops = [(action.op, action.target) for action in plan.actions if action.step == 5]
+    assert ("await_modal", "confirm_type") in ops
+    assert ("click", "btn_confirm_type") not in ops
+
+    try:
+        assert automator.execute_plan(plan, no_save=True)
+    finally:
+        automator.stop_watcher()
+
+    assert simulator.records[-1]["type"] == "Courrier"
+    assert simulator.modal_type is None
+    assert automator.watcher.stats["expected"] == 1
+    assert automator.watcher.stats["aborted"] == 0
+
+
+class _Probe:
+    """Sonde qui fait apparaître une fenêtre d'erreur après le démarrage."""
+
+    def __init__(self):
+        self.windows = [(1, 100, "NW Scheduler")]
+
+    def process_windows(self):
+        return list(self.windows)
+
+
+class _Backend:
+    def __init__(self):
+        self.pressed = []
+
+    def press(self, key: str):
+        self.pressed.append((key, time.monotonic()))
+
+
+def test_watcher_waits_for_input_lock():
+    probe, backend = _Probe(), _Backend()
+    input_lock = threading.RLock()
+    watcher = ModalWatcher(
+        probe, backend, [{"title": "Erreur", "action": "enter", "abort": True}],
+        interval=0.01, input_lock=input_lock
+    )
+    assert watcher.start(100)
+
+    try:
+        with input_lock:
+            probe.windows.append((2, 100, "Erreur"))
+            time.sleep(0.2)
+            # Interruption signalée, mais aucune touche pendant la saisie
+            with pytest.raises(ModalInterrupt):
+                watcher.check()
+            assert backend.pressed == []
+            released = time.monotonic()
+        deadline = time.monotonic() + 1.0
+        while not backend.pressed and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        watcher.stop()
+
+    assert [key for key, _ in backend.pressed] == ["enter"]
+    assert backend.pressed[0][1] >= released
+
+
+def test_modal_interrupt_propagates_to_the_caller(automator_kwargs):
+    simulator = NWSSimulator(seed=1)
+    automator = make_automator(automator_kwargs, simulator)
+    assert automator.launch_application()
+    # Message d'erreur après chaque clic
+    simulator.error_rate = 1.0
+    plan = automator.planner.plan(make_territory(4, type="Courrier"), no_save=True)
+    journal = StepJournal(plan.territory_id)
+
+    try:
+        with pytest.raises(ModalInterrupt):
+            automator.execute_plan(plan, no_save=True, journal=journal)
+        assert journal.failed_step is not None
+
+        # Nouvelle tentative (décidée par l'appelant): reprise sans doublon
+        simulator.error_rate = 0.0
+        assert automator.execute_plan(plan, no_save=True, journal=journal)
+    finally:
+        automator.stop_watcher()
+
+    assert [record["numero"] for record in simulator.records] == ["T-004"]
+    assert simulator.records[0]["type"] == "Courrier"
+
+
+def test_untitled_popups_are_not_dialogs(monkeypatch):
+    probe, backend = waits.PywinautoProbe(ElementRegistry({})), _Backend()
+    windows = [SimpleNamespace(handle=1, process_id=100, name="NW Scheduler", class_name="WindowsForms10")]
+    finder = SimpleNamespace(find_elements=lambda **kwargs: list(windows))
+    monkeypatch.setattr(waits, "PYWINAUTO_AVAILABLE", True)
+    monkeypatch.setattr(waits, "findwindows", finder, raising=False)
+
+    watcher = ModalWatcher(probe, backend, MODAL_RULES, MODAL_DEFAULT_RULE)
+    watcher._known = {1}
+    watcher.pid = 100
+
+    # Liste d'un menu déroulant et info-bulle de NWS: sans titre
+    windows.append(SimpleNamespace(handle=2, process_id=100, name="", class_name="ComboLBox"))
+    windows.append(SimpleNamespace(handle=3, process_id=100, name="", class_name="tooltips_class32"))
+    watcher.poll()
+    assert backend.pressed == []
+    watcher.check()
+
+    # Dialogue inconnu sans titre: règle par défaut
+    windows.append(SimpleNamespace(handle=4, process_id=100, name="", class_name=waits.DIALOG_CLASS))
+    watcher.poll()
+    assert [key for key, _ in backend.pressed] == ["escape"]
+    with pytest.raises(ModalInterrupt):
+        watcher.check()
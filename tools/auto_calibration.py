@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Calibration automatique par recherche de vignettes (template matching).
+
+Au lieu de pointer chaque element a la souris, une capture de chaque ecran
+NWS suffit: les vignettes de reference (data/templates/) y sont recherchees
+et data/calibration.json est ecrit en quelques secondes. Les correspondances
+peu fiables sont signalees et ne remplacent pas la valeur existante.
+
+Les vignettes sont creees une fois, a partir d'une calibration correcte
+(tools/calibration.py) et des captures des memes ecrans.
+
+Usage:
+    uv run python tools/auto_calibration.py --save-templates   # Une fois, apres calibration.py
+    uv run python tools/auto_calibration.py                    # Recalibration (captures guidees)
+    uv run python tools/auto_calibration.py --screens data/screens   # Captures enregistrees
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from territory_automation.elements import ELEMENTS_TO_CALIBRATE, CALIBRATION_SCREENS
+from territory_automation.fingerprint import StoredScreens
+from territory_automation.profiles import CalibrationProfiles, detect_layout, find_window
+from territory_automation.templates import TemplateStore, auto_calibrate, crop_template
+
+ROOT = Path(__file__).parent.parent
+
+# Chemin du fichier de calibration
+CALIBRATION_FILE = ROOT / "data" / "calibration.json"
+
+# Dossiers par défaut des vignettes et des captures
+TEMPLATES_FOLDER = ROOT / "data" / "templates"
+SCREENS_FOLDER = ROOT / "data" / "screens"
+
+# Extensions acceptées pour les captures enregistrées
+SCREEN_EXTENSIONS = (".png", ".npy", ".bmp", ".jpg")
+
+# Titre de la fenêtre NWS (identique à NWS_WINDOW_TITLE dans config.py)
+NWS_WINDOW_TITLE = "NW Scheduler"
+
+
+def parse_args():
+    """Parse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        description="Calibration automatique de New World Scheduler par captures d'ecran"
+    )
+    parser.add_argument(
+        "--screens",
+        type=Path,
+        default=None,
+        help="Dossier de captures enregistrees (<ecran>.png ou .npy) au lieu de captures guidees"
+    )
+    parser.add_argument(
+        "--save-templates",
+        action="store_true",
+        help="Cree les vignettes de reference a partir de la calibration actuelle"
+    )
+    parser.add_argument(
+        "--templates",
+        type=Path,
+        default=TEMPLATES_FOLDER,
+        help=f"Dossier des vignettes (defaut: {TEMPLATES_FOLDER})"
+    )
+    parser.add_argument(
+        "--min-score",
+        type=float,
+        default=0.8,
+        help="Score minimal d'une correspondance fiable (defaut: 0.8)"
+    )
+    parser.add_argument(
+        "--min-margin",
+        type=float,
+        default=0.05,
+        help="Ecart minimal avec la position concurrente (defaut: 0.05)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Ecrit aussi les correspondances peu fiables"
+    )
+    return parser.parse_args()
+
+
+def load_calibration() -> dict:
+    """Charge la calibration du profil de l'ecran actuel (ou derivee d'un profil proche)."""
+    profiles = CalibrationProfiles(CALIBRATION_FILE)
+    layout = detect_layout(find_window(NWS_WINDOW_TITLE))
+    return {k: list(v) for k, v in profiles.select(layout).coordinates.items()}
+
+
+def save_calibration(coordinates: dict):
+    """Sauvegarde la calibration dans le profil de l'ecran actuel."""
+    profiles = CalibrationProfiles(CALIBRATION_FILE)
+    layout = detect_layout(find_window(NWS_WINDOW_TITLE))
+    name = profiles.store(layout, coordinates)
+    print(f"\nCalibration sauvegardee dans: {CALIBRATION_FILE} (profil {name})")
+
+
+def load_screens(folder: Path, names: list[str]) -> dict:
+    """Charge les captures enregistrees (<ecran>.<extension>)."""
+    screens = {}
+    for name in names:
+        for extension in SCREEN_EXTENSIONS:
+            path = folder / f"{name}{extension}"
+            if path.exists():
+                screens[name] = StoredScreens.load(path)
+                break
+        else:
+            print(f"  [--] Capture absente: {name}")
+    return screens
+
+
+def capture_screens(names: list[str]) -> dict:
+    """Capture chaque ecran apres confirmation de l'utilisateur (enregistre dans data/screens)."""
+    try:
+        import numpy as np
+        import pyautogui
+    except ImportError:
+        print("ERREUR: pyautogui n'est pas installe (ou utilisez --screens).")
+        sys.exit(1)
+
+    SCREENS_FOLDER.mkdir(parents=True, exist_ok=True)
+    screens = {}
+    for name in names:
+        print()
+        print(f"Ecran '{name}': {CALIBRATION_SCREENS[name]}")
+        answer = input("  Affichez cet ecran puis appuyez sur Entree ([S] pour passer) ")
+        if answer.strip().lower() == "s":
+            continue
+        time.sleep(0.3)
+        image = pyautogui.screenshot()
+        image.save(SCREENS_FOLDER / f"{name}.png")
+        screens[name] = np.asarray(image)
+        print(f"  [OK] Capture enregistree: {SCREENS_FOLDER / f'{name}.png'}")
+    return screens
+
+
+def save_templates(screens: dict, store: TemplateStore):
+    """Cree les vignettes de reference a partir de la calibration actuelle."""
+    calibration = load_calibration()
+    saved = 0
+    for element in ELEMENTS_TO_CALIBRATE:
+        eid, screen = element["id"], element["screen"]
+        if eid not in calibration or screen not in screens:
+            print(f"  [--] {eid}: non calibre ou capture absente")
+            continue
+        x, y = calibration[eid][0], calibration[eid][1]
+        template, anchor = crop_template(screens[screen], x, y)
+        store.save(eid, screen, template, anchor)
+        saved += 1
+    store.flush()
+    print(f"\n{saved} vignettes enregistrees dans: {store.folder}")
+
+
+def main():
+    """Point d'entrée principal."""
+    args = parse_args()
+    store = TemplateStore(args.templates)
+
+    print("=" * 60)
+    print("  CALIBRATION AUTOMATIQUE")
+    print("=" * 60)
+
+    if args.save_templates:
+        names = list(CALIBRATION_SCREENS)
+    else:
+        if not store.index:
+            print(f"ERREUR: Aucune vignette dans {store.folder}")
+            print("Calibrez une premiere fois (tools/calibration.py), puis: --save-templates")
+            sys.exit(1)
+        names = [s for s in CALIBRATION_SCREENS if any(e["screen"] == s for e in store.index.values())]
+
+    screens = load_screens(args.screens, names) if args.screens else capture_screens(names)
+    if not screens:
+        print("ERREUR: Aucune capture d'ecran")
+        sys.exit(1)
+
+    if args.save_templates:
+        save_templates(screens, store)
+        return
+
+    start = time.perf_counter()
+    matches = auto_calibrate(
+        screens,
+        store,
+        [e["id"] for e in ELEMENTS_TO_CALIBRATE],
+        args.min_score,
+        args.min_margin
+    )
+    elapsed = time.perf_counter() - start
+
+    coordinates = load_calibration()
+    print()
+    print(f"{'Element':<30} {'Position':<14} {'Score':>6} {'Ecart':>6}  Resultat")
+    print("-" * 72)
+    doubtful = []
+    for match in matches:
+        position = f"({match.x}, {match.y})"
+        if match.confident or args.force:
+            coordinates[match.element] = [match.x, match.y]
+        if match.confident:
+            verdict = "OK"
+        else:
+            verdict = "A VERIFIER" + (" (ecrit)" if args.force else " (non ecrit)")
+            doubtful.append(match.element)
+        print(f"{match.element:<30} {position:<14} {match.score:>6.3f} {match.margin:>6.3f}  {verdict}")
+
+    located = {m.element for m in matches}
+    missing = [e["id"] for e in ELEMENTS_TO_CALIBRATE if e["id"] not in located]
+
+    print()
+    print(f"{len(matches)} elements localises en {elapsed:.1f}s")
+    save_calibration(coordinates)
+
+    if doubtful:
+        print()
+        print("Correspondances peu fiables (verifiez avec tools/test_calibration.py --element ...):")
+        for eid in doubtful:
+            print(f"  - {eid}")
+    if missing:
+        print()
+        print("Elements non localises (sans vignette ou sans capture):")
+        for eid in missing:
+            print(f"  - {eid}")
+
+
+if __name__ == "__main__":
+    main()
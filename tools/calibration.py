@@ -9,7 +9,6 @@ Usage:
     uv run python tools/calibration.py
 """
 
-import json
 import sys
 import time
 from pathlib import Path
@@ -29,179 +28,16 @@ except ImportError:
     sys.exit(1)
 
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from territory_automation.elements import ELEMENTS_TO_CALIBRATE
+from territory_automation.profiles import CalibrationProfiles, detect_layout, find_window
+
 # Chemin du fichier de calibration
 CALIBRATION_FILE = Path(__file__).parent.parent / "data" / "calibration.json"
 
-# Éléments à calibrer avec leurs descriptions
-ELEMENTS_TO_CALIBRATE = [
-    # Navigation
-    {
-        "id": "btn_menu_territoires",
-        "name": "Menu Territoires",
-        "description": "Le bouton ou menu 'Territoires' dans la barre de navigation",
-        "group": "Navigation"
-    },
-    {
-        "id": "btn_liste_territoires",
-        "name": "Liste des territoires",
-        "description": "Le bouton 'Liste des territoires' (apres avoir clique sur Territoires)",
-        "group": "Navigation"
-    },
-    # Création territoire
-    {
-        "id": "btn_new_territory",
-        "name": "Bouton Nouveau (+)",
-        "description": "Le bouton '+' pour creer un nouveau territoire",
-        "group": "Creation"
-    },
-    # Champs du formulaire (ordre de saisie)
-    # 1. Catégorie
-    {
-        "id": "dropdown_categorie",
-        "name": "Menu deroulant Categorie",
-        "description": "Le menu deroulant pour selectionner la categorie (1er champ)",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_option_sar",
-        "name": "Option 'SAR'",
-        "description": "L'option 'SAR' dans le menu Categorie (ouvrez-le d'abord)",
-        "group": "Formulaire"
-    },
-    # 2. Numéro
-    {
-        "id": "field_numero",
-        "name": "Champ Numero",
-        "description": "Le champ de saisie du numero de territoire",
-        "group": "Formulaire"
-    },
-    # 3. Suffixe
-    {
-        "id": "field_suffixe",
-        "name": "Champ Suffixe",
-        "description": "Le champ de saisie du suffixe (A, B, etc.)",
-        "group": "Formulaire"
-    },
-    # 4. Type
-    {
-        "id": "dropdown_type",
-        "name": "Menu deroulant Type",
-        "description": "Le menu deroulant pour selectionner le type",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_option_presentiel",
-        "name": "Option 'En presentiel'",
-        "description": "L'option 'En presentiel' dans le menu deroulant Type (ouvrez-le d'abord)",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_option_courrier",
-        "name": "Option 'Courrier'",
-        "description": "L'option 'Courrier' dans le menu deroulant Type",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_option_telephone",
-        "name": "Option 'Telephone'",
-        "description": "L'option 'Telephone' dans le menu deroulant Type",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_option_entreprise",
-        "name": "Option 'Entreprise'",
-        "description": "L'option 'Entreprise' dans le menu deroulant Type",
-        "group": "Formulaire"
-    },
-    {
-        "id": "btn_confirm_type",
-        "name": "Bouton 'Oui' confirmation Type",
-        "description": "Le bouton 'Oui' du modal qui apparait quand on change de type (pas En presentiel)",
-        "group": "Formulaire"
-    },
-    # 5. Ville
-    {
-        "id": "dropdown_ville",
-        "name": "Menu deroulant Ville",
-        "description": "Le menu deroulant pour selectionner la ville (apres Type)",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_aucun",
-        "name": "Option 'Aucun'",
-        "description": "L'option 'Aucun' dans le menu Ville (ouvrez-le d'abord)",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_carrieres",
-        "name": "Option 'CARRIERE S/ BOIS'",
-        "description": "L'option 'CARRIERE S/ BOIS' dans le menu Ville",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_maisons",
-        "name": "Option 'MAISONS-LAFFITTE'",
-        "description": "L'option 'MAISONS-LAFFITTE' dans le menu Ville",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_mesnil",
-        "name": "Option 'MESNIL LE ROI'",
-        "description": "L'option 'MESNIL LE ROI' dans le menu Ville",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_montesson",
-        "name": "Option 'MONTESSON'",
-        "description": "L'option 'MONTESSON' dans le menu Ville",
-        "group": "Formulaire"
-    },
-    {
-        "id": "dropdown_ville_sartrouville",
-        "name": "Option 'SARTROUVILLE'",
-        "description": "L'option 'SARTROUVILLE' dans le menu Ville",
-        "group": "Formulaire"
-    },
-    # 6. Lien GPS
-    {
-        "id": "field_lien_gps",
-        "name": "Champ Lien GPS",
-        "description": "Le champ de saisie du lien GPS",
-        "group": "Formulaire"
-    },
-    {
-        "id": "field_notes",
-        "name": "Champ Notes",
-        "description": "Le champ de saisie des notes generales",
-        "group": "Formulaire"
-    },
-    {
-        "id": "field_ne_pas_visiter",
-        "name": "Champ Ne pas visiter",
-        "description": "Le champ pour les adresses a ne pas visiter",
-        "group": "Formulaire"
-    },
-    {
-        "id": "field_notes_proclamateur",
-        "name": "Champ Notes proclamateur",
-        "description": "Le champ pour les notes du proclamateur",
-        "group": "Formulaire"
-    },
-    # Navigation formulaire
-    {
-        "id": "btn_carte",
-        "name": "Bouton Carte",
-        "description": "L'onglet ou bouton 'Carte' pour passer a l'ecran de la carte",
-        "group": "Formulaire"
-    },
-    # Actions
-    {
-        "id": "btn_import_pdf",
-        "name": "Bouton Ajouter fichier",
-        "description": "Le bouton 'Ajouter fichier' pour importer un PDF",
-        "group": "Actions"
-    },
-]
+# Titre de la fenêtre NWS (identique à NWS_WINDOW_TITLE dans config.py)
+NWS_WINDOW_TITLE = "NW Scheduler"
 
 
 def clear_screen():
@@ -232,24 +68,19 @@ def print_instructions():
 
 
 def load_existing_calibration() -> dict:
-    """Charge la calibration existante si elle existe."""
-    if CALIBRATION_FILE.exists():
-        try:
-            with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-    return {}
+    """Charge la calibration du profil de l'ecran actuel (ou derivee d'un profil proche)."""
+    profiles = CalibrationProfiles(CALIBRATION_FILE)
+    layout = detect_layout(find_window(NWS_WINDOW_TITLE))
+    return {k: list(v) for k, v in profiles.select(layout).coordinates.items()}
 
 
 def save_calibration(coordinates: dict):
-    """Sauvegarde la calibration dans le fichier JSON."""
-    CALIBRATION_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-    with open(CALIBRATION_FILE, "w", encoding="utf-8") as f:
-        json.dump(coordinates, f, indent=2, ensure_ascii=False)
+    """Sauvegarde la calibration dans le profil de l'ecran actuel."""
+    profiles = CalibrationProfiles(CALIBRATION_FILE)
+    layout = detect_layout(find_window(NWS_WINDOW_TITLE))
+    name = profiles.store(layout, coordinates)
 
-    print(f"\nCalibration sauvegardee dans: {CALIBRATION_FILE}")
+    print(f"\nCalibration sauvegardee dans: {CALIBRATION_FILE} (profil {name})")
 
 
 def capture_element(element: dict, existing_coords: dict) -> tuple:
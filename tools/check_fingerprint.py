@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Verification hors ligne des empreintes d'ecran (--pixel-check).
+
+Compare deux captures d'ecran enregistrees (avant/apres une action) autour
+des elements calibres, avec les memes reglages que l'automatisation
+(PIXEL_VERIFY_* dans config.py). Sert a regler les seuils sans lancer NWS.
+
+Usage:
+    uv run python tools/check_fingerprint.py avant.png apres.png
+    uv run python tools/check_fingerprint.py avant.png apres.png --element dropdown_type
+    uv run python tools/check_fingerprint.py avant.npy apres.npy --at 640 310
+
+Empreintes attendues (PIXEL_VERIFY_EXPECT = {"dropdown_type": "match"}):
+    uv run python tools/check_fingerprint.py ferme.png menu_ouvert.png \
+        --element dropdown_type --save-expected
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config import (
+    COORDINATES,
+    PIXEL_VERIFY_RADIUS,
+    PIXEL_VERIFY_TOLERANCE,
+    PIXEL_VERIFY_MIN_CHANGE,
+    PIXEL_VERIFY_REGIONS,
+    PIXEL_VERIFY_FINGERPRINTS,
+)
+from territory_automation.fingerprint import ActionVerifier, StoredScreens, difference
+
+
+def parse_args():
+    """Parse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(
+        description="Compare deux captures d'ecran autour des elements calibres"
+    )
+    parser.add_argument("before", type=Path, help="Capture avant l'action (.png, .npy...)")
+    parser.add_argument("after", type=Path, help="Capture apres l'action")
+    parser.add_argument("--element", type=str, help="Verifier uniquement cet element")
+    parser.add_argument(
+        "--at",
+        type=int,
+        nargs=2,
+        metavar=("X", "Y"),
+        help="Verifier un point quelconque au lieu des elements calibres"
+    )
+    parser.add_argument("--radius", type=int, default=PIXEL_VERIFY_RADIUS)
+    parser.add_argument("--tolerance", type=int, default=PIXEL_VERIFY_TOLERANCE)
+    parser.add_argument("--min-change", type=float, default=PIXEL_VERIFY_MIN_CHANGE)
+    parser.add_argument(
+        "--save-expected",
+        nargs="?",
+        type=Path,
+        const=PIXEL_VERIFY_FINGERPRINTS,
+        metavar="DOSSIER",
+        help="Enregistre l'empreinte de la capture apres l'action comme empreinte attendue "
+             "(<element>.npy, defaut: PIXEL_VERIFY_FINGERPRINTS)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Point d'entrée principal."""
+    args = parse_args()
+
+    screens = StoredScreens({"before": args.before, "after": args.after})
+    verifier = ActionVerifier(
+        screens,
+        radius=args.radius,
+        tolerance=args.tolerance,
+        min_change=args.min_change,
+        regions=PIXEL_VERIFY_REGIONS,
+    )
+
+    if args.at:
+        targets = {"point": tuple(args.at)}
+    elif args.element:
+        if args.element not in COORDINATES:
+            print(f"ERREUR: Element non calibre: {args.element}")
+            sys.exit(1)
+        targets = {args.element: COORDINATES[args.element]}
+    else:
+        targets = COORDINATES
+
+    print(f"{'Element':<30} {'Region':<24} {'Change':>8}  Resultat")
+    print("-" * 75)
+    for element, (x, y) in targets.items():
+        screens.show("before")
+        snapshot = verifier.capture(element, x, y)
+        if snapshot is None:
+            print(f"{element:<30} hors de la capture")
+            continue
+        screens.show("after")
+        after = verifier.capture(element, x, y)
+        score = difference(snapshot.print, after.print, args.tolerance) if after else 1.0
+        verdict = "modifie" if score >= args.min_change else "identique"
+        print(f"{element:<30} {str(snapshot.box):<24} {score:>7.1%}  {verdict}")
+
+        if args.save_expected and after is not None:
+            args.save_expected.mkdir(parents=True, exist_ok=True)
+            path = args.save_expected / f"{element}.npy"
+            np.save(path, after.print)
+            print(f"{'':<30} empreinte attendue: {path}")
+
+
+if __name__ == "__main__":
+    main()
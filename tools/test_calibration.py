@@ -11,7 +11,6 @@ Usage:
 """
 
 import argparse
-import json
 import sys
 import time
 from pathlib import Path
@@ -26,9 +25,16 @@ except ImportError:
 # Désactiver le failsafe pendant le test (optionnel)
 # pyautogui.FAILSAFE = False
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from territory_automation.profiles import CalibrationProfiles, detect_layout, find_window
+
 # Chemin du fichier de calibration
 CALIBRATION_FILE = Path(__file__).parent.parent / "data" / "calibration.json"
 
+# Titre de la fenêtre NWS (identique à NWS_WINDOW_TITLE dans config.py)
+NWS_WINDOW_TITLE = "NW Scheduler"
+
 # Descriptions des éléments pour l'affichage
 ELEMENT_DESCRIPTIONS = {
     "btn_menu_territoires": "Menu Territoires",
@@ -90,15 +96,20 @@ TEST_ORDER = [
 ]
 
 
-def load_calibration() -> dict:
-    """Charge les coordonnées calibrées."""
-    if not CALIBRATION_FILE.exists():
+def load_calibration(profile: str = None) -> dict:
+    """Charge les coordonnées du profil de l'écran actuel (ou du profil demandé)."""
+    profiles = CalibrationProfiles(CALIBRATION_FILE)
+    if not len(profiles):
         print(f"ERREUR: Fichier de calibration non trouve: {CALIBRATION_FILE}")
         print("Executez d'abord: uv run python tools/calibration.py")
         sys.exit(1)
+    if profile is not None and profile not in profiles:
+        print(f"ERREUR: Profil inconnu: {profile} (disponibles: {', '.join(profiles.profiles)})")
+        sys.exit(1)
 
-    with open(CALIBRATION_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    choice = profiles.select(detect_layout(find_window(NWS_WINDOW_TITLE)), profile)
+    print(f"Profil de calibration: {choice.profile}" + (" (derive pour cet ecran)" if choice.transform else ""))
+    return {k: list(v) for k, v in choice.coordinates.items()}
 
 
 def parse_args():
@@ -127,6 +138,11 @@ def parse_args():
         type=str,
         help="Tester uniquement cet element (ex: btn_new_territory)"
     )
+    parser.add_argument(
+        "--profile",
+        type=str,
+        help="Profil de calibration a tester (defaut: celui de l'ecran actuel)"
+    )
     parser.add_argument(
         "--list",
         action="store_true",
@@ -186,7 +202,7 @@ def main():
     args = parse_args()
 
     # Charger la calibration
-    calibration = load_calibration()
+    calibration = load_calibration(args.profile)
 
     print("=" * 60)
     print("  TEST DES COORDONNEES CALIBREES")